@@ -2,11 +2,12 @@
 .. include:: ../README.md
 """
 
-from dep_graph_viz.dep_graph_viz import main
+from typing import Any
 
 __all__ = [
-	# actually imported function
+	# actually imported functions
 	"main",
+	"build_graph_for",
 	# modules
 	"__main__",
 	"dep_graph_viz",
@@ -14,3 +15,13 @@ __all__ = [
 	"html",
 	"util",
 ]
+
+
+def __getattr__(name: str) -> Any:
+	# importing `dep_graph_viz.dep_graph_viz` is deferred until it is used, so that
+	# `import dep_graph_viz` or `dep_graph_viz.util` alone stays cheap
+	if name in ("main", "build_graph_for"):
+		from dep_graph_viz import dep_graph_viz
+
+		return getattr(dep_graph_viz, name)
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
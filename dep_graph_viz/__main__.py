@@ -1,6 +1,17 @@
+import sys
+
 from dep_graph_viz import main
 
 if __name__ == "__main__":
 	import fire
 
-	fire.Fire(main)
+	if len(sys.argv) > 1 and sys.argv[1] == "batch":
+		from dep_graph_viz.batch import batch_main
+
+		fire.Fire(batch_main, command=sys.argv[2:])
+	elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+		from dep_graph_viz.serve import serve_main
+
+		fire.Fire(serve_main, command=sys.argv[2:])
+	else:
+		fire.Fire(main)
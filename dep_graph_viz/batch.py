@@ -0,0 +1,373 @@
+"""batch mode: graphs for many package roots in one process
+
+```
+python -m dep_graph_viz batch pkgs/a pkgs/b --modules=numpy --output_dir=graphs --combined
+```
+
+builds each package in turn, sharing one process pool and one import cache between them, and running git
+once per repository rather than once per package. imports of one package by another are resolved to the
+imported module and drawn as `cross_package` edges, even if externals are left out. with `--combined`, all
+packages are also written as a single graph in which those edges meet the imported nodes.
+"""
+
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import ContextManager, Sequence
+
+import networkx as nx
+from muutils.dictmagic import kwargs_to_nested_dict, update_with_nested_dict
+
+from dep_graph_viz.config import _DEFAULT_CONFIG, _process_config
+from dep_graph_viz.csr import as_networkx
+from dep_graph_viz.dep_graph_viz import (
+	Node,
+	_set_package_name,
+	build_graph,
+	node_module_parts,
+	write_outputs,
+)
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.module_index import ModuleIndex, split_module_name
+from dep_graph_viz.util.parallel import resolve_workers
+from dep_graph_viz.util.paths import (
+	find_git_root,
+	get_module_directory,
+	get_package_repository_url,
+)
+
+
+@dataclass
+class BatchPackage:
+	"""one package of a batch
+
+	# Parameters:
+	 - `name : str`
+	    name of its outputs, the directory name with a suffix if another package has the same one
+	 - `root : str`
+	    directory of the package
+	 - `config : dict`
+	    processed config for this package
+	 - `G : nx.MultiDiGraph | None`
+	    the graph, once built
+	   (defaults to `None`)
+	 - `root_is_package : bool`
+	    whether the root has an `__init__.py`, so that its modules are importable by absolute name. set
+	    when built
+	   (defaults to `False`)
+	"""
+
+	name: str
+	root: str
+	config: dict
+	G: nx.MultiDiGraph | None = None
+	root_is_package: bool = False
+
+	@property
+	def package_name(self) -> str:
+		return self.config["PACKAGE_NAME"]
+
+	def qualified_name(self, node: Node) -> str:
+		"absolute module name of `node`, or `name/path` for directories and scripts which aren't importable"
+		if self.root_is_package and node.is_module():
+			return ".".join((self.package_name,) + node_module_parts(node))
+		if node.is_root():
+			return self.name
+		return f"{self.name}/{node.rel_path}"
+
+
+def read_manifest(path: str) -> tuple[list[str], list[str]]:
+	"""roots and module names from a JSON manifest
+
+	the manifest is either a list of roots, or an object with optional `roots` and `modules` lists.
+	relative roots are relative to the directory of the manifest
+	"""
+	with open(path, "r", encoding="utf-8") as f:
+		data: list | dict = json.load(f)
+	if isinstance(data, list):
+		data = {"roots": data}
+	if not isinstance(data, dict):
+		raise ValueError(
+			f"manifest must be a list of roots or an object with `roots` and `modules`, got {type(data) = }"
+		)
+	base_dir: str = os.path.dirname(os.path.abspath(path))
+	roots: list[str] = [os.path.join(base_dir, root) for root in data.get("roots", [])]
+	modules: list[str] = list(data.get("modules", []))
+	return roots, modules
+
+
+def _as_list(value: str | Sequence[str] | None) -> list[str]:
+	"fire passes `a,b` as a tuple and a single value as a string"
+	if value is None:
+		return []
+	if isinstance(value, str):
+		return [v for v in value.split(",") if v]
+	return list(value)
+
+
+def package_configs(
+	roots: list[str],
+	modules: list[str],
+	base_config: dict,
+) -> list[BatchPackage]:
+	"""a processed copy of `base_config` for each root and module, as `main` would make it
+
+	git is run once per repository: packages in a work tree which was already seen reuse its url prefix
+	"""
+	url_prefixes: dict[str, str | None] = dict()
+	names_seen: dict[str, int] = dict()
+	entries: list[tuple[str, str | None]] = [(root, None) for root in roots] + [
+		(get_module_directory(module), module) for module in modules
+	]
+
+	packages: list[BatchPackage] = []
+	for root, module in entries:
+		config: dict = deepcopy(base_config)
+		module_url_prefix: str | None = None
+		if module is not None and config["url_prefix"] is None:
+			module_url_prefix = get_package_repository_url(module)
+
+		git_root: str | None = None
+		if config["url_prefix"] is None and config["auto_url_format"] is not None:
+			git_root = find_git_root(root)
+		if git_root is not None and git_root in url_prefixes:
+			config["url_prefix"] = url_prefixes[git_root]
+			_process_config(config, root=None)
+		else:
+			# not in a git repository at all -- don't bother running git
+			_process_config(config, root=root if git_root is not None else None)
+			if git_root is not None:
+				url_prefixes[git_root] = config["url_prefix"]
+		if module_url_prefix is not None:
+			config["url_prefix"] = module_url_prefix
+		_set_package_name(config, root)
+
+		name: str = config["PACKAGE_NAME"]
+		names_seen[name] = names_seen.get(name, 0) + 1
+		if names_seen[name] > 1:
+			name = f"{name}_{names_seen[name]}"
+		packages.append(BatchPackage(name=name, root=root, config=config))
+
+	return packages
+
+
+def build_packages(
+	packages: list[BatchPackage],
+	import_cache: ImportCache,
+	executor: Executor | None = None,
+) -> None:
+	"build the graph of each package, keeping externals so that imports of other packages can be found"
+	for package in packages:
+		print(f"# building graph for '{package.name}' at '{package.root}'")
+		build_config: dict = {
+			**package.config,
+			"graph": {**package.config["graph"], "include_externals": True},
+		}
+		G: nx.MultiDiGraph = as_networkx(
+			build_graph(
+				root=package.root,
+				config=build_config,
+				import_cache=import_cache,
+				executor=executor,
+			)
+		)
+		G.graph["config"] = package.config
+		package.G = G
+		package.root_is_package = any(
+			isinstance(node, Node) and node.node_type == "module_root"
+			for node in G.nodes
+		)
+
+
+def cross_package_index(
+	packages: list[BatchPackage],
+) -> ModuleIndex[tuple[BatchPackage, Node]]:
+	"the modules of every package whose root is itself a package, by absolute module name"
+	index: ModuleIndex[tuple[BatchPackage, Node]] = ModuleIndex()
+	for package in packages:
+		if not package.root_is_package:
+			continue
+		assert package.G is not None, f"package {package.name!r} is not built"
+		for node in package.G.graph["nodes_dict"].values():
+			if node.is_module():
+				index.add(
+					split_module_name(package.qualified_name(node)), (package, node)
+				)
+	return index
+
+
+def resolve_cross_package_imports(packages: list[BatchPackage]) -> None:
+	"""replace external nodes which are modules of another package in the batch, in place
+
+	each becomes a node named after the imported module, with `cross_package` edges to its importers.
+	other external nodes are then dropped, unless `graph.include_externals` is set for the package.
+	imports are matched to the longest module prefix of the name the external node was given, so
+	`from other import submodule` points at `other` itself
+	"""
+	index: ModuleIndex[tuple[BatchPackage, Node]] = cross_package_index(packages)
+	for package in packages:
+		assert package.G is not None, f"package {package.name!r} is not built"
+		G: nx.MultiDiGraph = package.G
+		edge_attrs: dict | None = package.config["edge"].get("cross_package")
+		include_externals: bool = package.config["graph"]["include_externals"]
+
+		# find them all first, a resolved name can be another external node
+		resolved: list[tuple[str, list[Node]]] = []
+		to_remove: list[str] = []
+		for node in list(G.nodes):
+			if isinstance(node, Node):
+				continue
+			found: tuple[tuple[BatchPackage, Node], int] | None = index.longest_prefix(
+				split_module_name(node)
+			)
+			if found is not None and found[0][0] is not package and edge_attrs:
+				target_package, target_node = found[0]
+				importers: list[Node] = [
+					v for _, v, key in G.out_edges(node, keys=True) if key == "external"
+				]
+				resolved.append((target_package.qualified_name(target_node), importers))
+				to_remove.append(node)
+			elif not include_externals:
+				to_remove.append(node)
+
+		G.remove_nodes_from(to_remove)
+		if not edge_attrs:
+			# cross-package edges are turned off, nothing was resolved
+			continue
+		for name, importers in resolved:
+			G.add_node(name, rank=0, **package.config["node"]["external"])
+			for importer in importers:
+				G.add_edge(name, importer, key="cross_package", **edge_attrs)
+
+
+def combine_graphs(packages: list[BatchPackage]) -> nx.MultiDiGraph:
+	"""all packages in one graph, with nodes renamed by `BatchPackage.qualified_name`
+
+	cross-package edges then meet the node of the imported module. external modules are shared
+	"""
+	H: nx.MultiDiGraph = nx.MultiDiGraph()
+	mappings: list[dict[Node, str]] = []
+	graphs: list[nx.MultiDiGraph] = []
+	for package in packages:
+		assert package.G is not None, f"package {package.name!r} is not built"
+		graphs.append(package.G)
+	# package nodes first, so that their attributes win over those of cross-package placeholders
+	for package, G in zip(packages, graphs):
+		mapping: dict[Node, str] = dict()
+		for node, attrs in G.nodes(data=True):
+			if isinstance(node, Node):
+				mapping[node] = package.qualified_name(node)
+				H.add_node(mapping[node], **attrs)
+		mappings.append(mapping)
+
+	for G, mapping in zip(graphs, mappings):
+		for node, attrs in G.nodes(data=True):
+			if not isinstance(node, Node) and node not in H:
+				H.add_node(node, **attrs)
+		for u, v, key, attrs in G.edges(keys=True, data=True):
+			H.add_edge(mapping.get(u, u), mapping.get(v, v), key=key, **attrs)
+	return H
+
+
+def batch_main(
+	*roots: str,
+	modules: str | Sequence[str] | None = None,
+	manifest: str | None = None,
+	output_dir: str = "dep_graphs",
+	output_fmt: str | Sequence[str] = "svg",
+	combined: bool = False,
+	config_file: str | None = None,
+	verbose: bool = False,
+	**kwargs,
+) -> dict[str, str]:
+	"""generate graphs for several packages in one go, see `dep_graph_viz.batch`
+
+	# Arguments
+	- `*roots: str`
+	    root directories of the packages
+	- `modules: str | list[str] | None`
+	    names of importable modules to add, comma separated on the command line
+	- `manifest: str | None`
+	    JSON file with a list of roots, or an object with `roots` and `modules` lists
+	- `output_dir: str`
+	    outputs are written here as `{package}.dot` and `{package}.{output_fmt}`
+	    default: `"dep_graphs"`
+	- `output_fmt: str | Sequence[str]`
+	    `svg`, `png`, `html`, etc. or several of them, as for `main`
+	    default: `"svg"`
+	- `combined: bool`
+	    also write all packages as one graph, to `combined.dot` and `combined.{output_fmt}`
+	    default: `False`
+	- `config_file: str | None`
+	    JSON config for all packages, as for `main`. options can also be given as `--edge.uses.color=...`.
+	    `edge.cross_package` styles the edges for imports of one package by another
+	- `verbose: bool`
+
+	# Returns:
+	 - `dict[str, str]`
+	    output path (without extension) of each package, and of `combined` if written
+	"""
+	all_roots: list[str] = list(roots)
+	all_modules: list[str] = _as_list(modules)
+	if manifest is not None:
+		manifest_roots, manifest_modules = read_manifest(manifest)
+		all_roots.extend(manifest_roots)
+		all_modules.extend(manifest_modules)
+	if not all_roots and not all_modules:
+		raise ValueError("no packages given, pass roots, `--modules`, or `--manifest`")
+
+	# config shared by all packages
+	# --------------------------------------------------
+	CONFIG: dict = deepcopy(_DEFAULT_CONFIG)
+	if config_file is not None:
+		with open(config_file, "r", encoding="utf-8") as f:
+			update_with_nested_dict(CONFIG, json.load(f))
+	if len(kwargs) > 0:
+		update_with_nested_dict(
+			CONFIG,
+			kwargs_to_nested_dict(kwargs, transform_key=lambda x: x.lstrip("-"), sep="."),
+		)
+
+	packages: list[BatchPackage] = package_configs(all_roots, all_modules, CONFIG)
+
+	# build everything with one pool and one cache
+	# --------------------------------------------------
+	import_cache: ImportCache = ImportCache.from_config(CONFIG)
+	n_workers: int = resolve_workers(CONFIG["graph"].get("workers"))
+	pool: ContextManager[Executor | None] = (
+		ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else nullcontext()
+	)
+	with pool as executor:
+		build_packages(packages, import_cache=import_cache, executor=executor)
+	import_cache.save()
+	print(f"# {import_cache.summary()}")
+
+	resolve_cross_package_imports(packages)
+
+	# outputs
+	# --------------------------------------------------
+	os.makedirs(output_dir, exist_ok=True)
+	outputs: dict[str, str] = dict()
+	for package in packages:
+		output: str = os.path.join(output_dir, package.name)
+		write_outputs(
+			package.G,
+			output=output,
+			output_fmt=output_fmt,
+			config=package.config,
+			verbose=verbose,
+		)
+		outputs[package.name] = output
+
+	if combined:
+		output = os.path.join(output_dir, "combined")
+		H: nx.MultiDiGraph = combine_graphs(packages)
+		print(f"# combined graph has {H.number_of_nodes()} nodes and {H.number_of_edges()} edges")
+		write_outputs(H, output=output, output_fmt=output_fmt, config=CONFIG, verbose=verbose)
+		outputs["combined"] = output
+
+	print("# done!")
+	return outputs
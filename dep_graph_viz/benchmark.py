@@ -0,0 +1,456 @@
+"""benchmarks on generated packages, timing each phase of building and rendering a graph
+
+`generate_package` writes a synthetic package with a given number of modules, nesting depth, import
+fan-out and file size. `run_benchmark` times each phase on it separately:
+
+- `discovery`: walking the filesystem (`FileSystemIndex.build`)
+- `classification`: creating a `Node` for every directory and file
+- `import_parsing`: reading and parsing every file, with a cold import cache
+- `edge_resolution`: turning the imports into edges (`get_import_edges`)
+- `build_graph`: all of the above end to end, as `main` runs it, with a cold import cache
+- `build_graph_cached`: the same, with every file already in the import cache
+- `dot_writing`: writing the dot file
+- `rendering`: running `dot`, if it is installed and the graph is not too large
+
+plus the peak memory traced by `tracemalloc` while building the graph (this does not count worker processes).
+
+results are written as JSON, so runs on different commits can be compared with `compare_benchmarks`:
+```
+python -m dep_graph_viz.benchmark run --sizes 10,100,1000,10000 --output bench.json
+python -m dep_graph_viz.benchmark compare old.json bench.json
+```
+"""
+
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import asdict, dataclass
+from typing import Any, Iterator, Sequence
+
+import networkx as nx
+from muutils.dictmagic import kwargs_to_nested_dict, update_with_nested_dict
+
+from dep_graph_viz.config import _DEFAULT_CONFIG, _process_config
+from dep_graph_viz.csr import CSRGraph
+from dep_graph_viz.dep_graph_viz import (
+	Node,
+	build_graph,
+	get_import_edges,
+	get_module_index,
+	get_source_path,
+	write_dot,
+)
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.fs_index import FileSystemIndex
+from dep_graph_viz.util.module_index import ModuleIndex
+from dep_graph_viz.util.parallel import get_imports_many
+from dep_graph_viz.util.util import ImportRecord, ImportScanOptions
+
+BENCHMARK_FORMAT_VERSION: int = 1
+
+PHASES: tuple[str, ...] = (
+	"discovery",
+	"classification",
+	"import_parsing",
+	"edge_resolution",
+	"build_graph",
+	"build_graph_cached",
+	"dot_writing",
+	"rendering",
+)
+
+_STDLIB_IMPORTS: tuple[str, ...] = ("os", "sys", "json", "re", "typing", "collections")
+
+
+@dataclass(frozen=True)
+class SyntheticPackageSpec:
+	"""shape of a generated package
+
+	# Parameters:
+	 - `n_modules : int`
+	    number of module files, not counting `__init__.py` files
+	 - `depth : int`
+	    levels of subpackages below the root package
+	 - `branching : int`
+	    subpackages in each package above the deepest level
+	 - `fan_out : int`
+	    imports of other modules in the package, per module
+	 - `lines_per_module : int`
+	    approximate length of each module, padded with filler functions
+	 - `seed : int`
+	    for choosing which modules import which
+	 - `name : str`
+	    name of the package
+	"""
+
+	n_modules: int = 100
+	depth: int = 2
+	branching: int = 4
+	fan_out: int = 5
+	lines_per_module: int = 50
+	seed: int = 0
+	name: str = "synthpkg"
+
+	def package_dirs(self) -> list[str]:
+		"posix paths of the subpackages relative to the package root, the root being `.`"
+		dirs: list[str] = ["."]
+		level: list[str] = ["."]
+		for _ in range(self.depth):
+			level = [
+				f"p{i}" if parent == "." else f"{parent}/p{i}"
+				for parent in level
+				for i in range(self.branching)
+			]
+			dirs.extend(level)
+		return dirs
+
+
+def _module_name(spec: SyntheticPackageSpec, package_dir: str, module: str) -> str:
+	if package_dir == ".":
+		return f"{spec.name}.{module}"
+	return f"{spec.name}.{package_dir.replace('/', '.')}.{module}"
+
+
+def generate_package(output_dir: str, spec: SyntheticPackageSpec) -> str:
+	"""write a synthetic package to `output_dir/spec.name`, returning its path
+
+	modules are spread round-robin over the subpackages, and each imports `spec.fan_out` other modules
+	chosen at random, with a mix of `import a.b.c` and `from a.b import c` statements
+	"""
+	rng: random.Random = random.Random(spec.seed)
+	package_path: str = os.path.join(output_dir, spec.name)
+	package_dirs: list[str] = spec.package_dirs()
+
+	for package_dir in package_dirs:
+		os.makedirs(os.path.join(package_path, package_dir), exist_ok=True)
+		with open(
+			os.path.join(package_path, package_dir, "__init__.py"), "w", encoding="utf-8"
+		) as f:
+			f.write(f'"package {package_dir}"\n')
+
+	# assign modules to packages
+	modules: list[tuple[str, str]] = [
+		(package_dirs[i % len(package_dirs)], f"m{i}") for i in range(spec.n_modules)
+	]
+	module_names: list[str] = [_module_name(spec, d, m) for d, m in modules]
+
+	for i, (package_dir, module) in enumerate(modules):
+		lines: list[str] = [f'"synthetic module {i}"', ""]
+		lines.extend(
+			f"import {name}" for name in rng.sample(_STDLIB_IMPORTS, k=2)
+		)
+		n_imports: int = min(spec.fan_out, spec.n_modules - 1)
+		for j in rng.sample(range(spec.n_modules - 1), k=n_imports):
+			# skip over this module
+			target: str = module_names[j if j < i else j + 1]
+			if rng.random() < 0.5:
+				lines.append(f"import {target}")
+			else:
+				parent, _, leaf = target.rpartition(".")
+				lines.append(f"from {parent} import {leaf}")
+		lines.append("")
+
+		# pad with filler functions
+		n_func: int = 0
+		while len(lines) < spec.lines_per_module:
+			lines.extend(
+				[
+					"",
+					f"def func_{n_func}(x: int) -> int:",
+					f'\t"filler function {n_func}"',
+					f"\ty = x * {n_func} + {i}",
+					"\treturn y",
+				]
+			)
+			n_func += 1
+
+		with open(
+			os.path.join(package_path, package_dir, f"{module}.py"), "w", encoding="utf-8"
+		) as f:
+			f.write("\n".join(lines) + "\n")
+
+	return package_path
+
+
+def benchmark_config(
+	package_name: str, config_overrides: dict | None = None
+) -> dict:
+	"processed config for benchmarking: no git lookups and no on-disk import cache"
+	config: dict = deepcopy(_DEFAULT_CONFIG)
+	config["auto_url_format"] = None
+	config["import_cache"]["enabled"] = False
+	if config_overrides:
+		update_with_nested_dict(config, config_overrides)
+	_process_config(config, root=None)
+	config["PACKAGE_NAME"] = package_name
+	if not config["graph"]["strip_module_prefix"]:
+		config["root_node_name"] = package_name
+	return config
+
+
+class PhaseTimer:
+	"wall-clock time of named phases, keeping the fastest of repeated runs"
+
+	def __init__(self) -> None:
+		self.timings: dict[str, float] = dict()
+
+	@contextmanager
+	def phase(self, name: str) -> Iterator[None]:
+		start: float = time.perf_counter()
+		try:
+			yield
+		finally:
+			elapsed: float = time.perf_counter() - start
+			self.timings[name] = min(elapsed, self.timings.get(name, elapsed))
+
+
+@contextmanager
+def _chdir(path: str) -> Iterator[None]:
+	orig_dir: str = os.getcwd()
+	os.chdir(path)
+	try:
+		yield
+	finally:
+		os.chdir(orig_dir)
+
+
+def _time_phases(timer: PhaseTimer, config: dict) -> None:
+	"time the phases of `build_graph` separately, run from the package root"
+	with timer.phase("discovery"):
+		fs_index: FileSystemIndex = FileSystemIndex.build(".")
+		directories: list[str] = sorted(fs_index.relevant_directories())
+		python_files: list[str] = fs_index.python_files()
+
+	with timer.phase("classification"):
+		directory_nodes: dict[str, Node] = {
+			directory: Node.get_node(directory, config=config, fs_index=fs_index)
+			for directory in directories
+		}
+		file_nodes: list[Node] = [
+			Node.get_node(path, config=config, fs_index=fs_index)
+			for path in python_files
+			if not path.endswith("__init__.py")
+		]
+		nodes: list[Node] = list(directory_nodes.values()) + file_nodes
+
+	# as in `build_graph`, directories can only be imported if they have an `__init__.py`
+	nodes_dict: dict[str, Node] = {
+		node.display_name: node
+		for directory, node in directory_nodes.items()
+		if fs_index.has_init(directory)
+	}
+	nodes_dict.update({node.display_name: node for node in file_nodes})
+	sources: list[tuple[Node, str]] = [
+		(node, get_source_path(node, fs_index)) for node in nodes
+	]
+	with timer.phase("import_parsing"):
+		imports_results: list[list[ImportRecord] | BaseException] = get_imports_many(
+			[node_path for _, node_path in sources],
+			import_cache=ImportCache(cache_dir=None),
+			options=ImportScanOptions.from_config(config),
+			workers=config["graph"].get("workers"),
+		)
+
+	with timer.phase("edge_resolution"):
+		module_index: ModuleIndex[Node] = get_module_index(
+			nodes_dict,
+			package_name=config["PACKAGE_NAME"],
+			root_is_package=fs_index.has_init("."),
+		)
+		for (node, node_path), imports_result in zip(sources, imports_results):
+			if isinstance(imports_result, BaseException):
+				continue
+			get_import_edges(
+				node=node,
+				node_path=node_path,
+				imports=list(dict.fromkeys(imports_result)),
+				module_index=module_index,
+				config=config,
+			)
+
+
+def run_benchmark(
+	spec: SyntheticPackageSpec,
+	workdir: str,
+	config_overrides: dict | None = None,
+	repeat: int = 1,
+	render_fmt: str = "svg",
+	render_max_nodes: int = 2_000,
+) -> dict[str, Any]:
+	"""generate a package in `workdir` and time each phase on it, keeping the fastest of `repeat` runs
+
+	# Returns:
+	 - `dict[str, Any]`
+	    the spec, graph size, `timings` in seconds for each of `PHASES` (`None` if skipped), and peak memory
+	"""
+	package_path: str = generate_package(workdir, spec)
+	config: dict = benchmark_config(spec.name, config_overrides)
+	timer: PhaseTimer = PhaseTimer()
+	output: str = os.path.join(os.path.abspath(workdir), "benchmark_output")
+
+	with _chdir(package_path):
+		G: nx.MultiDiGraph | CSRGraph
+		for _ in range(repeat):
+			_time_phases(timer, config)
+
+			import_cache: ImportCache = ImportCache(cache_dir=None)
+			with timer.phase("build_graph"):
+				G = build_graph(root=".", config=config, import_cache=import_cache)
+			with timer.phase("build_graph_cached"):
+				G = build_graph(root=".", config=config, import_cache=import_cache)
+
+			with timer.phase("dot_writing"):
+				write_dot(
+					G,
+					f"{output}.dot",
+					dot_attrs=config["dot_attrs"],
+					writer=config["dot_writer"],
+				)
+
+			if shutil.which("dot") and G.number_of_nodes() <= render_max_nodes:
+				with timer.phase("rendering"):
+					subprocess.run(
+						["dot", f"-T{render_fmt}", f"{output}.dot", "-o", f"{output}.{render_fmt}"],
+						check=True,
+					)
+
+		# memory is measured on a separate run, since tracing slows everything down
+		tracemalloc.start()
+		try:
+			build_graph(root=".", config=config, import_cache=ImportCache(cache_dir=None))
+			_, peak_memory = tracemalloc.get_traced_memory()
+		finally:
+			tracemalloc.stop()
+
+	return dict(
+		spec=asdict(spec),
+		n_files=spec.n_modules + len(spec.package_dirs()),
+		n_nodes=G.number_of_nodes(),
+		n_edges=G.number_of_edges(),
+		timings={name: timer.timings.get(name) for name in PHASES},
+		peak_memory_bytes=peak_memory,
+	)
+
+
+def _git_commit() -> str | None:
+	"commit of the source tree this module is in, if it is a git checkout"
+	try:
+		return subprocess.check_output(
+			["git", "rev-parse", "HEAD"],
+			cwd=os.path.dirname(os.path.abspath(__file__)),
+			encoding="utf-8",
+			stderr=subprocess.DEVNULL,
+		).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def run_benchmarks(
+	sizes: int | Sequence[int] = (10, 100, 1_000),
+	output: str | None = "benchmark.json",
+	depth: int = 2,
+	branching: int = 4,
+	fan_out: int = 5,
+	lines_per_module: int = 50,
+	seed: int = 0,
+	repeat: int = 1,
+	render_max_nodes: int = 2_000,
+	workdir: str | None = None,
+	**kwargs,
+) -> dict[str, Any]:
+	"""benchmark packages with each of `sizes` modules, writing the results as JSON to `output`
+
+	extra keyword arguments are config options, with "." separating levels, eg `--graph.workers=1`.
+	if `workdir` is given, the generated packages are kept there, otherwise a temporary directory is used
+	"""
+	if isinstance(sizes, int):
+		sizes = (sizes,)
+	config_overrides: dict = kwargs_to_nested_dict(
+		kwargs, transform_key=lambda x: x.lstrip("-"), sep="."
+	)
+
+	results: list[dict[str, Any]] = []
+	for n_modules in sizes:
+		spec: SyntheticPackageSpec = SyntheticPackageSpec(
+			n_modules=int(n_modules),
+			depth=depth,
+			branching=branching,
+			fan_out=fan_out,
+			lines_per_module=lines_per_module,
+			seed=seed,
+		)
+		print(f"# benchmarking {spec}")
+		with tempfile.TemporaryDirectory(dir=workdir) as tmp_dir:
+			result: dict[str, Any] = run_benchmark(
+				spec,
+				workdir=tmp_dir,
+				config_overrides=config_overrides,
+				repeat=repeat,
+				render_max_nodes=render_max_nodes,
+			)
+		for name, seconds in result["timings"].items():
+			print(f"\t{name:<20} {'skipped' if seconds is None else f'{seconds:.4f}s'}")
+		print(f"\t{'peak memory':<20} {result['peak_memory_bytes'] / 2**20:.1f} MiB")
+		results.append(result)
+
+	report: dict[str, Any] = dict(
+		format_version=BENCHMARK_FORMAT_VERSION,
+		commit=_git_commit(),
+		timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		python=platform.python_version(),
+		platform=platform.platform(),
+		cpu_count=os.cpu_count(),
+		config_overrides=config_overrides,
+		results=results,
+	)
+	if output is not None:
+		with open(output, "w", encoding="utf-8") as f:
+			json.dump(report, f, indent="\t")
+		print(f"# wrote results to {output}")
+	return report
+
+
+def compare_benchmarks(baseline: str, current: str) -> dict[int, dict[str, float | None]]:
+	"""compare two JSON reports from `run_benchmarks`, matching results by module count
+
+	# Returns:
+	 - `dict[int, dict[str, float | None]]`
+	    for each module count in both reports, the ratio `current / baseline` for each phase and peak memory
+	"""
+	reports: list[dict] = []
+	for path in (baseline, current):
+		with open(path, "r", encoding="utf-8") as f:
+			reports.append(json.load(f))
+
+	by_size: list[dict[int, dict]] = [
+		{r["spec"]["n_modules"]: r for r in report["results"]} for report in reports
+	]
+	print(f"# {baseline} ({reports[0]['commit']}) -> {current} ({reports[1]['commit']})")
+	output: dict[int, dict[str, float | None]] = dict()
+	for n_modules in sorted(set(by_size[0]) & set(by_size[1])):
+		old, new = by_size[0][n_modules], by_size[1][n_modules]
+		ratios: dict[str, float | None] = dict()
+		for name in PHASES:
+			t_old, t_new = old["timings"].get(name), new["timings"].get(name)
+			ratios[name] = t_new / t_old if t_old and t_new is not None else None
+		ratios["peak_memory"] = new["peak_memory_bytes"] / old["peak_memory_bytes"]
+		output[n_modules] = ratios
+
+		print(f"## {n_modules} modules")
+		for name, ratio in ratios.items():
+			print(f"\t{name:<20} {'-' if ratio is None else f'{ratio:.2f}x'}")
+	return output
+
+
+if __name__ == "__main__":
+	import fire
+
+	fire.Fire({"run": run_benchmarks, "compare": compare_benchmarks})
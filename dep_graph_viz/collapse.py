@@ -0,0 +1,138 @@
+"""merge modules below a depth into their ancestor directory, for readable top-level maps of large packages
+
+with `graph.collapse_depth = k`, every node more than `k` levels below the root is merged into its ancestor
+directory at depth `k`. `graph.collapse_overrides` sets a different depth for the modules under a given
+path, the most specific path wins. edges are moved to the nodes their endpoints were merged into: those
+inside a merged group are dropped, and parallel edges of the same key between two nodes become one edge with
+a `weight` and a wider `penwidth`. this shrinks the graph `dot` has to lay out by orders of magnitude.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Any, Hashable
+
+from dep_graph_viz.csr import CSRBuilder, CSRGraph, empty_like, finish_graph
+from dep_graph_viz.dep_graph_viz import Node, node_module_parts
+
+if TYPE_CHECKING:
+	import networkx as nx
+
+
+def parse_overrides(overrides: dict[str, int | None] | None) -> dict[tuple[str, ...], int | None]:
+	"""override depths keyed by module parts. keys are paths relative to the root, `a/b` or `a.b`
+
+	a depth of `None` means modules under that path are never collapsed
+	"""
+	return {
+		tuple(part for part in key.replace(".", "/").split("/") if part): depth
+		for key, depth in (overrides or dict()).items()
+	}
+
+
+def depth_limit(
+	parts: tuple[str, ...],
+	collapse_depth: int | None,
+	overrides: dict[tuple[str, ...], int | None],
+) -> int | None:
+	"deepest level kept for a module with these `parts`, from the longest matching override"
+	for n in range(len(parts), -1, -1):
+		if parts[:n] in overrides:
+			return overrides[parts[:n]]
+	return collapse_depth
+
+
+def collapse_targets(
+	nodes: list[Hashable],
+	collapse_depth: int | None,
+	overrides: dict[tuple[str, ...], int | None],
+) -> dict[Node, Node]:
+	"""the node each collapsed node is merged into. nodes which are kept, and externals, are not included
+
+	the target is the ancestor directory at the depth limit of the node, or the nearest one above it in the
+	graph. if the target is collapsed itself, the node goes wherever the target goes
+	"""
+	by_parts: dict[tuple[str, ...], Node] = {
+		node_module_parts(node): node for node in nodes if isinstance(node, Node)
+	}
+
+	def _target(node: Node) -> Node | None:
+		parts: tuple[str, ...] = node_module_parts(node)
+		limit: int | None = depth_limit(parts, collapse_depth, overrides)
+		if limit is None or len(parts) <= limit:
+			return None
+		for n in range(max(limit, 0), -1, -1):
+			ancestor: Node | None = by_parts.get(parts[:n])
+			if ancestor is not None:
+				return ancestor
+		return None
+
+	targets: dict[Node, Node] = dict()
+	for node in by_parts.values():
+		target: Node | None = _target(node)
+		if target is None:
+			continue
+		# targets are strictly shallower, so this ends
+		while (next_target := _target(target)) is not None:
+			target = next_target
+		targets[node] = target
+	return targets
+
+
+def collapse_graph(
+	G: nx.MultiDiGraph | CSRGraph,
+	collapse_depth: int | None,
+	overrides: dict[str, int | None] | None = None,
+) -> nx.MultiDiGraph | CSRGraph:
+	"""a copy of `G` with the modules below `collapse_depth` merged into their ancestors, see the module docs
+
+	the graph is of the same kind as `G`. nodes other modules were merged into get `peripheries=2` and a
+	tooltip with the number of modules they stand for. edges which were not merged with any other keep their
+	attributes as they are, so nothing changes if no node is deep enough to be collapsed
+	"""
+	targets: dict[Node, Node] = collapse_targets(
+		list(G.nodes()), collapse_depth, parse_overrides(overrides)
+	)
+	n_merged: dict[Node, int] = dict()
+	for target in targets.values():
+		n_merged[target] = n_merged.get(target, 0) + 1
+
+	H: nx.MultiDiGraph | CSRBuilder = empty_like(G)
+	H.graph["collapsed"] = bool(targets)
+	if "nodes_dict" in H.graph:
+		# names of merged modules point at the node they were merged into
+		H.graph["nodes_dict"] = {
+			name: targets.get(node, node) for name, node in H.graph["nodes_dict"].items()
+		}
+
+	for node, attrs in G.nodes(data=True):
+		if node in targets:
+			continue
+		if node in n_merged:
+			attrs = {
+				**attrs,
+				"peripheries": 2,
+				"tooltip": f"{node.display_name} (+{n_merged[node]} modules)",
+			}
+		H.add_node(node, **attrs)
+
+	# merge parallel edges, in order of first appearance
+	merged: dict[tuple[Hashable, Hashable, Hashable], tuple[dict[str, Any], int]] = dict()
+	for u, v, key, attrs in G.edges(keys=True, data=True):
+		u = targets.get(u, u)
+		v = targets.get(v, v)
+		if u == v:
+			continue
+		first_attrs, count = merged.get((u, v, key), (attrs, 0))
+		merged[(u, v, key)] = (first_attrs, count + 1)
+
+	for (u, v, key), (attrs, count) in merged.items():
+		if count > 1:
+			attrs = {
+				**attrs,
+				"weight": count,
+				"penwidth": f"{float(attrs.get('penwidth') or 1) * (1 + math.log2(count)):.3g}",
+			}
+		H.add_edge(u, v, key=key, **attrs)
+
+	return finish_graph(H)
@@ -1,7 +1,9 @@
-import os
 import subprocess
 from copy import deepcopy
-from typing import Any
+from typing import Any, get_args
+
+from dep_graph_viz.html import HtmlLayout
+from dep_graph_viz.util.git import GitInfo, get_git_info
 
 
 _DEFAULT_CONFIG: dict = {
@@ -16,9 +18,58 @@ _DEFAULT_CONFIG: dict = {
 		"include_externals": False,
 		"except_if_missing_edges": False,
 		"strict_names": False,
+		# processes for reading and parsing files. `None` means the CPU count, `1` disables the pool
+		"workers": None,
+		# "ast" or "fast" (token stream, falls back to the ast when unsure)
+		"import_scanner": "ast",
+		# with the "fast" scanner, stop at the first top-level statement which isn't an import
+		"import_scanner_header_only": False,
+		# "networkx", or "csr" for array-backed storage, see `dep_graph_viz.csr`
+		"engine": "networkx",
+		# merge modules more than this many levels below the root into their ancestor directory. `None` keeps all
+		"collapse_depth": None,
+		# collapse depth for the modules under a path relative to the root, `a/b` or `a.b`, most specific wins
+		"collapse_overrides": {},
+		# drop import edges implied by other paths of import edges, keeping edges within import cycles
+		"transitive_reduction": False,
+	},
+	# on-disk cache of the imports found in each file
+	"import_cache": {
+		"enabled": True,
+		# if `None`, uses `$XDG_CACHE_HOME/dep_graph_viz` (usually `~/.cache/dep_graph_viz`)
+		"dir": None,
+		# least recently used entries beyond this are evicted
+		"max_entries": 100_000,
+	},
+	# on-disk cache of `dot` outputs, keyed by the hash of the DOT, the format and the graphviz version
+	"render_cache": {
+		"enabled": True,
+		# if `None`, uses a `renders-v*` directory in the import cache's default location
+		"dir": None,
+		# least recently used artifacts beyond this total size are evicted
+		"max_bytes": 512 * 1024 * 1024,
+		# hard-link cached artifacts to the output instead of copying them
+		"hardlink": True,
+	},
+	# html output
+	"html": {
+		# "browser" lays the graph out with d3-graphviz on page load, "server" runs `dot -Tsvg` once and
+		# embeds the result, which is much faster to open for large graphs. "canvas" runs `dot -Tjson` and
+		# draws only the part in view to a canvas, which keeps panning smooth for very large graphs
+		"layout": "browser",
+		# gzip and base64 encode the DOT or svg and the adjacency index into the page, which is unpacked by
+		# the browser on load. several times smaller for large graphs, but needs `DecompressionStream`
+		"compress": False,
+	},
+	# polling for `--watch` mode, in seconds
+	"watch": {
+		"interval": 1.0,
+		"debounce": 0.5,
 	},
 	# root node default name (only applies if `graph.strip_module_prefix` is True)
 	"root_node_name": "ROOT",
+	# "native" streams the dot file directly, "pydot" goes through `to_pydot`
+	"dot_writer": "native",
 	# passed to dot
 	"dot_attrs": {
 		# 'rankdir': 'TB',
@@ -51,6 +102,12 @@ _DEFAULT_CONFIG: dict = {
 			"penwidth": "1",
 			"style": "dotted",
 		},
+		# imports of one package by another, in batch mode
+		"cross_package": {
+			"color": "darkorange",
+			"penwidth": "1",
+			"style": "solid",
+		},
 	},
 	"node": {
 		"module_root": {
@@ -92,6 +149,7 @@ def _process_config(config: dict, root: str | None = ".") -> None:
 
 	- mapping null values: in CONFIG, a value under the `CONFIG["edge"]` or `CONFIG["node"]` dicts that matches `NULL_STRINGS` will be converted to `None`
 	- auto-generating url: if `CONFIG["url_prefix"]` is `None`, `CONFIG["auto_url_format"]` is not `None`, and `root` is not `None`, the git remote url and branch will be auto-detected and formatted into a URL
+	- checking the html layout: `CONFIG["html"]["layout"]` must be one of `HtmlLayout`, so a typo fails before the graph is built
 
 	# Parameters:
 	 - `root : str`
@@ -101,12 +159,22 @@ def _process_config(config: dict, root: str | None = ".") -> None:
 	# Returns:
 	 - `None`
 
+	# Raises:
+	 - `ValueError` if `CONFIG["html"]["layout"]` is not one of `HtmlLayout`
+
 	# Modifies:
 	global variable `CONFIG`, specifically:
 	 - `CONFIG["edge"][*]` and `CONFIG["node"][*]` which match `NULL_STRINGS` will be converted to `None`
 	 - `CONFIG["url_prefix"]` will be set to a formatted URL if it is `None` and `CONFIG["auto_url_format"]` is not `None`
 	"""
 
+	# check the html layout
+	html_layout: Any = (config.get("html") or dict()).get("layout", "browser")
+	if html_layout not in get_args(HtmlLayout):
+		raise ValueError(
+			f"unknown html layout: {html_layout!r}, expected one of {list(get_args(HtmlLayout))}"
+		)
+
 	# convert none/null items
 	for k_conv in ("edge", "node"):
 		for key, value in config[k_conv].items():
@@ -126,33 +194,15 @@ def _process_config(config: dict, root: str | None = ".") -> None:
 		and (root is not None)
 	):
 		try:
-			# navigate to root
-			orig_dir: str = os.getcwd()
-			os.chdir(root)
-			# get git remote url
-			git_remote_url: str = (
-				subprocess.check_output(
-					"git remote get-url origin",
-					shell=True,
-					encoding="utf-8",
-				)
-				.strip()
-				.rstrip("/")
-			)
+			# read from the files in `.git`, falling back to running git in the root
+			git_info: GitInfo = get_git_info(root)
+			git_remote_url: str = git_info.remote_url.strip().rstrip("/")
 			for rep_key, rep_val in config["auto_url_replace"].items():
 				git_remote_url = git_remote_url.replace(rep_key, rep_val)
-			# get branch
-			git_branch: str = subprocess.check_output(
-				"git rev-parse --abbrev-ref HEAD",
-				shell=True,
-				encoding="utf-8",
-			).strip()
 			config["url_prefix"] = config["auto_url_format"].format(
-				git_remote_url=git_remote_url, git_branch=git_branch
+				git_remote_url=git_remote_url, git_branch=git_info.branch
 			)
-		except subprocess.CalledProcessError as e:
+		except (subprocess.CalledProcessError, FileNotFoundError) as e:
+			# `FileNotFoundError` if git is not installed
 			print(f"could not get git info, not adding URLs: {e}")
 			config["url_prefix"] = None
-		finally:
-			# go back to original directory
-			os.chdir(orig_dir)
@@ -0,0 +1,389 @@
+"""array-backed graph core, an alternative to building an `nx.MultiDiGraph` out of python objects
+
+selected with `graph.engine = "csr"`. nodes are numbered in the order they were added, and edges are stored
+in compressed sparse row form: the edges out of node `i` are `indices[indptr[i]:indptr[i+1]]`, with their
+keys as small integer codes in `kinds`. attribute dicts are not kept per element -- nodes and edges with
+identical attributes share one row of a side table, and only per-node URLs are stored separately. for a
+graph of a whole `site-packages` this is a few bytes per edge instead of several dicts.
+
+the arrays are plain `array.array`s, so numpy is not required. `CSRGraph.to_numpy` wraps them without a
+copy if it is installed, and `CSRGraph.to_networkx` converts to an equivalent `nx.MultiDiGraph` for anything
+which needs networkx (the `pydot` writer, `--watch`). the native DOT writer reads a `CSRGraph` directly.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import TYPE_CHECKING, Any, Hashable, Iterator
+
+if TYPE_CHECKING:
+	import networkx as nx
+
+EDGE_KINDS: tuple[str, ...] = (
+	"uses",
+	"inits",
+	"external",
+	"hierarchy",
+	"module_hierarchy",
+)
+"edge keys used by `build_graph`, in code order. any other key gets the next free code when it is first seen"
+
+IMPORT_EDGE_KEYS: frozenset[str] = frozenset({"uses", "inits", "external"})
+"keys of the edges which come from imports, as opposed to the directory hierarchy"
+
+
+class _AttrTable:
+	"interns attribute dicts, so that elements with identical attributes share one row"
+
+	__slots__ = ("rows", "_index")
+
+	def __init__(self) -> None:
+		self.rows: list[dict[str, Any]] = []
+		self._index: dict[tuple, int] = dict()
+
+	def add(self, attrs: dict[str, Any]) -> int:
+		"row of `attrs`, adding it if it is new"
+		key: tuple
+		try:
+			key = tuple(attrs.items())
+			hash(key)
+		except TypeError:
+			key = tuple((k, repr(v)) for k, v in attrs.items())
+		row: int | None = self._index.get(key)
+		if row is None:
+			row = len(self.rows)
+			self.rows.append(dict(attrs))
+			self._index[key] = row
+		return row
+
+
+class CSRGraph:
+	"""directed multigraph stored as arrays, built with `CSRBuilder`
+
+	iterating over nodes and edges gives the same order and attributes as the `nx.MultiDiGraph` which
+	`build_graph` would have built, so the two engines write identical DOT files
+
+	# Parameters:
+	 - `nodes : list[Hashable]`
+	    node objects, indexed by node number
+	 - `node_attr_rows : array`
+	    row of `node_table` holding the attributes of each node
+	 - `node_table : list[dict[str, Any]]`
+	    distinct node attribute dicts, without `URL`
+	 - `urls : dict[int, str]`
+	    `URL` attribute of the nodes which have one
+	 - `indptr : array`
+	    edges out of node `i` are at positions `indptr[i]` to `indptr[i+1]`
+	 - `indices : array`
+	    target node number of each edge
+	 - `kinds : array`
+	    key code of each edge, an index into `kind_names`
+	 - `kind_names : list[Hashable]`
+	    edge keys by code, starting with `EDGE_KINDS`
+	 - `edge_attr_rows : array`
+	    row of `edge_table` holding the attributes of each edge
+	 - `edge_table : list[dict[str, Any]]`
+	    distinct edge attribute dicts
+	 - `graph : dict[str, Any]`
+	    graph-level data, as in `nx.Graph.graph`
+	"""
+
+	def __init__(
+		self,
+		nodes: list[Hashable],
+		node_attr_rows: array,
+		node_table: list[dict[str, Any]],
+		urls: dict[int, str],
+		indptr: array,
+		indices: array,
+		kinds: array,
+		kind_names: list[Hashable],
+		edge_attr_rows: array,
+		edge_table: list[dict[str, Any]],
+		graph: dict[str, Any] | None = None,
+	) -> None:
+		self.node_list: list[Hashable] = nodes
+		self.node_attr_rows: array = node_attr_rows
+		self.node_table: list[dict[str, Any]] = node_table
+		self.urls: dict[int, str] = urls
+		self.indptr: array = indptr
+		self.indices: array = indices
+		self.kinds: array = kinds
+		self.kind_names: list[Hashable] = kind_names
+		self.edge_attr_rows: array = edge_attr_rows
+		self.edge_table: list[dict[str, Any]] = edge_table
+		self.graph: dict[str, Any] = graph if graph is not None else dict()
+		# built on first lookup by node object, iterating doesn't need it
+		self._index: dict[Hashable, int] | None = None
+
+	def number_of_nodes(self) -> int:
+		return len(self.node_list)
+
+	def number_of_edges(self) -> int:
+		return len(self.indices)
+
+	def __len__(self) -> int:
+		return len(self.node_list)
+
+	def __iter__(self) -> Iterator[Hashable]:
+		return iter(self.node_list)
+
+	def __contains__(self, node: Hashable) -> bool:
+		return node in self._node_index()
+
+	def _node_index(self) -> dict[Hashable, int]:
+		if self._index is None:
+			self._index = {node: i for i, node in enumerate(self.node_list)}
+		return self._index
+
+	def index_of(self, node: Hashable) -> int:
+		"node number of `node`, raises `KeyError` if it is not in the graph"
+		return self._node_index()[node]
+
+	def node_attrs(self, i: int) -> dict[str, Any]:
+		"a fresh attribute dict for node number `i`"
+		attrs: dict[str, Any] = dict(self.node_table[self.node_attr_rows[i]])
+		url: str | None = self.urls.get(i)
+		if url is not None:
+			attrs["URL"] = url
+		return attrs
+
+	def nodes(self, data: bool = False) -> Iterator[Any]:
+		"nodes, or `(node, attrs)` pairs if `data`, like `nx.Graph.nodes`"
+		if not data:
+			yield from self.node_list
+			return
+		for i, node in enumerate(self.node_list):
+			yield node, self.node_attrs(i)
+
+	def edges(self, keys: bool = False, data: bool = False) -> Iterator[tuple]:
+		"edges as `(u, v)`, plus the key and a fresh attribute dict if asked for, like `nx.MultiDiGraph.edges`"
+		nodes: list[Hashable] = self.node_list
+		indptr: array = self.indptr
+		for i, u in enumerate(nodes):
+			for e in range(indptr[i], indptr[i + 1]):
+				edge: tuple = (u, nodes[self.indices[e]])
+				if keys:
+					edge += (self.kind_names[self.kinds[e]],)
+				if data:
+					edge += (dict(self.edge_table[self.edge_attr_rows[e]]),)
+				yield edge
+
+	def out_edges(self, node: Hashable) -> Iterator[tuple[Hashable, Hashable]]:
+		"`(target, key)` of each edge out of `node`"
+		i: int = self.index_of(node)
+		for e in range(self.indptr[i], self.indptr[i + 1]):
+			yield self.node_list[self.indices[e]], self.kind_names[self.kinds[e]]
+
+	def successors(self, node: Hashable) -> list[Hashable]:
+		"distinct targets of the edges out of `node`"
+		return list(dict.fromkeys(target for target, _ in self.out_edges(node)))
+
+	def out_degree(self, node: Hashable) -> int:
+		i: int = self.index_of(node)
+		return self.indptr[i + 1] - self.indptr[i]
+
+	def nbytes(self) -> int:
+		"approximate memory held by the structure itself, not counting the node objects"
+		total: int = sys.getsizeof(self.node_list) + sys.getsizeof(self.urls)
+		for arr in (
+			self.node_attr_rows,
+			self.indptr,
+			self.indices,
+			self.kinds,
+			self.edge_attr_rows,
+		):
+			total += arr.buffer_info()[1] * arr.itemsize
+		total += sum(sys.getsizeof(row) for row in self.node_table + self.edge_table)
+		return total
+
+	def to_numpy(self) -> dict[str, Any]:
+		"`indptr`, `indices`, `kinds`, and the attribute rows as numpy arrays sharing memory with this graph"
+		try:
+			import numpy as np
+		except ImportError as e:
+			raise ImportError(
+				"`CSRGraph.to_numpy` requires numpy, install it with `pip install numpy`"
+			) from e
+
+		return {
+			name: np.frombuffer(arr, dtype=arr.typecode)
+			for name, arr in (
+				("indptr", self.indptr),
+				("indices", self.indices),
+				("kinds", self.kinds),
+				("node_attr_rows", self.node_attr_rows),
+				("edge_attr_rows", self.edge_attr_rows),
+			)
+		}
+
+	def to_networkx(self) -> nx.MultiDiGraph:
+		"an equivalent `nx.MultiDiGraph`, with the same node and edge order"
+		import networkx as nx
+
+		G: nx.MultiDiGraph = nx.MultiDiGraph()
+		G.add_nodes_from(self.nodes(data=True))
+		G.add_edges_from(self.edges(keys=True, data=True))
+		G.graph.update(self.graph)
+		return G
+
+
+class CSRBuilder:
+	"""collects nodes and edges for a `CSRGraph`
+
+	supports the part of the `nx.MultiDiGraph` api that `build_graph` uses: `add_node`, `add_edge` with a
+	key, `in`, iterating over `nodes`, and `graph`. as in networkx, adding an existing node or edge again
+	updates its attributes, and edges add their nodes if needed
+	"""
+
+	def __init__(self) -> None:
+		self.graph: dict[str, Any] = dict()
+		self._nodes: list[Hashable] = []
+		self._index: dict[Hashable, int] = dict()
+		self._node_attr_rows: array = array("I")
+		self._node_table: _AttrTable = _AttrTable()
+		self._urls: dict[int, str] = dict()
+		self._kind_names: list[Hashable] = list(EDGE_KINDS)
+		self._kind_codes: dict[Hashable, int] = {k: i for i, k in enumerate(EDGE_KINDS)}
+		self._edge_table: _AttrTable = _AttrTable()
+		self._src: array = array("I")
+		self._dst: array = array("I")
+		self._kinds: array = array("B")
+		self._edge_attr_rows: array = array("I")
+
+	def __contains__(self, node: Hashable) -> bool:
+		return node in self._index
+
+	def __len__(self) -> int:
+		return len(self._nodes)
+
+	@property
+	def nodes(self) -> list[Hashable]:
+		return list(self._nodes)
+
+	def add_node(self, node_for_adding: Hashable, **attr: Any) -> None:
+		url: str | None = attr.pop("URL", None)
+		i: int | None = self._index.get(node_for_adding)
+		if i is None:
+			i = len(self._nodes)
+			self._nodes.append(node_for_adding)
+			self._index[node_for_adding] = i
+			self._node_attr_rows.append(self._node_table.add(attr))
+		elif attr:
+			self._node_attr_rows[i] = self._node_table.add(
+				{**self._node_table.rows[self._node_attr_rows[i]], **attr}
+			)
+		if url is not None:
+			self._urls[i] = url
+
+	def _node_number(self, node: Hashable) -> int:
+		if node not in self._index:
+			self.add_node(node)
+		return self._index[node]
+
+	def add_edge(
+		self,
+		u_for_edge: Hashable,
+		v_for_edge: Hashable,
+		key: Hashable = None,
+		**attr: Any,
+	) -> None:
+		code: int | None = self._kind_codes.get(key)
+		if code is None:
+			code = len(self._kind_names)
+			if code > 255:
+				raise ValueError(f"too many distinct edge keys for a CSR graph, at {key = }")
+			self._kind_names.append(key)
+			self._kind_codes[key] = code
+		self._src.append(self._node_number(u_for_edge))
+		self._dst.append(self._node_number(v_for_edge))
+		self._kinds.append(code)
+		self._edge_attr_rows.append(self._edge_table.add(attr))
+
+	def build(self) -> CSRGraph:
+		"""sort the edges by source into a `CSRGraph`
+
+		within a source, edges are grouped by target in order of first appearance, which is the order
+		`nx.MultiDiGraph` iterates them in. repeated `(source, target, key)` edges are merged
+		"""
+		# counting sort of the edge numbers by source, stable
+		n_nodes: int = len(self._nodes)
+		starts: array = array("I", [0]) * (n_nodes + 1)
+		for u in self._src:
+			starts[u + 1] += 1
+		for i in range(n_nodes):
+			starts[i + 1] += starts[i]
+		fill: array = starts[:-1]
+		order: array = array("I", [0]) * len(self._src)
+		for e, u in enumerate(self._src):
+			order[fill[u]] = e
+			fill[u] += 1
+
+		indptr: array = array("I", [0])
+		indices: array = array("I")
+		kinds: array = array("B")
+		edge_attr_rows: array = array("I")
+		edge_rows: list[dict[str, Any]] = self._edge_table.rows
+		for i in range(n_nodes):
+			# target -> key code -> attribute row
+			by_target: dict[int, dict[int, int]] = dict()
+			for e in order[starts[i] : starts[i + 1]]:
+				by_key: dict[int, int] = by_target.setdefault(self._dst[e], dict())
+				code: int = self._kinds[e]
+				if code in by_key:
+					by_key[code] = self._edge_table.add(
+						{**edge_rows[by_key[code]], **edge_rows[self._edge_attr_rows[e]]}
+					)
+				else:
+					by_key[code] = self._edge_attr_rows[e]
+			for v, by_key in by_target.items():
+				for code, attr_row in by_key.items():
+					indices.append(v)
+					kinds.append(code)
+					edge_attr_rows.append(attr_row)
+			indptr.append(len(indices))
+
+		return CSRGraph(
+			nodes=list(self._nodes),
+			node_attr_rows=self._node_attr_rows,
+			node_table=self._node_table.rows,
+			urls=self._urls,
+			indptr=indptr,
+			indices=indices,
+			kinds=kinds,
+			kind_names=self._kind_names,
+			edge_attr_rows=edge_attr_rows,
+			edge_table=self._edge_table.rows,
+			graph=self.graph,
+		)
+
+
+def empty_like(G: nx.MultiDiGraph | CSRGraph) -> nx.MultiDiGraph | CSRBuilder:
+	"""an empty graph to build a transformed copy of `G` in, a `CSRBuilder` for a `CSRGraph`
+
+	`G.graph` is copied over. call `finish_graph` on the result once all nodes and edges are added
+	"""
+	H: nx.MultiDiGraph | CSRBuilder
+	if isinstance(G, CSRGraph):
+		H = CSRBuilder()
+	else:
+		import networkx as nx
+
+		H = nx.MultiDiGraph()
+	H.graph.update(G.graph)
+	return H
+
+
+def finish_graph(H: nx.MultiDiGraph | CSRBuilder) -> nx.MultiDiGraph | CSRGraph:
+	"`H` itself, or the `CSRGraph` built from it"
+	if isinstance(H, CSRBuilder):
+		return H.build()
+	return H
+
+
+def as_networkx(G: nx.MultiDiGraph | CSRGraph) -> nx.MultiDiGraph:
+	"`G` itself if it is already a networkx graph, otherwise converted with `CSRGraph.to_networkx`"
+	if isinstance(G, CSRGraph):
+		return G.to_networkx()
+	return G
@@ -1,23 +1,42 @@
+from __future__ import annotations
+
 from copy import deepcopy
+import io
+import itertools
 import json
 import os
-import subprocess
+import sys
+import uuid
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Iterator, Literal, Sequence
 import warnings
 
-import networkx as nx
-import pydot
 from muutils.dictmagic import kwargs_to_nested_dict, update_with_nested_dict
-from networkx.drawing.nx_pydot import to_pydot
 
 from dep_graph_viz.config import _DEFAULT_CONFIG, _process_config
-from dep_graph_viz.util.paths import get_module_directory, get_package_repository_url, normalize_path, path_to_module
-from dep_graph_viz.util.util import (
-	get_imports,
-	get_python_files,
-	get_relevant_directories,
+from dep_graph_viz.csr import CSRBuilder, CSRGraph, as_networkx
+from dep_graph_viz.dot import render_dot_file, write_dot_native, write_dot_stream
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.fs_index import FileSystemIndex
+from dep_graph_viz.util.module_index import (
+	ModuleIndex,
+	ModuleParts,
+	ResolvedImport,
+	build_module_index,
 )
+from dep_graph_viz.util.parallel import get_imports_many
+from dep_graph_viz.util.paths import get_module_directory, get_package_repository_url, normalize_path, path_to_module
+from dep_graph_viz.util.profile import NULL_PROFILER, NullProfiler, Profiler
+from dep_graph_viz.util.render_cache import RenderCache
+from dep_graph_viz.util.util import ImportRecord, ImportScanOptions
+
+if TYPE_CHECKING:
+	# networkx and pydot take most of the import time, so they are imported where they are used
+	import networkx as nx
+	import pydot
+
+	from dep_graph_viz.html import HtmlLayout
 
 # ORIG_DIR: str = os.getcwd()
 # # *absolute* path of the root directory
@@ -46,10 +65,12 @@ def augment_module_name(module_name: str, config: dict) -> str:
 		return f"{config['PACKAGE_NAME']}.{module_name}"
 
 
-def add_node(G: nx.MultiDiGraph, node: "Node", config: dict) -> None:
+def add_node(G: "nx.MultiDiGraph | CSRBuilder", node: "Node", config: dict) -> None:
 	"""Add a node to the graph with the given type and optional URL."""
 	# if node is not present, add it
 	if node not in G:
+		# add a URL -- doesn't work for images
+		url: str | None = node_url(node, config)
 		# add the node
 		G.add_node(
 			node,  # `Node` object, `str(node)` will be the key
@@ -57,26 +78,40 @@ def add_node(G: nx.MultiDiGraph, node: "Node", config: dict) -> None:
 			**config["node"][
 				node.node_type
 			],  # attributes (color, shape, etc) for the node type
+			**({"URL": f'"{url}"'} if url else {}),
 		)
-		# add a URL -- doesn't work for images
-		if node.url:
-			G.nodes[node]["URL"] = f'"{node.url}"'
 	else:
 		# if it's already present, we have a key duplication
 		raise ValueError(f"node {node.path} already exists in the graph!")
 
 
-def classify_node(path: str, root: str = ".") -> NodeType:
+def classify_node(
+	path: str,
+	root: str = ".",
+	fs_index: FileSystemIndex | None = None,
+) -> NodeType:
+	"""classify a file or directory, querying `fs_index` if given instead of the disk"""
 	# posixify path
 	path = normalize_path(path)
 	# path relative to the root module
-	rel_path: str = os.path.relpath(path, root)
+	rel_path: str = normalize_path(os.path.relpath(path, root))
 	# parent directory (module it's directly in)
 	parent_dir: str = os.path.dirname(rel_path)
 	# if it's in the root, set the parent dir to "."
 	if parent_dir == "":
 		parent_dir = "."
 
+	if fs_index is not None:
+		if fs_index.is_dir(rel_path):
+			if rel_path == ".":
+				return "module_root" if fs_index.has_init(".") else "root"
+			return "module_dir" if fs_index.has_init(rel_path) else "dir"
+		elif fs_index.is_file(rel_path):
+			return "module_file" if fs_index.has_init(parent_dir) else "script"
+		raise FileNotFoundError(
+			f"path not in filesystem index: '{rel_path}' for {path = } and {root = }"
+		)
+
 	# error checking
 	if not os.path.exists(path):
 		raise FileNotFoundError(f"file not found: '{path}' for {path = } and {root = }")
@@ -113,16 +148,39 @@ def classify_node(path: str, root: str = ".") -> NodeType:
 		raise ValueError(f"unknown path type: {path}")
 
 
-@dataclass(frozen=True)
+_NODE_IDS: Iterator[int] = itertools.count()
+"fallback ids for nodes created outside of `build_graph`, which numbers its own nodes from 0"
+
+
+def node_url(node: "Node", config: dict) -> str | None:
+	"link for a node, from `url_prefix` and `auto_url_replace` in the config"
+	url_prefix: str | None = config["url_prefix"]
+	if url_prefix is None:
+		return None
+	url: str = f"{url_prefix}{node.rel_path}"
+	if config.get("auto_url_replace", None):
+		for k, v in config["auto_url_replace"].items():
+			url = url.replace(k, v)
+	return url
+
+
+@dataclass(frozen=True, slots=True, eq=False)
 class Node:
+	"""a directory or python file in the graph
+
+	kept small since there is one per file: strings are interned, so the many nodes sharing a parent directory
+	share one string for it, the config is not kept (it is in `G.graph["config"]`), and aliases are computed
+	on demand. nodes hash by their integer `id`, which `build_graph` assigns densely from 0, and compare by
+	`(id, rel_path)` so that nodes of different graphs which happen to share an id are not equal
+	"""
+
+	id: int
 	orig_path: str
 	rel_path: str
-	aliases: set[str]
 	display_name: str
-	config: dict
-	url: str | None = None
 	node_type: NodeType | None = None
 	parent_dir: str | None = None
+	label: str | None = None  # only for the root, when it is shown as the git remote url
 
 	@classmethod
 	def get_node(
@@ -130,25 +188,22 @@ class Node:
 		path: str,
 		config: dict,
 		root: str = ".",
+		fs_index: FileSystemIndex | None = None,
+		node_id: int | None = None,
 	) -> "Node":
 		if path == "":
 			path = "."
 
-		# set up aliases
-		aliases: set[str] = {path}
-
 		# path relative to root
 		rel_path: str = normalize_path(os.path.relpath(path, root))
-		aliases.add(rel_path)
 		if os.path.basename(rel_path) == "__init__.py":
 			rel_path = os.path.dirname(rel_path).removesuffix("/")
-			aliases.add(rel_path)
 
 		# node type for formatting
-		node_type: NodeType = classify_node(path, root)
+		node_type: NodeType = classify_node(path, root, fs_index=fs_index)
 
 		# get parent dir
-		parent_dir: str = normalize_path(os.path.dirname(rel_path))
+		parent_dir: str | None = normalize_path(os.path.dirname(rel_path))
 		if not parent_dir:
 			parent_dir = "."
 
@@ -162,34 +217,28 @@ class Node:
 		else:
 			display_name = rel_path
 
-		aliases.add(display_name)
+		label: str | None = None
 		if node_type in {"module_root", "root"}:
 			display_name = config["root_node_name"]
 			parent_dir = None
-			aliases.add(display_name)
-
-		# get url if needed
-		url: str | None = None
-		url_prefix: str = config["url_prefix"]
-		if url_prefix is not None:
-			url = f"{url_prefix}{rel_path}"
-			if config.get("auto_url_replace", None):
-				for k, v in config["auto_url_replace"].items():
-					url = url.replace(k, v)
+			if config.get("git_remote_url"):
+				label = f'"{config["git_remote_url"]}"'
 
 		# assemble and return node
-		node: Node = Node(
-			orig_path=path,
-			rel_path=rel_path,
-			aliases=aliases,
-			display_name=display_name,
-			config=config,
-			url=url,
+		return Node(
+			id=next(_NODE_IDS) if node_id is None else node_id,
+			orig_path=sys.intern(path),
+			rel_path=sys.intern(rel_path),
+			display_name=sys.intern(display_name),
 			node_type=node_type,
-			parent_dir=parent_dir,
+			parent_dir=sys.intern(parent_dir) if parent_dir is not None else None,
+			label=label,
 		)
 
-		return node
+	@property
+	def aliases(self) -> set[str]:
+		"names this node can be referred to by"
+		return {self.orig_path, self.rel_path, self.display_name}
 
 	def is_root(self) -> bool:
 		return self.node_type in {"root", "module_root"}
@@ -201,142 +250,257 @@ class Node:
 		return self.rel_path.count("/") + 11 if not self.is_root() else 10
 
 	def __hash__(self) -> int:
-		return hash(self.rel_path)
+		return self.id
+
+	def __eq__(self, other: object) -> bool:
+		if isinstance(other, Node):
+			return self.id == other.id and self.rel_path == other.rel_path
+		return NotImplemented
 
 	def __str__(self) -> str:
-		if self.is_root():
-			# absolute path of the root directory
-			return (
-				f'"{self.config["git_remote_url"]}"'
-				if self.config.get("git_remote_url")
-				else self.config["root_node_name"]
-			)
+		if self.label is not None:
+			return self.label
+		elif self.is_root():
+			return self.display_name
 		else:
 			return f'"{self.display_name}"'
 
 	def __repr__(self) -> str:
-		# return self.__str__()
-		kwargs: str = ", ".join(
-			[
-				(
-					f"{k}='{self.__dict__[k]}'"
-					if isinstance(self.__dict__[k], str)
-					else f"{k}={self.__dict__[k]}"
+		return f"Node(id={self.id}, display_name='{self.display_name}', node_type='{self.node_type}')"
+
+
+def get_source_path(node: Node, fs_index: FileSystemIndex) -> str:
+	"path to the file holding the source code of a node, the `__init__.py` for directories"
+	node_path: str = node.orig_path
+	if node_path == ".":
+		return "__init__.py"
+	elif fs_index.is_dir(node.rel_path):
+		return os.path.join(node_path, "__init__.py")
+	return node_path
+
+
+def node_module_parts(node: Node) -> ModuleParts:
+	"module name of a node relative to the root, split into parts, with `()` for the root"
+	if node.rel_path == ".":
+		return ()
+	return tuple(node.rel_path.removesuffix(".py").split("/"))
+
+
+def get_module_index(
+	nodes_dict: dict[str, Node],
+	package_name: str,
+	root_is_package: bool,
+) -> ModuleIndex[Node]:
+	"""index the importable nodes by their absolute module name
+
+	if the root directory is a package, module names start with `package_name`, otherwise the root is
+	treated as a directory on `sys.path` and its top-level modules and packages are importable as-is
+	"""
+	prefix: ModuleParts = (package_name,) if root_is_package else ()
+	return build_module_index(
+		((prefix + node_module_parts(node), node) for node in nodes_dict.values()),
+		prefix=prefix,
+	)
+
+
+def get_import_edges(
+	node: Node,
+	node_path: str,
+	imports: list[ImportRecord],
+	module_index: ModuleIndex[Node],
+	config: dict,
+) -> tuple[list[dict], list[dict]]:
+	"""get the external nodes and the import edges to add to the graph for the imports of a single node
+
+	imports are resolved through `module_index` to the longest known module prefix, see
+	`dep_graph_viz.util.module_index`. edges are keyed by their type (`"uses"`, `"inits"`, `"external"`), so
+	that import edges can be told apart from hierarchy edges later on
+	"""
+	edge_config: dict[str, Any] = config["edge"]
+	is_init: bool = node_path.endswith("__init__.py")
+	importer: ModuleParts = module_index.prefix + node_module_parts(node)
+	edge_type: str = "inits" if is_init else "uses"
+	nodes_to_add: list[dict] = []
+	edges_to_add: list[dict] = []
+	for record in imports:
+		resolved: ResolvedImport[Node] = module_index.resolve(
+			record, importer, importer_is_package=is_init
+		)
+
+		if resolved.error is not None:
+			if config["graph"]["except_if_missing_edges"]:
+				raise ValueError(
+					f"could not resolve import in {node_path = }: {resolved.error}. if you think this is a mistake, set `graph.except_if_missing_edges` to `False` in the config"
 				)
-				for k in (
-					"display_name",
-					"node_type",
-					# "rel_path",
-					# "orig_path",
-					# "aliases",
-					# "parent_dir",
+			warnings.warn(f"could not resolve import in {node_path = }: {resolved.error}")
+			continue
+
+		for target in resolved.targets:
+			# eg `from . import some_function` in an `__init__.py`
+			if target is node:
+				continue
+
+			# adding edge to local import
+			# -------------------------
+			if edge_config.get(edge_type):
+				edges_to_add.append(
+					dict(
+						u_for_edge=target,
+						v_for_edge=node,
+						key=edge_type,
+						**edge_config[edge_type],
+					)
 				)
-			]
-		)
-		return f"Node({kwargs})"
+
+		if resolved.external is not None:
+			# external module
+			# -------------------------
+			if config["graph"]["include_externals"]:
+				nodes_to_add.append(
+					dict(
+						node_for_adding=resolved.external,
+						rank=0,  # for ranking/ordering of the nodes
+						**config["node"][
+							"external"
+						],  # attributes (color, shape, etc) for the node type
+					)
+				)
+				edges_to_add.append(
+					dict(
+						u_for_edge=resolved.external,
+						v_for_edge=node,
+						key="external",
+						**edge_config["external"],
+					)
+				)
+
+	return nodes_to_add, edges_to_add
 
 
 def build_graph(
 	root: str,
 	config: dict,
-) -> nx.MultiDiGraph:
+	import_cache: ImportCache | None = None,
+	profiler: Profiler | NullProfiler = NULL_PROFILER,
+	executor: Executor | None = None,
+) -> nx.MultiDiGraph | CSRGraph:
+	"""build the dependency graph of the python files under `root`
+
+	returns an `nx.MultiDiGraph`, or a `CSRGraph` if `graph.engine` is `"csr"`.
+	if `import_cache` is `None`, one is created from `config["import_cache"]` and saved at the end.
+	phases are timed with `profiler`, which does nothing unless profiling is on. files are parsed in
+	`executor` if given, see `get_imports_many`
+	"""
 	# process config
 	# --------------------------------------------------
 	include_local_imports: bool = config["graph"]["include_local_imports"]
 	edge_config: dict[str, Any] = config["edge"]
+	engine: str = config["graph"].get("engine", "networkx")
 
 	# create graph, get dirs and package name
 	# --------------------------------------------------
-	G: nx.MultiDiGraph = nx.MultiDiGraph()
-	directories: set[str] = get_relevant_directories(root)
+	G: nx.MultiDiGraph | CSRBuilder
+	if engine == "networkx":
+		import networkx as nx
+
+		G = nx.MultiDiGraph()
+	elif engine == "csr":
+		G = CSRBuilder()
+	else:
+		raise ValueError(f"unknown graph engine: {engine!r}, expected 'networkx' or 'csr'")
+	with profiler.phase("discovery"):
+		# walk the filesystem once, everything below queries this index
+		fs_index: FileSystemIndex = FileSystemIndex.build(root)
+		directories: set[str] = fs_index.relevant_directories()
+	profiler.count("directories", len(directories))
 	package_name: str = os.path.basename(os.path.abspath(root))
 	assert package_name == config["PACKAGE_NAME"], f"{package_name = }, {config['PACKAGE_NAME'] = }"
 
-	# Add nodes for directories and root
-	# --------------------------------------------------
-	directory_nodes: dict[str, Node] = {
-		augment_module_name(directory, config) : Node.get_node(directory, config=config)
-		for directory in directories
-	}
-	for node in directory_nodes.values():
-		add_node(G, node, config=config)
-
-	# add folder hierarchy edges
-	# --------------------------------------------------
-	for directory, node in directory_nodes.items():
-		# no parent of the root
-		if node.is_root():
-			continue
+	# dense ids for the nodes of this graph
+	node_ids: Iterator[int] = itertools.count()
 
-		# get parent node
-		parent_node: Node = directory_nodes[node.parent_dir]
+	with profiler.phase("classification"):
+		# Add nodes for directories and root
+		# --------------------------------------------------
+		directory_nodes: dict[str, Node] = {
+			augment_module_name(directory, config) : Node.get_node(
+				directory, config=config, fs_index=fs_index, node_id=next(node_ids)
+			)
+			for directory in sorted(directories)
+		}
+		for node in directory_nodes.values():
+			add_node(G, node, config=config)
+		directory_nodes_by_path: dict[str, Node] = {
+			node.rel_path: node for node in directory_nodes.values()
+		}
+
+		# add folder hierarchy edges
+		# --------------------------------------------------
+		for directory, node in directory_nodes.items():
+			# no parent of the root
+			if node.is_root():
+				continue
+
+			# get parent node
+			parent_node: Node = directory_nodes_by_path[node.parent_dir]
+
+			# figure out edge type -- different styles for different categories
+			edge_type: str
+			if parent_node.is_module() and node.is_module():
+				edge_type = "module_hierarchy"
+			else:
+				edge_type = "hierarchy"
 
-		# figure out edge type -- different styles for different categories
-		edge_type: str
-		if parent_node.is_module() and node.is_module():
-			edge_type = "module_hierarchy"
-		else:
-			edge_type = "hierarchy"
+			# add edge to graph
+			G.add_edge(parent_node, node, key=edge_type, **edge_config[edge_type])
 
-		# add edge to graph
-		G.add_edge(parent_node, node, **edge_config[edge_type])
+		# get python files
+		# --------------------------------------------------
+		python_files: list[str] = fs_index.python_files()
+		profiler.count("python_files", len(python_files))
 
-	# get python files
-	# --------------------------------------------------
-	python_files: list[str] = get_python_files(root)
+		# add files nodes and heirarchy edges to folders
+		# --------------------------------------------------
+		nodes_dict: dict[str, Node] = dict()
+		for python_file in python_files:
+			node: Node
+			# special handling for init files
+			is_init: bool = python_file.endswith("__init__.py") or python_file == "."
+			if is_init:
+				augmented_module_name: str = augment_module_name(
+					os.path.dirname(python_file) or ".",
+					config,
+				)
+				node = directory_nodes[augmented_module_name]
+			else:
+				node = Node.get_node(
+					python_file, config=config, fs_index=fs_index, node_id=next(node_ids)
+				)
+				add_node(G, node, config=config)
 
-	# add files nodes and heirarchy edges to folders
-	# --------------------------------------------------
-	nodes_dict: dict[str, Node] = dict()
-	for python_file in python_files:
-		node: Node
-		# special handling for init files
-		is_init: bool = python_file.endswith("__init__.py") or python_file == "."
-		if is_init:
-			augmented_module_name: str = augment_module_name(
-				os.path.dirname(python_file) or ".",
-				config,
-			)
-			node = directory_nodes[augmented_module_name]
-		else:
-			node = Node.get_node(python_file, config=config)
-			add_node(G, node, config=config)
+			# this will add the directory node if it doesn't exist
+			nodes_dict[node.display_name] = node
 
-		# this will add the directory node if it doesn't exist
-		nodes_dict[node.display_name] = node
-
-		# add file hierarchy
-		if edge_config["hierarchy"]:
-			if node.node_type not in {"root", "module_root"} and not is_init:
-				parents: list[str] = [
-					parent_node.display_name
-					for parent_node in directory_nodes.values()
-					if node.parent_dir == parent_node.rel_path
-				]
-				if parents:
-					assert (
-						len(parents) == 1
-					), f"multiple parents found for {node.orig_path = }: {parents}"
-					module_parent: str = sorted(parents, key=len)[-1]
-					if module_parent == config["root_node_name"]:
-						module_parent = "."
-
-					parent_node: Node
-					try:
-						parent_node = directory_nodes[module_parent]
-					except KeyError as e:
+			# add file hierarchy
+			if edge_config["hierarchy"]:
+				if node.node_type not in {"root", "module_root"} and not is_init:
+					# look the parent up by path, display names of nested directories don't match the keys
+					parent_node: Node | None = directory_nodes_by_path.get(node.parent_dir)
+					if parent_node is None:
 						if config["graph"]["except_if_missing_edges"]:
 							raise KeyError(
-								f"missing parent node for {node.orig_path = }: '{module_parent}'. if you think this is a mistake, set `graph.except_if_missing_edges` to `False` in the config"
-							) from e
+								f"missing parent node for {node.orig_path = }: '{node.parent_dir}'. if you think this is a mistake, set `graph.except_if_missing_edges` to `False` in the config"
+							)
 						else:
 							warnings.warn(
-								f"missing parent node for {node.orig_path = }: '{module_parent}'"
+								f"missing parent node for {node.orig_path = }: '{node.parent_dir}'"
 							)
+							continue
 
 					G.add_edge(
 						parent_node,
 						node,
+						key="hierarchy",
 						**edge_config["hierarchy"],
 					)
 
@@ -344,10 +508,12 @@ def build_graph(
 	# --------------------------------------------------
 	if include_local_imports:
 		print("!!!!!!!!!! INCLUDING LOCAL IMPORTS")
-		# init empty lists, cant modify while iterating
+		save_import_cache: bool = import_cache is None
+		if import_cache is None:
+			import_cache = ImportCache.from_config(config)
+		# collect the source file of every node
 		# -------------------------
-		nodes_to_add: list[dict] = []
-		edges_to_add: list[dict] = []
+		sources: list[tuple[Node, str]] = []
 		for node_key in G.nodes:
 
 			# get and check the node
@@ -360,113 +526,340 @@ def build_graph(
 					f"unknown node type: {node_key = }, {type(node_key) = }"
 				)
 
-			# Read source code
-			# # -------------------------
-			node_path: str = node.orig_path
-			if os.path.isdir(node_path):
-				node_path = os.path.join(node_path, "__init__.py")
-			elif node_path == ".":
-				node_path = "__init__.py"
-
-			try:
-				with open(node_path, "r", encoding="utf-8") as f:
-					source_code: str = f.read()
-			except FileNotFoundError as e:
-				if config["graph"]["except_if_missing_edges"]:
-					raise FileNotFoundError(
-						f"could not read source code for {node_path = }. if you think this is a mistake, set `graph.except_if_missing_edges` to `False` in the config"
-					) from e
-				else:
-					warnings.warn(f"could not read source code for {node_path = }, skipping")
-					continue
-
-			# Get imports, dedupe, and loop over them
+			# path to the source code
 			# -------------------------
-			imported_modules: list[str] = list(set(
-				get_imports(source_code, allow_missing_imports=not config["graph"]["except_if_missing_edges"])
-			))
-
-			for imported_module in imported_modules:
-				# Convert import to module name
-				imported_module_name = imported_module
-
-
-
-				# if stripping module prefix, remove it
-				if config["graph"]["strip_module_prefix"]:
-					imported_module_name = imported_module_name.removeprefix(
-						package_name
-					).removeprefix(".")
-					if not imported_module_name:
-						# if empty string, it means we are looking for the root
-						imported_module_name = config["root_node_name"]
-
-				if imported_module_name in nodes_dict:
-		
-					# adding edge to local import
-					# -------------------------
-					edge_type = (
-						"inits"
-						if node_path.endswith("__init__.py")
-						else "uses"
-					)
-					if edge_config.get(edge_type):
-						edges_to_add.append(
-							dict(
-								u_for_edge=nodes_dict[imported_module_name],
-								v_for_edge=node,
-								**edge_config[edge_type],
-							)
-						)
-				else:
-					# assume external module
-					# -------------------------
-					if config["graph"]["include_externals"]:
-						nodes_to_add.append(
-							dict(
-								node_for_adding=imported_module_name,
-								rank=0,  # for ranking/ordering of the nodes
-								**config["node"][
-									"external"
-								],  # attributes (color, shape, etc) for the node type
-							)
-						)
-						edges_to_add.append(
-							dict(
-								u_for_edge=imported_module_name,
-								v_for_edge=node,
-								**edge_config["external"],
-							)
-						)
+			node_path: str = get_source_path(node, fs_index)
+			sources.append((node, node_path))
 
-		# add the nodes and edges we were missing
+		# index the importable nodes by module name, to resolve imports against
 		# -------------------------
+		module_index: ModuleIndex[Node] = get_module_index(
+			nodes_dict,
+			package_name=package_name,
+			root_is_package=fs_index.has_init("."),
+		)
 
-		# these nodes should only be present if we are including external imports of other packages
-		for x in nodes_to_add:
-			G.add_node(**x)
+		# read and parse them all, from the cache or in a process pool
+		# -------------------------
+		read_before: tuple[int, int, int, int] = (
+			import_cache.files_read,
+			import_cache.bytes_read,
+			import_cache.hits,
+			import_cache.misses,
+		)
+		with profiler.phase("parsing", files=len(sources)):
+			imports_results: list[list[ImportRecord] | BaseException] = get_imports_many(
+				[os.path.join(root, node_path) for _, node_path in sources],
+				import_cache=import_cache,
+				options=ImportScanOptions.from_config(config),
+				workers=config["graph"].get("workers"),
+				executor=executor,
+			)
+		for counter, before, after in zip(
+			("files_read", "bytes_read", "cache_hits", "cache_misses"),
+			read_before,
+			(
+				import_cache.files_read,
+				import_cache.bytes_read,
+				import_cache.hits,
+				import_cache.misses,
+			),
+		):
+			profiler.count(counter, after - before)
+
+		with profiler.phase("edge_building"):
+			# init empty lists, cant modify while iterating
+			# -------------------------
+			nodes_to_add: list[dict] = []
+			edges_to_add: list[dict] = []
+			for (node, node_path), imports_result in zip(sources, imports_results):
+
+				# handle errors from reading or parsing
+				# -------------------------
+				if isinstance(imports_result, FileNotFoundError):
+					if config["graph"]["except_if_missing_edges"]:
+						raise FileNotFoundError(
+							f"could not read source code for {node_path = }. if you think this is a mistake, set `graph.except_if_missing_edges` to `False` in the config"
+						) from imports_result
+					else:
+						warnings.warn(f"could not read source code for {node_path = }, skipping")
+						continue
+				elif isinstance(imports_result, BaseException):
+					raise imports_result
+
+				# dedupe, keeping order so the output is deterministic, and resolve them
+				# -------------------------
+				node_nodes_to_add, node_edges_to_add = get_import_edges(
+					node=node,
+					node_path=node_path,
+					imports=list(dict.fromkeys(imports_result)),
+					module_index=module_index,
+					config=config,
+				)
+				nodes_to_add.extend(node_nodes_to_add)
+				edges_to_add.extend(node_edges_to_add)
+
+			# add the nodes and edges we were missing
+			# -------------------------
+
+			# these nodes should only be present if we are including external imports of other packages
+			for x in nodes_to_add:
+				G.add_node(**x)
+
+			for x in edges_to_add:
+				G.add_edge(**x)
+
+		if save_import_cache:
+			import_cache.save()
+
+	# keep what is needed to patch the graph later, see `dep_graph_viz.watch`
+	G.graph["nodes_dict"] = nodes_dict
+	G.graph["config"] = config
+	G.graph["package_name"] = package_name
+	if include_local_imports:
+		G.graph["module_index"] = module_index
+
+	if isinstance(G, CSRBuilder):
+		G = G.build()
+
+	# merge modules below `graph.collapse_depth` into their ancestors
+	# --------------------------------------------------
+	collapse_depth: int | None = config["graph"].get("collapse_depth")
+	collapse_overrides: dict[str, int | None] = config["graph"].get("collapse_overrides") or dict()
+	if collapse_depth is not None or collapse_overrides:
+		from dep_graph_viz.collapse import collapse_graph
+
+		with profiler.phase("collapse", nodes=G.number_of_nodes()):
+			G = collapse_graph(G, collapse_depth, collapse_overrides)
+
+	# drop import edges implied by other paths
+	# --------------------------------------------------
+	if config["graph"].get("transitive_reduction", False):
+		from dep_graph_viz.reduction import transitive_reduction
 
-		for x in edges_to_add:
-			G.add_edge(**x)
+		with profiler.phase("transitive_reduction", edges=G.number_of_edges()):
+			G, stats = transitive_reduction(G)
+		profiler.count("reduced_edges", stats.removed)
 
 	return G
 
 
-def write_dot(G: nx.DiGraph, output_filename: str, dot_attrs: dict) -> None:
-	"""Write graph to a DOT file"""
-	P: pydot.Dot = to_pydot(G)
+def _set_package_name(config: dict, root: str) -> None:
+	"set `PACKAGE_NAME` from the root directory, and name the root node after it unless the prefix is stripped"
+	config["PACKAGE_NAME"] = os.path.basename(os.path.abspath(root))
+	if not config["graph"]["strip_module_prefix"]:
+		config["root_node_name"] = config["PACKAGE_NAME"]
+
+
+def build_graph_for(
+	root: str,
+	config: dict | None = None,
+	import_cache: ImportCache | None = None,
+	profiler: Profiler | NullProfiler = NULL_PROFILER,
+) -> nx.MultiDiGraph | CSRGraph:
+	"""build the graph of the directory `root` as `main` would, for use as a library
+
+	never changes the working directory or any global state, so several threads can build graphs at once.
+	`config` holds overrides of `_DEFAULT_CONFIG` as a nested dict, and is not modified -- the full config
+	used ends up in `G.graph["config"]`. each call gets its own `ImportCache` unless one is given, and a
+	cache should not be shared between threads
+
+	files are parsed in this process unless `graph.workers` is set: a process pool forked from a process
+	running other threads can deadlock, so only set it when calling from a single thread
+	"""
+	CONFIG: dict = deepcopy(_DEFAULT_CONFIG)
+	CONFIG["graph"]["workers"] = 1
+	if config is not None:
+		update_with_nested_dict(CONFIG, deepcopy(config))
+	_process_config(CONFIG, root=root)
+	_set_package_name(CONFIG, root)
+	return build_graph(root=root, config=CONFIG, import_cache=import_cache, profiler=profiler)
+
+
+def _to_pydot(
+	G: nx.DiGraph | CSRGraph, dot_attrs: dict, element_ids: bool = False
+) -> pydot.Dot:
+	"convert `G` with `networkx.drawing.nx_pydot`, only imported when the `pydot` writer is used"
+	import networkx as nx
+	from networkx.drawing.nx_pydot import to_pydot
+
+	H: nx.MultiDiGraph = as_networkx(G)
+	if element_ids:
+		# on a copy, with the same ids as `write_dot_stream` gives
+		H_ids: nx.MultiDiGraph = nx.MultiDiGraph()
+		for i, (node, attrs) in enumerate(H.nodes(data=True)):
+			H_ids.add_node(node, **{**attrs, "id": f"n{i}"})
+		for j, (u, v, key, attrs) in enumerate(H.edges(keys=True, data=True)):
+			H_ids.add_edge(u, v, key=key, **{**attrs, "id": f"e{j}"})
+		H = H_ids
+	P: pydot.Dot = to_pydot(H)
 	P.obj_dict["attributes"].update(dot_attrs)
-	P.write_raw(output_filename)
+	return P
+
+
+def write_dot(
+	G: nx.DiGraph | CSRGraph,
+	output_filename: str,
+	dot_attrs: dict,
+	writer: Literal["native", "pydot"] = "native",
+) -> None:
+	"""Write graph to a DOT file, streaming it with `dep_graph_viz.dot` or going through `pydot`"""
+	if writer == "native":
+		write_dot_native(G, output_filename, dot_attrs=dot_attrs)
+	elif writer == "pydot":
+		_to_pydot(G, dot_attrs).write_raw(output_filename)
+	else:
+		raise ValueError(f"unknown dot writer: {writer!r}, expected 'native' or 'pydot'")
+
+
+def dot_source(
+	G: nx.DiGraph | CSRGraph,
+	dot_attrs: dict,
+	writer: Literal["native", "pydot"] = "native",
+	element_ids: bool = False,
+) -> str:
+	"""the DOT text `write_dot` would write for `G`, as a string
+
+	`element_ids` gives nodes and edges the ids `adjacency_index` refers to, see `write_dot_stream`
+	"""
+	if writer == "native":
+		buffer: io.StringIO = io.StringIO()
+		write_dot_stream(G, buffer, dot_attrs=dot_attrs, element_ids=element_ids)
+		return buffer.getvalue()
+	elif writer == "pydot":
+		return _to_pydot(G, dot_attrs, element_ids=element_ids).to_string()
+	else:
+		raise ValueError(f"unknown dot writer: {writer!r}, expected 'native' or 'pydot'")
+
+
+def output_formats(output_fmt: str | Sequence[str]) -> list[str]:
+	"formats to write, from one format, a comma separated string, or a list of them, without duplicates"
+	formats: list[str] = (
+		output_fmt.split(",") if isinstance(output_fmt, str) else list(output_fmt)
+	)
+	formats = list(dict.fromkeys(fmt.strip().lower() for fmt in formats if fmt.strip()))
+	if not formats:
+		raise ValueError(f"no output format given: {output_fmt!r}")
+	return formats
+
+
+def write_outputs(
+	G: nx.MultiDiGraph | CSRGraph,
+	output: str,
+	output_fmt: str | Sequence[str],
+	config: dict,
+	verbose: bool = False,
+	profiler: Profiler | NullProfiler = NULL_PROFILER,
+	render_cache: RenderCache | None = None,
+) -> dict[str, str]:
+	"""write the dot file for `G`, then render it to each of `output_fmt` or generate the html
+
+	the DOT is generated once and kept in memory. each format is rendered concurrently, `dot -T<fmt>` reading
+	it from stdin and writing `{output}.{fmt}` itself. returns the path written for each format, and `"dot"`.
+
+	outputs of earlier runs for the same DOT are taken from the render cache instead of running `dot`. if
+	`render_cache` is `None`, one is created from `config["render_cache"]` and evicted at the end.
+	"""
+	formats: list[str] = output_formats(output_fmt)
+	own_render_cache: bool = render_cache is None
+	if render_cache is None and any(fmt not in ("dot", "html") for fmt in formats):
+		render_cache = RenderCache.from_config(config)
+
+	# write the dot file first. for the html, nodes and edges get ids its adjacency index refers to
+	output_file_dot: str = f"{output}.dot"
+	print(f"# writing dot file: {output_file_dot}")
+	with profiler.phase("dot_writing", nodes=G.number_of_nodes(), edges=G.number_of_edges()):
+		dot: str = dot_source(
+			G,
+			dot_attrs=config["dot_attrs"],
+			writer=config.get("dot_writer", "native"),
+			element_ids="html" in formats,
+		)
+		with open(output_file_dot, "w", encoding="utf-8") as f:
+			f.write(dot)
+	if profiler.enabled:
+		profiler.count("dot_bytes", os.path.getsize(output_file_dot))
+
+	outputs: dict[str, str] = {fmt: f"{output}.{fmt}" for fmt in formats if fmt != "dot"}
+
+	# checked against `HtmlLayout` by `_process_config`
+	html_layout: HtmlLayout = (config.get("html") or dict()).get("layout", "browser")
+	html_compress: bool = (config.get("html") or dict()).get("compress", False)
+	futures: dict[str, Future] = dict()
+
+	def _render_dot(fmt: str) -> None:
+		"run dot/graphviz and convert to the desired format, or take it from the render cache"
+		key: str | None = None
+		if render_cache is not None:
+			key = render_cache.key(dot, fmt)
+			with profiler.phase("render_cache", output_fmt=fmt):
+				if render_cache.fetch(key, fmt, outputs[fmt]):
+					return
+		with profiler.phase("dot", output_fmt=fmt):
+			# render next to the output and move it over: a failed render leaves the old output in place, and
+			# an output linked to a cached artifact is replaced instead of written through
+			tmp_path: str = f"{outputs[fmt]}.{uuid.uuid4().hex}.tmp"
+			try:
+				render_dot_file(dot, fmt, tmp_path, verbose=verbose)
+				os.replace(tmp_path, outputs[fmt])
+			finally:
+				if os.path.lexists(tmp_path):
+					os.remove(tmp_path)
+		if render_cache is not None:
+			assert key is not None
+			render_cache.store(key, fmt, outputs[fmt])
+
+	def _render_html() -> None:
+		"put the dot source inline, or with `html.layout` set the svg or geometry laid out by graphviz"
+		from dep_graph_viz.html import adjacency_index, render_html, render_html_svg
+
+		with profiler.phase("html", layout=html_layout):
+			adjacency: dict[str, list] = adjacency_index(G)
+			html: str
+			if html_layout == "server" and "svg" in futures:
+				# reuse the svg being rendered anyway
+				futures["svg"].result()
+				with open(outputs["svg"], "r", encoding="utf-8") as f:
+					html = render_html_svg(
+						f.read(), adjacency=adjacency, compress=html_compress
+					)
+			else:
+				html = render_html(
+					dot, layout=html_layout, adjacency=adjacency, compress=html_compress
+				)
+			with open(outputs["html"], "w", encoding="utf-8") as f:
+				f.write(html)
+
+	if outputs:
+		print(f"# rendering {', '.join(outputs.values())}...")
+		with ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+			for fmt in outputs:
+				if fmt != "html":
+					futures[fmt] = pool.submit(_render_dot, fmt)
+			if "html" in outputs:
+				futures["html"] = pool.submit(_render_html)
+			# raise the first error
+			for future in futures.values():
+				future.result()
+		if render_cache is not None:
+			print(f"\t {render_cache.summary()}")
+			if own_render_cache:
+				render_cache.evict()
+
+	return {"dot": output_file_dot, **outputs}
 
 
 def main(
 	root: str | None = None,
 	module: str | None = None,
 	output: str = "output",
-	output_fmt: Literal["svg", "png"] = "svg",
+	output_fmt: str | Sequence[str] = "svg",
 	config_file: str | None = None,
 	print_cfg: bool = False,
 	verbose: bool = False,
+	watch: bool = False,
+	profile: bool = False,
+	no_render_cache: bool = False,
 	**kwargs,
 ) -> None:
 	"""Main function to generate and render a graphviz DOT file representing module dependencies
@@ -479,14 +872,24 @@ def main(
 	- `output: str`
 	    output filename (without extension)
 	    default: `"output"`
-	- `output_fmt: Literal["svg", "png"]`
-	    output format for running `dot`
+	- `output_fmt: str | Sequence[str]`
+	    output format for running `dot`, or `"html"`. several can be given as a list or comma separated,
+	    `--output_fmt=svg,png,html`, and are rendered concurrently from one build of the graph
 	    default: `"svg"`
 	- `config_file: str | None = None`
 	    path to a JSON file containing configuration options
 	- `print_cfg: bool = False`
 	    whether to print the configuration after loading it -- if this is set, the program will exit after printing the config
 	- `verbose: bool = False`
+	- `watch: bool = False`
+	    keep running, polling for changed, added or removed files. only the changed files are re-parsed, and
+	    outputs are re-written only if the graph actually changed
+	- `profile: bool = False`
+	    time each phase (config and git detection, discovery, parsing, edge building, writing and rendering)
+	    and write `{output}.profile.json` with the durations and counts of files and bytes read, and
+	    `{output}.trace.json` in Chrome trace-event format, for `chrome://tracing` or https://ui.perfetto.dev
+	- `no_render_cache: bool = False`
+	    always run `dot`, ignoring the render cache (same as `--render_cache.enabled=False`)
 	- `h` or `help`
 	    print this help message and exit
 
@@ -512,6 +915,72 @@ def main(
 	    kwargs for uses edges (i.e. file A imports module B for using it)
 	- `edge.inits: dict|None`
 	    kwargs for init edges (i.e. __init__.py file imports something from downstream of itself)
+	- `graph.workers: int|None`
+	    number of processes used to read and parse files. `None` means the CPU count, `1` disables the pool
+	    default: `None`
+	- `graph.import_scanner: "ast"|"fast"`
+	    how to find imports. `"fast"` scans the token stream instead of building a full AST, and falls back to
+	    the AST on anything ambiguous. it does not report syntax errors outside of import statements
+	    default: `"ast"`
+	- `graph.import_scanner_header_only: bool`
+	    with the `"fast"` scanner, stop at the first top-level statement which is not an import
+	    default: `False`
+	- `import_cache.enabled: bool`
+	    cache the imports found in each file on disk, keyed by path + size + mtime with a content-hash fallback
+	    default: `True`
+	- `import_cache.dir: str|None`
+	    where to store the import cache. if `None`, uses `$XDG_CACHE_HOME/dep_graph_viz`
+	- `import_cache.max_entries: int`
+	    least recently used entries beyond this many are evicted
+	    default: `100_000`
+	- `render_cache.enabled: bool`
+	    reuse earlier `dot` outputs for byte-identical DOT, format and graphviz version instead of running `dot`
+	    default: `True`
+	- `render_cache.dir: str|None`
+	    where to store rendered outputs. if `None`, uses `$XDG_CACHE_HOME/dep_graph_viz/renders-v1`
+	- `render_cache.max_bytes: int`
+	    least recently used outputs beyond this total size are evicted
+	    default: 512 MiB
+	- `render_cache.hardlink: bool`
+	    hard-link cached outputs into place instead of copying them
+	    default: `True`
+	- `html.layout: "browser"|"server"|"canvas"`
+	    `"browser"` embeds the DOT in the html and lays it out with d3-graphviz on page load. `"server"` runs
+	    `dot -Tsvg` once when writing and embeds the finished svg, so large graphs open without a layout step.
+	    `"canvas"` runs `dot -Tjson` and draws only what is in view to a canvas, for graphs too large to pan
+	    smoothly as svg
+	    default: `"browser"`
+	- `html.compress: bool`
+	    gzip and base64 encode the DOT or svg and the adjacency index into the html, unpacked by the browser with
+	    `DecompressionStream` on load. several times smaller for large graphs, and still a single file
+	    default: `False`
+	- `watch.interval: float`
+	    seconds between polls in `--watch` mode
+	    default: `1.0`
+	- `watch.debounce: float`
+	    after a change, wait until files have been quiet for this many seconds before rebuilding
+	    default: `0.5`
+	- `graph.engine: "networkx"|"csr"`
+	    `"csr"` stores the graph as integer arrays with shared attribute tables instead of a networkx graph,
+	    which uses far less memory on large trees. it is converted to networkx only where needed (the `pydot`
+	    writer and `--watch`)
+	    default: `"networkx"`
+	- `graph.collapse_depth: int|None`
+	    merge every module more than this many levels below the root into its ancestor directory, and the
+	    import edges between merged groups into single edges with a `weight`. `0` leaves only the root
+	    default: `None` (nothing is collapsed)
+	- `graph.collapse_overrides: dict[str, int|None]`
+	    collapse depth for the modules under a path relative to the root, like `--graph.collapse_overrides.core/src=3`.
+	    the most specific path wins, and `None` never collapses modules under it
+	    default: `{}`
+	- `graph.transitive_reduction: bool`
+	    drop import edges implied by other import paths, reducing the condensation so that cycles are kept.
+	    hierarchy edges are left alone, and the number of edges removed is printed
+	    default: `False`
+	- `dot_writer: "native"|"pydot"`
+	    `"native"` streams the dot file directly, writing attributes shared by a node or edge type once.
+	    `"pydot"` converts the graph with `networkx.drawing.nx_pydot.to_pydot` first
+	    default: `"native"`
 	- `dot_attrs: dict`
 	    kwargs for the dot graph itself
 	    default: `{'rankdir': 'TB'}` (top to bottom)
@@ -527,6 +996,8 @@ def main(
 	# handle kwargs and config
 	# --------------------------------------------------
 
+	profiler: Profiler | NullProfiler = Profiler() if profile else NULL_PROFILER
+
 	# handle module vs explicit path
 	if root is None:
 		assert module is not None, f"either root or module must be given, got values for both: {root = }, {module = }"
@@ -537,33 +1008,36 @@ def main(
 		raise ValueError("either root or module must be given, got `None` for both")
 	
 
-	# update config from file if given
-
-	CONFIG: dict = deepcopy(_DEFAULT_CONFIG)
-	print(kwargs)
-	print(CONFIG["graph"])
-	if config_file is not None:
-		with open(config_file, "r", encoding="utf-8") as f:
-			update_with_nested_dict(CONFIG, json.load(f))
-
-	# update config from kwargs
-	if len(kwargs) > 0:
-		update_with_nested_dict(
-			CONFIG,
-			kwargs_to_nested_dict(
-				kwargs, transform_key=lambda x: x.lstrip("-"), sep="."
-			),
-		)
-	print(CONFIG["graph"])
+	with profiler.phase("config"):
+		# update config from file if given
+		CONFIG: dict = deepcopy(_DEFAULT_CONFIG)
+		print(kwargs)
+		print(CONFIG["graph"])
+		if config_file is not None:
+			with open(config_file, "r", encoding="utf-8") as f:
+				update_with_nested_dict(CONFIG, json.load(f))
+
+		# update config from kwargs
+		if len(kwargs) > 0:
+			update_with_nested_dict(
+				CONFIG,
+				kwargs_to_nested_dict(
+					kwargs, transform_key=lambda x: x.lstrip("-"), sep="."
+				),
+			)
+		if no_render_cache:
+			CONFIG["render_cache"]["enabled"] = False
+		print(CONFIG["graph"])
 
 	# process by converting none types, auto-detecting url_prefix from git if needed
 	# special config processing: if we are doing a module, then we try to get the url prefix from there
-	url_prefix: str | None = None
-	if module is not None and CONFIG["url_prefix"] is None:
-		url_prefix = get_package_repository_url(module)
-	_process_config(CONFIG, root=root)
-	if url_prefix is not None:
-		CONFIG["url_prefix"] = url_prefix
+	with profiler.phase("git_detection"):
+		url_prefix: str | None = None
+		if module is not None and CONFIG["url_prefix"] is None:
+			url_prefix = get_package_repository_url(module)
+		_process_config(CONFIG, root=root)
+		if url_prefix is not None:
+			CONFIG["url_prefix"] = url_prefix
 
 	# print help message and exit
 	if "h" in CONFIG or "help" in CONFIG:
@@ -583,51 +1057,78 @@ def main(
 	# set up some other globals
 	# --------------------------------------------------
 
-	# get global package name, set root node name if neededME
-	CONFIG["PACKAGE_NAME"] = os.path.basename(os.path.abspath(root))
-	if not CONFIG["graph"]["strip_module_prefix"]:
-		CONFIG["root_node_name"] = CONFIG["PACKAGE_NAME"]
-	
-	# move directory, build graph, move back
-	# --------------------------------------------------
-
-	# change directory
-	orig_dir: str = os.getcwd()
-	os.chdir(root)
+	# get global package name, set root node name if needed
+	_set_package_name(CONFIG, root)
 
+	# build graph, paths are all relative to the root
+	# --------------------------------------------------
 	print("# building graph...")
-	G: nx.MultiDiGraph = build_graph(
-		# pass "." since we just moved to the root directory
-		root=".",
-		config = CONFIG,
-	)
-	print(f"\t built graph with {len(G.nodes)} nodes and {len(G.edges)} edges")
+	import_cache: ImportCache = ImportCache.from_config(CONFIG)
+	with profiler.phase("build_graph"):
+		G: nx.MultiDiGraph | CSRGraph = build_graph(
+			root=root,
+			config = CONFIG,
+			import_cache=import_cache,
+			profiler=profiler,
+		)
+	import_cache.save()
+	print(f"\t built graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
+	if "transitive_reduction" in G.graph:
+		print(f"\t {G.graph['transitive_reduction'].summary()}")
+	print(f"\t {import_cache.summary()}")
 
-	# change back to original directory
-	os.chdir(orig_dir)
+	# output
+	# --------------------------------------------------
+	write_outputs(
+		G,
+		output=output,
+		output_fmt=output_fmt,
+		config=CONFIG,
+		verbose=verbose,
+		profiler=profiler,
+	)
 
+	if isinstance(profiler, Profiler):
+		profiler.count("nodes", G.number_of_nodes())
+		profiler.count("edges", G.number_of_edges())
+		summary_path, trace_path = profiler.write(output)
+		print(f"# wrote profile to {summary_path} and {trace_path}")
 
-	# output
+	# watch for changes, patching the graph and re-rendering
 	# --------------------------------------------------
+	if watch:
+		from dep_graph_viz.watch import GraphWatcher
 
-	# write the dot file first
-	output_file_dot: str = f"{output}.dot"
-	print(f"# writing dot file: {output_file_dot}")
-	write_dot(G, f"{output_file_dot}", dot_attrs=CONFIG["dot_attrs"])
+		def _rebuild() -> nx.MultiDiGraph:
+			return as_networkx(
+				build_graph(root=root, config=CONFIG, import_cache=import_cache)
+			)
 
-	if output_fmt == "html":
-		# if HTML, generate it and put the dotfile contents inline
-		print("# generating html...")
-		from dep_graph_viz.html import generate_html
+		watcher: GraphWatcher = GraphWatcher(
+			root=root,
+			config=CONFIG,
+			# watching patches the graph in place, which needs networkx
+			G=as_networkx(G),
+			rebuild=_rebuild,
+			import_cache=import_cache,
+		)
 
-		generate_html(output_file_dot, f"{output}.html")
-	else:
-		# otherwise, run dot/graphviz and convert to desired format
-		print("# running dot...")
-		print("\tcommand:")
-		cmd: str = f"dot -T{output_fmt} {output_file_dot} -o {output}.{output_fmt} {'-v' if verbose else ''}"
-		print(f"\t$ {cmd}")
-		subprocess.run(cmd, check=True)
+		def _on_change(G_new: nx.MultiDiGraph) -> None:
+			write_outputs(
+				G_new, output=output, output_fmt=output_fmt, config=CONFIG, verbose=verbose
+			)
+
+		print(f"# watching '{root}' for changes, press Ctrl+C to stop")
+		try:
+			watcher.run(
+				on_change=_on_change,
+				interval=CONFIG["watch"]["interval"],
+				debounce=CONFIG["watch"]["debounce"],
+			)
+		except KeyboardInterrupt:
+			print("# stopped watching")
+		finally:
+			import_cache.save()
 
 	print("# done!")
 
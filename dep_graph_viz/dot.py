@@ -0,0 +1,187 @@
+"""streaming DOT writer, which doesn't build an intermediate `pydot` graph
+
+nodes are grouped by their type and edges by their key (`"uses"`, `"hierarchy"`, etc.), and each group is
+written as a subgraph whose `node [...]` or `edge [...]` defaults hold the attributes shared by every member.
+so `color`, `shape`, `penwidth` and friends are written once per type instead of once per element, and only
+per-element attributes like `rank` and `URL` are repeated.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+import subprocess
+from typing import TYPE_CHECKING, Any, Iterable, TextIO
+
+if TYPE_CHECKING:
+	import networkx as nx
+
+_DOT_ID_REGEX: re.Pattern = re.compile(r"^[A-Za-z_\x80-\U0010ffff][\w\x80-\U0010ffff]*$")
+_DOT_NUMERAL_REGEX: re.Pattern = re.compile(r"^-?(\.[0-9]+|[0-9]+(\.[0-9]*)?)$")
+_DOT_KEYWORDS: frozenset[str] = frozenset(
+	{"node", "edge", "graph", "digraph", "subgraph", "strict"}
+)
+_PER_ELEMENT_ATTRS: frozenset[str] = frozenset({"id"})
+"attributes which must stay on each element, even if a group has a single member"
+
+
+def quote_id(value: Any) -> str:
+	"format a value as a DOT id, quoting it unless it is a plain identifier, a numeral, or already quoted"
+	s: str = str(value)
+	if len(s) >= 2 and s.startswith('"') and s.endswith('"'):
+		return s
+	if (
+		_DOT_ID_REGEX.match(s) and s.lower() not in _DOT_KEYWORDS
+	) or _DOT_NUMERAL_REGEX.match(s):
+		return s
+	# backslashes first, so the ones added before quotes aren't doubled. a trailing backslash would escape
+	# the closing quote
+	return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def format_attrs(attrs: dict[str, Any]) -> str:
+	"format attributes as `k=v, ...`, skipping `None` values (which mean the attribute is disabled)"
+	return ", ".join(
+		f"{quote_id(k)}={quote_id(v)}" for k, v in attrs.items() if v is not None
+	)
+
+
+def node_group(node: Any) -> str:
+	"type of a node for grouping -- `node_type` for `Node` objects, `external` for plain module names"
+	return getattr(node, "node_type", None) or "external"
+
+
+def edge_group(key: Any) -> str:
+	"type of an edge for grouping, from its key"
+	return key if isinstance(key, str) else "default"
+
+
+def common_attrs(attr_dicts: Iterable[dict[str, Any]]) -> dict[str, Any]:
+	"the attributes which have the same value in every dict"
+	common: dict[str, Any] | None = None
+	for attrs in attr_dicts:
+		if common is None:
+			common = dict(attrs)
+		else:
+			common = {
+				k: v for k, v in common.items() if k in attrs and attrs[k] == v
+			}
+		if not common:
+			break
+	return common or dict()
+
+
+def _write_group(
+	f: TextIO,
+	kind: str,
+	name: str,
+	members: list[tuple[str, dict[str, Any]]],
+) -> None:
+	"write one subgraph of `kind` (`node` or `edge`) statements sharing their common attributes"
+	defaults: dict[str, Any] = {
+		k: v
+		for k, v in common_attrs(attrs for _, attrs in members).items()
+		if k not in _PER_ELEMENT_ATTRS
+	}
+	f.write(f"subgraph {quote_id(f'{kind}s_{name}')} {{\n")
+	if defaults:
+		f.write(f"{kind} [{format_attrs(defaults)}];\n")
+	lines: list[str] = []
+	for statement, attrs in members:
+		extra: str = format_attrs(
+			{k: v for k, v in attrs.items() if k not in defaults}
+		)
+		lines.append(f"{statement} [{extra}];\n" if extra else f"{statement};\n")
+	f.writelines(lines)
+	f.write("}\n")
+
+
+def write_dot_stream(
+	G: nx.MultiDiGraph, f: TextIO, dot_attrs: dict, element_ids: bool = False
+) -> None:
+	"""write `G` in DOT format to the text stream `f`
+
+	if `element_ids`, node `i` and edge `j` in the order `G.nodes` and `G.edges` give them get the DOT
+	attribute `id=n{i}` or `id=e{j}`, which graphviz uses as the id of their svg elements
+	"""
+	f.write("digraph {\n")
+	for k, v in dot_attrs.items():
+		if v is not None:
+			f.write(f"{quote_id(k)}={quote_id(v)};\n")
+
+	# nodes, grouped by type
+	node_groups: dict[str, list[tuple[str, dict[str, Any]]]] = dict()
+	for i, (node, attrs) in enumerate(G.nodes(data=True)):
+		if element_ids:
+			attrs = {**attrs, "id": f"n{i}"}
+		node_groups.setdefault(node_group(node), []).append((quote_id(node), attrs))
+	for name, members in node_groups.items():
+		_write_group(f, "node", name, members)
+
+	# edges, grouped by key
+	edge_groups: dict[str, list[tuple[str, dict[str, Any]]]] = dict()
+	for j, (u, v, key, attrs) in enumerate(G.edges(keys=True, data=True)):
+		if element_ids:
+			attrs = {**attrs, "id": f"e{j}"}
+		edge_groups.setdefault(edge_group(key), []).append(
+			(f"{quote_id(u)} -> {quote_id(v)}", attrs)
+		)
+	for name, members in edge_groups.items():
+		_write_group(f, "edge", name, members)
+
+	f.write("}\n")
+
+
+def write_dot_native(G: nx.MultiDiGraph, output_filename: str, dot_attrs: dict) -> None:
+	"write `G` to a DOT file without going through `pydot`"
+	with open(output_filename, "w", encoding="utf-8", buffering=1 << 16) as f:
+		write_dot_stream(G, f, dot_attrs)
+
+
+def _run_dot(args: list[str], dot_source: str, capture_stdout: bool, verbose: bool = False) -> bytes:
+	"run graphviz `dot` with `args`, passing `dot_source` on stdin. stderr is shown if `verbose`"
+	try:
+		result: subprocess.CompletedProcess = subprocess.run(
+			["dot", *args, *(["-v"] if verbose else [])],
+			input=dot_source.encode("utf-8"),
+			stdout=subprocess.PIPE if capture_stdout else None,
+			stderr=None if verbose else subprocess.PIPE,
+			check=True,
+		)
+	except FileNotFoundError as e:
+		raise RuntimeError("graphviz `dot` not found, is graphviz installed?") from e
+	except subprocess.CalledProcessError as e:
+		raise RuntimeError(
+			f"`dot {' '.join(args)}` failed: {(e.stderr or b'').decode('utf-8', errors='replace')}"
+		) from e
+	return result.stdout
+
+
+def render_dot_source(dot_source: str, output_fmt: str) -> bytes:
+	"render DOT text with graphviz `dot`, passing it on stdin and reading the output from stdout"
+	return _run_dot([f"-T{output_fmt}"], dot_source, capture_stdout=True)
+
+
+def render_dot_file(
+	dot_source: str, output_fmt: str, output_path: str, verbose: bool = False
+) -> None:
+	"render DOT text with graphviz `dot`, passing it on stdin and having `dot` write `output_path`"
+	_run_dot(
+		[f"-T{output_fmt}", "-o", output_path],
+		dot_source,
+		capture_stdout=False,
+		verbose=verbose,
+	)
+
+
+@functools.cache
+def graphviz_version() -> str | None:
+	"version line printed by `dot -V`, or `None` if graphviz is not installed"
+	try:
+		result: subprocess.CompletedProcess = subprocess.run(
+			["dot", "-V"], capture_output=True, text=True, check=True
+		)
+	except (FileNotFoundError, subprocess.CalledProcessError):
+		return None
+	# `dot -V` prints to stderr
+	return (result.stderr or result.stdout).strip()
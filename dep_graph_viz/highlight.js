@@ -0,0 +1,78 @@
+// highlighting of the edges around a hovered node, shared by the html templates.
+//
+// `adjacency` is computed when the page is generated: `edges[j]` is `[source, target]` as node indices,
+// and `out[i]` / `in[i]` list the edges leaving and entering node `i`. node `i` and edge `j` are the svg
+// elements with ids `n{i}` and `e{j}`. without an index (`null`), one is built once from the `u->v` titles
+// graphviz gives edges. either way a hover only touches the edges it highlights.
+
+// edges and nodes within `hops` steps of `start`, breadth first over the index
+function neighborhood(adjacency, start, hops, directions) {
+    const edges = new Set();
+    const nodes = new Set([start]);
+    let frontier = [start];
+    for (let hop = 0; hop < hops && frontier.length > 0; hop++) {
+        const next = [];
+        for (const node of frontier) {
+            for (const direction of directions) {
+                for (const j of adjacency[direction][node] || []) {
+                    edges.add(j);
+                    const other = adjacency.edges[j][direction === "out" ? 1 : 0];
+                    if (!nodes.has(other)) {
+                        nodes.add(other);
+                        next.push(other);
+                    }
+                }
+            }
+        }
+        frontier = next;
+    }
+    nodes.delete(start);
+    return { edges, nodes };
+}
+
+// the neighborhood of `start` to highlight, following the `#hops` and `#direction` controls if the page has them
+function highlightNeighborhood(adjacency, start) {
+    const hopsInput = document.getElementById("hops");
+    const directionInput = document.getElementById("direction");
+    const hops = hopsInput ? Math.max(1, parseInt(hopsInput.value) || 1) : 1;
+    const direction = directionInput ? directionInput.value : "both";
+    return neighborhood(adjacency, start, hops, direction === "both" ? ["out", "in"] : [direction]);
+}
+
+function attachHighlighting(svg, adjacency) {
+    let nodeElements, edgeElements;
+    if (adjacency !== null) {
+        nodeElements = adjacency.out.map((_, i) => svg.getElementById("n" + i));
+        edgeElements = adjacency.edges.map((_, j) => svg.getElementById("e" + j));
+    } else {
+        nodeElements = Array.from(svg.querySelectorAll("g.node"));
+        edgeElements = Array.from(svg.querySelectorAll("g.edge"));
+        const nodeIndex = new Map(nodeElements.map((node, i) => [node.querySelector("title").textContent, i]));
+        adjacency = { edges: [], out: nodeElements.map(() => []), in: nodeElements.map(() => []) };
+        edgeElements.forEach((edge, j) => {
+            const [source, target] = edge.querySelector("title").textContent.split("->").map((name) => nodeIndex.get(name));
+            adjacency.edges.push([source, target]);
+            adjacency.out[source].push(j);
+            adjacency.in[target].push(j);
+        });
+    }
+
+    let highlighted = { edges: new Set(), nodes: new Set() };
+
+    function clear() {
+        highlighted.edges.forEach((j) => edgeElements[j] && edgeElements[j].classList.remove("highlighted"));
+        highlighted.nodes.forEach((i) => nodeElements[i] && nodeElements[i].classList.remove("neighbor"));
+        highlighted = { edges: new Set(), nodes: new Set() };
+    }
+
+    nodeElements.forEach((node, i) => {
+        if (!node) return;
+        node.addEventListener("mouseover", () => {
+            clear();
+            highlighted = highlightNeighborhood(adjacency, i);
+            highlighted.edges.forEach((j) => edgeElements[j] && edgeElements[j].classList.add("highlighted"));
+            highlighted.nodes.forEach((k) => nodeElements[k] && nodeElements[k].classList.add("neighbor"));
+        });
+        node.addEventListener("mouseout", clear);
+    });
+}
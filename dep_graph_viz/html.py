@@ -1,20 +1,330 @@
+import base64
+import functools
+import gzip
 import importlib.resources
+import json
+import re
+from typing import TYPE_CHECKING, Any, Literal
 
-import dep_graph_viz
+if TYPE_CHECKING:
+	import networkx as nx
 
-HTML_TEMPLATE: str = (
-	importlib.resources.files(dep_graph_viz).joinpath("template.html").read_text()
-)
+	from dep_graph_viz.csr import CSRGraph
 
+HtmlLayout = Literal["browser", "server", "canvas"]
+"""where the graph is laid out: `"browser"` embeds the DOT and lays it out with `d3-graphviz` on page load,
+`"server"` runs `dot -Tsvg` when the page is generated and embeds the finished SVG, and `"canvas"` runs
+`dot -Tjson` and embeds the geometry, which the page draws to a canvas instead of building an SVG DOM"""
 
-def generate_html(dot_file_path: str, output_html_path: str):
+_SVG_PROLOG_REGEX: re.Pattern = re.compile(r"^(\s*(<\?xml[^>]*\?>|<!DOCTYPE[^>]*>|<!--.*?-->))*\s*", re.DOTALL)
+
+
+@functools.cache
+def html_template(name: str = "template.html") -> str:
+	"contents of a template, read on first use"
+	return importlib.resources.files("dep_graph_viz").joinpath(name).read_text()
+
+
+def __getattr__(name: str) -> Any:
+	# `HTML_TEMPLATE` used to be read at import time
+	if name == "HTML_TEMPLATE":
+		return html_template()
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def adjacency_index(G: "nx.MultiDiGraph | CSRGraph") -> dict[str, list]:
+	"""edges out of and into each node, so the page highlights a node's edges without searching all of them
+
+	node `i` and edge `j`, in the order `G.nodes` and `G.edges` give them, are the svg elements with ids
+	`n{i}` and `e{j}` when the DOT is written with `element_ids=True`. returns `edges` as `[source, target]`
+	node indices, and `out` and `in` as the edge indices for each node
+	"""
+	index: dict[Any, int] = {node: i for i, node in enumerate(G.nodes())}
+	edges: list[list[int]] = []
+	out_edges: list[list[int]] = [[] for _ in index]
+	in_edges: list[list[int]] = [[] for _ in index]
+	for j, (u, v) in enumerate(G.edges()):
+		edges.append([index[u], index[v]])
+		out_edges[index[u]].append(j)
+		in_edges[index[v]].append(j)
+	return {"edges": edges, "out": out_edges, "in": in_edges}
+
+
+def _script_json(value: Any) -> str:
+	"`value` as JSON that can go inside a `<script>`, where `</` or `<!--` would end or break it"
+	return json.dumps(value).replace("<", "\\u003c")
+
+
+def encode_payload(value: Any, compress: bool = False) -> str:
+	"""`value` as a payload for `loadPayload` in `payload.js`, a JS expression to put in a template
+
+	with `compress`, strings are gzipped as they are and anything else as JSON, then base64 encoded. the page
+	decompresses it with `DecompressionStream`, so it stays a single file but is several times smaller, and
+	the browser parses a short base64 string instead of a huge literal. `None` stays `null`
+	"""
+	if value is None:
+		return "null"
+	if not compress:
+		return _script_json({"encoding": "identity", "data": value})
+	is_json: bool = not isinstance(value, str)
+	text: str = json.dumps(value) if is_json else value
+	data: str = base64.b64encode(
+		# `mtime=0` keeps the output the same for the same input
+		gzip.compress(text.encode("utf-8"), compresslevel=6, mtime=0)
+	).decode("ascii")
+	return _script_json({"encoding": "gzip+base64", "json": is_json, "data": data})
+
+
+def _fill_template(
+	name: str,
+	adjacency: dict[str, list] | None,
+	compress: bool = False,
+	**content: str,
+) -> str:
+	"fill the scripts, the adjacency index, then `$$KEY$$` with each of `content`"
+	html: str = (
+		html_template(name)
+		.replace("$$PAYLOAD_SCRIPT$$", html_template("payload.js"))
+		.replace("$$HIGHLIGHT_SCRIPT$$", html_template("highlight.js"))
+		.replace("$$ADJACENCY$$", encode_payload(adjacency, compress=compress))
+	)
+	for key, value in content.items():
+		html = html.replace(f"$${key}$$", value)
+	return html
+
+
+def render_html_svg(
+	svg_content: str,
+	adjacency: dict[str, list] | None = None,
+	compress: bool = False,
+) -> str:
+	"""the html page showing a graph already laid out by graphviz as SVG, with pan, zoom and edge highlighting
+
+	with `compress`, the svg is embedded as a compressed payload instead of inline markup
+	"""
+	svg: str = _SVG_PROLOG_REGEX.sub("", svg_content, count=1)
+	if compress:
+		return _fill_template(
+			"template_static.html",
+			adjacency,
+			compress=True,
+			SVG_CONTENT="",
+			SVG_PAYLOAD=encode_payload(svg, compress=True),
+		)
+	return _fill_template(
+		"template_static.html", adjacency, SVG_CONTENT=svg, SVG_PAYLOAD="null"
+	)
+
+
+def _xdot_ops(draw: list[dict], height: float) -> list[list]:
+	"""compact form of graphviz's xdot drawing operations, with `y` pointing down
+
+	- `["c", color]` / `["C", color]`: stroke / fill color
+	- `["w", width]` / `["d", dash]`: line width, and `"dashed"`, `"dotted"` or `""` for solid lines
+	- `["F", size, face]`: font
+	- `["e", filled, x, y, rx, ry]`: ellipse
+	- `["p", filled, closed, x0, y0, x1, y1, ...]`: polygon, or polyline if not `closed`
+	- `["b", filled, x0, y0, ...]`: bezier spline
+	- `["T", x, y, align, text]`: text, `align` is `"l"`, `"c"` or `"r"`
+	"""
+	ops: list[list] = []
+
+	def _points(points: list[list[float]]) -> list[float]:
+		return [round(c, 2) for x, y in points for c in (x, height - y)]
+
+	for op in draw:
+		kind: str = op["op"]
+		if kind in ("c", "C"):
+			color: str = op.get("color") or next(
+				(stop["color"] for stop in op.get("stops", [])), "black"
+			)
+			ops.append([kind, color])
+		elif kind == "S":
+			style: str = op["style"]
+			if style.startswith("setlinewidth("):
+				ops.append(["w", float(style.removeprefix("setlinewidth(").rstrip(")"))])
+			elif style in ("dashed", "dotted", "solid"):
+				ops.append(["d", "" if style == "solid" else style])
+		elif kind == "F":
+			ops.append(["F", op["size"], op["face"]])
+		elif kind in ("E", "e"):
+			x, y, rx, ry = op["rect"]
+			ops.append(["e", kind == "E", round(x, 2), round(height - y, 2), rx, ry])
+		elif kind in ("P", "p", "L"):
+			ops.append(["p", kind == "P", kind != "L", *_points(op["points"])])
+		elif kind in ("B", "b"):
+			ops.append(["b", kind == "B", *_points(op["points"])])
+		elif kind == "T":
+			x, y = op["pt"]
+			ops.append(["T", round(x, 2), round(height - y, 2), op["align"], op["text"]])
+		# images and font characteristics are not drawn
+	return ops
+
+
+def _ops_bbox(ops: list[list]) -> list[float]:
+	"`[x0, y0, x1, y1]` around everything `ops` draw, text included roughly"
+	xs: list[float] = []
+	ys: list[float] = []
+	font_size: float = 14.0
+	for op in ops:
+		if op[0] == "F":
+			font_size = op[1]
+		elif op[0] == "e":
+			_, _, x, y, rx, ry = op
+			xs += [x - rx, x + rx]
+			ys += [y - ry, y + ry]
+		elif op[0] in ("p", "b"):
+			coords: list[float] = op[3:] if op[0] == "p" else op[2:]
+			xs += coords[0::2]
+			ys += coords[1::2]
+		elif op[0] == "T":
+			_, x, y, _, text = op
+			half_width: float = len(text) * font_size * 0.6
+			xs += [x - half_width, x + half_width]
+			ys += [y - font_size, y + font_size / 2]
+	if not xs:
+		return [0.0, 0.0, 0.0, 0.0]
+	return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _element_index(obj: dict, prefix: str) -> int | None:
+	"`i` from the `id=n{i}` / `id=e{j}` attributes `write_dot_stream` adds with `element_ids`"
+	element_id: str = obj.get("id", "")
+	if element_id.startswith(prefix) and element_id[1:].isdigit():
+		return int(element_id[1:])
+	return None
+
+
+def canvas_geometry(layout: dict) -> dict[str, Any]:
+	"""what the canvas template draws, from the output of `dot -Tjson`
+
+	returns `width` and `height` of the drawing, `background` drawing operations for the graph and its
+	subgraphs, and the lists
+	- `nodes`: `[i, bbox, ops, url, name]`
+	- `edges`: `[j, tail, head, bbox, ops]`, with `tail` and `head` node indices
+
+	where `i` and `j` are the indices `adjacency_index` uses when the DOT has element ids, otherwise the order
+	graphviz gives them in. `bbox` is `[x0, y0, x1, y1]` and `ops` are as in `_xdot_ops`, in points with
+	`y` pointing down
+	"""
+	x0, y0, x1, y1 = (float(c) for c in layout.get("bb", "0,0,0,0").split(","))
+	height: float = y1
+	background: list[list] = []
+	for key in ("_draw_", "_ldraw_"):
+		background += _xdot_ops(layout.get(key, []), height)
+
+	nodes: list[list] = []
+	node_index: dict[int, int] = dict()
+	n_subgraphs: int = layout.get("_subgraph_cnt", 0)
+	for k, obj in enumerate(layout.get("objects", [])):
+		ops: list[list] = _xdot_ops(obj.get("_draw_", []), height) + _xdot_ops(
+			obj.get("_ldraw_", []), height
+		)
+		if k < n_subgraphs:
+			# subgraphs come first, only clusters draw anything
+			background += ops
+			continue
+		i: int | None = _element_index(obj, "n")
+		if i is None:
+			i = len(nodes)
+		node_index[obj["_gvid"]] = i
+		nodes.append([i, _ops_bbox(ops), ops, obj.get("URL"), obj.get("name")])
+
+	edges: list[list] = []
+	for edge in layout.get("edges", []):
+		ops = [
+			op
+			for key in ("_draw_", "_hdraw_", "_tdraw_", "_ldraw_")
+			for op in _xdot_ops(edge.get(key, []), height)
+		]
+		j: int | None = _element_index(edge, "e")
+		edges.append(
+			[
+				len(edges) if j is None else j,
+				node_index[edge["tail"]],
+				node_index[edge["head"]],
+				_ops_bbox(ops),
+				ops,
+			]
+		)
+
+	return {
+		"width": x1 - x0,
+		"height": y1 - y0,
+		"background": background,
+		"nodes": nodes,
+		"edges": edges,
+	}
+
+
+def render_html_canvas(layout_json: str, compress: bool = False) -> str:
+	"""the html page drawing a graph laid out by `dot -Tjson` to a canvas
+
+	only what is in view is drawn, found with a quadtree, and labels and thin edges are left out when zoomed
+	out, so panning stays smooth for graphs whose SVG would have tens of thousands of elements. the
+	adjacency for highlighting is built from the edges of the geometry
+	"""
+	geometry: dict[str, Any] = canvas_geometry(json.loads(layout_json))
+	return _fill_template(
+		"template_canvas.html",
+		None,
+		GEOMETRY=encode_payload(geometry, compress=compress),
+	)
+
+
+def render_html(
+	dot_content: str,
+	layout: HtmlLayout = "browser",
+	adjacency: dict[str, list] | None = None,
+	compress: bool = False,
+) -> str:
+	"""the html page showing the graph given as DOT source, laid out in the browser or by running `dot` now
+
+	`adjacency` is the `adjacency_index` of the graph, if the DOT was written with element ids. without it,
+	the page builds an index from the edge titles when it loads. `compress` gzips the DOT or SVG and the
+	index into the page, see `encode_payload`
+	"""
+	if layout == "browser":
+		return _fill_template(
+			"template.html",
+			adjacency,
+			compress=compress,
+			DOT_PAYLOAD=encode_payload(dot_content, compress=compress),
+		)
+	elif layout == "server":
+		from dep_graph_viz.dot import render_dot_source
+
+		return render_html_svg(
+			render_dot_source(dot_content, "svg").decode("utf-8"),
+			adjacency=adjacency,
+			compress=compress,
+		)
+	elif layout == "canvas":
+		from dep_graph_viz.dot import render_dot_source
+
+		return render_html_canvas(
+			render_dot_source(dot_content, "json").decode("utf-8"), compress=compress
+		)
+	else:
+		raise ValueError(
+			f"unknown html layout: {layout!r}, expected 'browser', 'server' or 'canvas'"
+		)
+
+
+def generate_html(
+	dot_file_path: str,
+	output_html_path: str,
+	layout: HtmlLayout = "browser",
+	adjacency: dict[str, list] | None = None,
+	compress: bool = False,
+):
 	dot_content: str = ""
 	with open(dot_file_path, "r") as dot_file:
 		dot_content = dot_file.read()
 
-	dot_content = dot_content.replace("`", "\\`")
-
-	html_content: str = HTML_TEMPLATE.replace("$$DOT_CONTENT$$", dot_content)
+	html_content: str = render_html(
+		dot_content, layout=layout, adjacency=adjacency, compress=compress
+	)
 
 	with open(output_html_path, "w") as output_file:
 		output_file.write(html_content)
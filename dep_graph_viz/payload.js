@@ -0,0 +1,13 @@
+// data embedded in the page by `html.py`, either as is or gzipped and base64 encoded.
+//
+// a payload is `{"encoding": "identity", "data": <value>}`, or `{"encoding": "gzip+base64", "json": <bool>,
+// "data": <base64>}` which is decompressed with the browser's `DecompressionStream` and parsed as JSON if
+// `json` is set. resolves to `null` for a `null` payload.
+async function loadPayload(payload) {
+    if (payload === null) return null;
+    if (payload.encoding === "identity") return payload.data;
+    const bytes = Uint8Array.from(atob(payload.data), (c) => c.charCodeAt(0));
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+    const text = await new Response(stream).text();
+    return payload.json ? JSON.parse(text) : text;
+}
@@ -0,0 +1,185 @@
+"""transitive reduction of the import edges, leaving hierarchy edges alone
+
+an import edge `u -> v` is dropped if `v` can be reached from `u` through other import edges, so every
+dependency stays visible as a path, drawn with far fewer edges. import graphs have cycles, which have no
+unique transitive reduction, so the reduction is done on the condensation: each strongly connected component
+(a set of modules which all import each other, directly or not) becomes one node, and the edges of that DAG
+are reduced. all edges inside a component are kept, and of several edges between the same two components
+only the first is. parallel edges with different keys between the same two nodes count as one.
+
+reachability over import edges is unchanged, see `import_reachability`.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Hashable, Iterable, NamedTuple
+
+from dep_graph_viz.csr import IMPORT_EDGE_KEYS, CSRBuilder, CSRGraph, empty_like, finish_graph
+
+if TYPE_CHECKING:
+	import networkx as nx
+
+
+class ReductionStats(NamedTuple):
+	"how many import edges `transitive_reduction` removed, out of how many"
+
+	removed: int
+	import_edges: int
+
+	def summary(self) -> str:
+		return f"transitive reduction removed {self.removed} of {self.import_edges} import edges"
+
+
+def strongly_connected_components(successors: list[list[int]]) -> list[int]:
+	"""component number of each node, numbered in reverse topological order: edges between components only
+	go from higher to lower numbers
+
+	Tarjan's algorithm, with an explicit stack so deep import chains don't hit the recursion limit
+	"""
+	n: int = len(successors)
+	index: list[int] = [-1] * n
+	lowlink: list[int] = [0] * n
+	on_stack: list[bool] = [False] * n
+	component: list[int] = [-1] * n
+	stack: list[int] = []
+	counter: int = 0
+	n_components: int = 0
+
+	for start in range(n):
+		if index[start] != -1:
+			continue
+		# (node, position in its successors)
+		work: list[tuple[int, int]] = [(start, 0)]
+		index[start] = lowlink[start] = counter
+		counter += 1
+		stack.append(start)
+		on_stack[start] = True
+		while work:
+			node, i = work[-1]
+			if i < len(successors[node]):
+				work[-1] = (node, i + 1)
+				succ: int = successors[node][i]
+				if index[succ] == -1:
+					index[succ] = lowlink[succ] = counter
+					counter += 1
+					stack.append(succ)
+					on_stack[succ] = True
+					work.append((succ, 0))
+				elif on_stack[succ]:
+					lowlink[node] = min(lowlink[node], index[succ])
+				continue
+			work.pop()
+			if work:
+				parent: int = work[-1][0]
+				lowlink[parent] = min(lowlink[parent], lowlink[node])
+			if lowlink[node] == index[node]:
+				while True:
+					member: int = stack.pop()
+					on_stack[member] = False
+					component[member] = n_components
+					if member == node:
+						break
+				n_components += 1
+	return component
+
+
+def _import_successors(
+	G: nx.MultiDiGraph | CSRGraph, keys: Iterable[Hashable]
+) -> tuple[list[Hashable], dict[Hashable, int], list[list[int]]]:
+	"nodes, their numbers, and the distinct successors of each over edges with one of `keys`, no self loops"
+	import_keys: frozenset = frozenset(keys)
+	nodes: list[Hashable] = list(G.nodes())
+	number: dict[Hashable, int] = {node: i for i, node in enumerate(nodes)}
+	successors: list[dict[int, None]] = [dict() for _ in nodes]
+	for u, v, key in G.edges(keys=True):
+		if key in import_keys and u != v:
+			successors[number[u]][number[v]] = None
+	return nodes, number, [list(s) for s in successors]
+
+
+def import_reachability(
+	G: nx.MultiDiGraph | CSRGraph, keys: Iterable[Hashable] = IMPORT_EDGE_KEYS
+) -> dict[Hashable, frozenset[Hashable]]:
+	"the nodes each node reaches over import edges, for checking that a reduction kept them all"
+	nodes, _, successors = _import_successors(G, keys)
+	component: list[int] = strongly_connected_components(successors)
+	n_components: int = max(component, default=-1) + 1
+	members: list[int] = [0] * n_components
+	dag: list[set[int]] = [set() for _ in range(n_components)]
+	for u, succs in enumerate(successors):
+		members[component[u]] |= 1 << u
+		for v in succs:
+			dag[component[u]].add(component[v])
+	# components are numbered sinks first, so successors are done before their predecessors
+	reach: list[int] = [0] * n_components
+	for c in range(n_components):
+		for d in dag[c]:
+			if d != c:
+				reach[c] |= reach[d] | members[d]
+		if members[c] & (members[c] - 1):
+			# more than one member, so they are on a cycle and reach each other
+			reach[c] |= members[c]
+	return {
+		node: frozenset(nodes[i] for i in range(len(nodes)) if reach[component[u]] >> i & 1)
+		for u, node in enumerate(nodes)
+	}
+
+
+def transitive_reduction(
+	G: nx.MultiDiGraph | CSRGraph, keys: Iterable[Hashable] = IMPORT_EDGE_KEYS
+) -> tuple[nx.MultiDiGraph | CSRGraph, ReductionStats]:
+	"""a copy of `G` without the import edges implied by other paths, see the module docs
+
+	the graph is of the same kind as `G`, with the statistics also in `graph["transitive_reduction"]`. only
+	edges with one of `keys` are considered, the rest are kept as they are
+	"""
+	import_keys: frozenset = frozenset(keys)
+	nodes, number, successors = _import_successors(G, import_keys)
+	component: list[int] = strongly_connected_components(successors)
+	n_components: int = max(component, default=-1) + 1
+
+	# edges of the condensation
+	dag: list[list[int]] = [[] for _ in range(n_components)]
+	seen: set[tuple[int, int]] = set()
+	for u, succs in enumerate(successors):
+		for v in succs:
+			c, d = component[u], component[v]
+			if c != d and (c, d) not in seen:
+				seen.add((c, d))
+				dag[c].append(d)
+
+	# reduce it: `c -> d` is implied if `d` is reachable from another successor of `c`. bitsets of the
+	# components strictly reachable from each one, built sinks first
+	reach: list[int] = [0] * n_components
+	kept_dag: set[tuple[int, int]] = set()
+	for c in range(n_components):
+		through_others: int = 0
+		for d in dag[c]:
+			through_others |= reach[d]
+			reach[c] |= reach[d] | (1 << d)
+		for d in dag[c]:
+			if not through_others >> d & 1:
+				kept_dag.add((c, d))
+
+	# keep edges inside components, and the first edge for each kept edge of the condensation
+	H: nx.MultiDiGraph | CSRBuilder = empty_like(G)
+	for node, attrs in G.nodes(data=True):
+		H.add_node(node, **attrs)
+	kept_pair: dict[tuple[int, int], tuple[int, int]] = dict()
+	removed: int = 0
+	import_edges: int = 0
+	for u, v, key, attrs in G.edges(keys=True, data=True):
+		if key in import_keys:
+			import_edges += 1
+			i, j = number[u], number[v]
+			c, d = component[i], component[j]
+			if c != d:
+				first: tuple[int, int] = kept_pair.setdefault((c, d), (i, j))
+				if (c, d) not in kept_dag or first != (i, j):
+					removed += 1
+					continue
+		H.add_edge(u, v, key=key, **attrs)
+
+	stats: ReductionStats = ReductionStats(removed=removed, import_edges=import_edges)
+	H.graph["transitive_reduction"] = stats
+	return finish_graph(H), stats
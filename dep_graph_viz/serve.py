@@ -0,0 +1,466 @@
+"""local HTTP service for dependency graphs
+
+`python -m dep_graph_viz serve --port=8765` answers
+
+```
+GET /graph?root=path/to/pkg&format=svg&edge.uses.color=green
+GET /graph?module=json&format=json
+GET /stats
+```
+
+query parameters other than `root`, `module` and `format` are config overrides as on the command line, with
+values parsed as JSON where they can be (`graph.include_externals=true`). only the keys in `OVERRIDABLE_KEYS`
+may be overridden: caches and worker processes belong to the service, not to whoever sends a request. `format` is one of `dot`, `svg`,
+`png`, `html` or `json` (nodes and edges with their attributes), `dot` by default.
+
+built graphs and rendered outputs are kept in LRU caches, keyed by the size and modification time of every
+python file under the root together with the overrides. so a repeat request only walks and stats the tree,
+and any edit is picked up by the next request. concurrent requests for a key which is not cached yet wait
+for a single build instead of each starting their own.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Generic, Hashable, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+import networkx as nx
+from muutils.dictmagic import kwargs_to_nested_dict, update_with_nested_dict
+
+from dep_graph_viz.csr import CSRGraph
+from dep_graph_viz.dep_graph_viz import build_graph_for, dot_source
+from dep_graph_viz.dot import node_group, render_dot_source
+from dep_graph_viz.html import adjacency_index, render_html
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.paths import get_module_directory, get_package_repository_url
+from dep_graph_viz.watch import snapshot_files
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+CONTENT_TYPES: dict[str, str] = {
+	"dot": "text/vnd.graphviz; charset=utf-8",
+	"svg": "image/svg+xml",
+	"png": "image/png",
+	"html": "text/html; charset=utf-8",
+	"json": "application/json",
+}
+"formats `/graph` can return, and their content types"
+
+RESERVED_PARAMS: frozenset[str] = frozenset({"root", "module", "format"})
+"query parameters which are not config overrides"
+
+OVERRIDABLE_KEYS: frozenset[str] = frozenset(
+	{
+		"url_prefix",
+		"auto_url_format",
+		"auto_url_replace",
+		"root_node_name",
+		"dot_writer",
+		"dot_attrs",
+		"edge",
+		"node",
+		"html",
+		"graph.include_local_imports",
+		"graph.strip_module_prefix",
+		"graph.include_externals",
+		"graph.except_if_missing_edges",
+		"graph.strict_names",
+		"graph.import_scanner",
+		"graph.import_scanner_header_only",
+		"graph.engine",
+		"graph.collapse_depth",
+		"graph.collapse_overrides",
+		"graph.transitive_reduction",
+	}
+)
+"config keys requests may override, together with everything under them"
+
+SERVICE_CONFIG: dict = {
+	"graph": {"workers": 1},
+	"import_cache": {"enabled": False},
+}
+"config the service builds every graph with, whatever the overrides. requests are already handled in threads"
+
+
+class LRUCache(Generic[K, V]):
+	"thread-safe mapping which keeps the `max_entries` most recently used entries"
+
+	def __init__(self, max_entries: int) -> None:
+		self.max_entries: int = max_entries
+		self._data: OrderedDict[K, V] = OrderedDict()
+		self._lock: threading.Lock = threading.Lock()
+		self.hits: int = 0
+		self.misses: int = 0
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def get(self, key: K) -> V | None:
+		with self._lock:
+			value: V | None = self._data.get(key)
+			if value is None:
+				self.misses += 1
+				return None
+			self._data.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key: K, value: V) -> None:
+		with self._lock:
+			self._data[key] = value
+			self._data.move_to_end(key)
+			while len(self._data) > self.max_entries:
+				self._data.popitem(last=False)
+
+
+class Coalescer:
+	"runs one computation per key at a time, callers asking for a key already in progress wait for its result"
+
+	def __init__(self) -> None:
+		self._lock: threading.Lock = threading.Lock()
+		self._in_flight: dict[Hashable, Future] = dict()
+		self.coalesced: int = 0
+
+	def run(self, key: Hashable, compute: Callable[[], V]) -> V:
+		with self._lock:
+			future: Future | None = self._in_flight.get(key)
+			is_owner: bool = future is None
+			if future is None:
+				future = Future()
+				self._in_flight[key] = future
+			else:
+				self.coalesced += 1
+
+		if not is_owner:
+			return future.result()
+
+		try:
+			result: V = compute()
+		except BaseException as e:
+			future.set_exception(e)
+			raise
+		else:
+			future.set_result(result)
+			return result
+		finally:
+			with self._lock:
+				del self._in_flight[key]
+
+
+def is_overridable(key: str) -> bool:
+	"whether the dotted config `key` is one of `OVERRIDABLE_KEYS` or below one"
+	parts: list[str] = key.split(".")
+	return any(".".join(parts[:n]) in OVERRIDABLE_KEYS for n in range(1, len(parts) + 1))
+
+
+def parse_overrides(params: dict[str, str]) -> dict:
+	"""config overrides from query parameters, as a nested dict. values are parsed as JSON if they can be
+
+	raises `ValueError` for keys which may not be overridden, see `OVERRIDABLE_KEYS`
+	"""
+	flat: dict[str, Any] = dict()
+	for key, value in params.items():
+		if key in RESERVED_PARAMS:
+			continue
+		if not is_overridable(key):
+			raise ValueError(f"config key can't be overridden in a request: {key!r}")
+		try:
+			flat[key] = json.loads(value)
+		except json.JSONDecodeError:
+			flat[key] = value
+	return kwargs_to_nested_dict(flat, sep=".")
+
+
+def tree_fingerprint(root: str) -> str:
+	"hash of the path, size and modification time of every python file under `root`"
+	snapshot: dict[str, tuple[int, int]] = snapshot_files(root)
+	return hashlib.sha256(
+		json.dumps(sorted(snapshot.items())).encode("utf-8")
+	).hexdigest()
+
+
+def _unquote(value: Any) -> Any:
+	"strip the quotes DOT attributes like `URL` are stored with"
+	if isinstance(value, str) and len(value) >= 2 and value[0] == value[-1] == '"':
+		return value[1:-1]
+	return value
+
+
+def graph_to_json(G: nx.MultiDiGraph | CSRGraph) -> dict[str, list[dict[str, Any]]]:
+	"nodes and edges with their attributes, nodes named as in the DOT output"
+	return {
+		"nodes": [
+			{
+				"id": _unquote(str(node)),
+				"type": node_group(node),
+				**{k: _unquote(v) for k, v in attrs.items()},
+			}
+			for node, attrs in G.nodes(data=True)
+		],
+		"edges": [
+			{
+				"source": _unquote(str(u)),
+				"target": _unquote(str(v)),
+				"key": key,
+				**{k: _unquote(v) for k, v in attrs.items()},
+			}
+			for u, v, key, attrs in G.edges(keys=True, data=True)
+		],
+	}
+
+
+class GraphService:
+	"""builds, renders and caches graphs, independently of HTTP
+
+	# Parameters:
+	 - `max_entries : int`
+	    number of built graphs to keep, and of rendered outputs
+	   (defaults to `64`)
+	 - `allowed_root : str | None`
+	    if given, only roots inside this directory may be requested
+	   (defaults to `None`)
+	"""
+
+	def __init__(self, max_entries: int = 64, allowed_root: str | None = None) -> None:
+		self.graphs: LRUCache[str, nx.MultiDiGraph | CSRGraph] = LRUCache(max_entries)
+		self.outputs: LRUCache[tuple[str, str], bytes] = LRUCache(max_entries)
+		self.allowed_root: str | None = (
+			os.path.realpath(allowed_root) if allowed_root is not None else None
+		)
+		self._coalescer: Coalescer = Coalescer()
+		self.builds: int = 0
+
+	def resolve_root(
+		self, root: str | None, module: str | None, overrides: dict
+	) -> tuple[str, dict]:
+		"the directory to build and the overrides to build it with, checking that it may be served"
+		if (root is None) == (module is None):
+			raise ValueError("exactly one of `root` or `module` must be given")
+		if module is not None:
+			root = get_module_directory(module)
+			if "url_prefix" not in overrides:
+				overrides = {**overrides, "url_prefix": get_package_repository_url(module)}
+		assert root is not None
+		real_root: str = os.path.realpath(root)
+		if self.allowed_root is not None and os.path.commonpath(
+			[real_root, self.allowed_root]
+		) != self.allowed_root:
+			raise PermissionError(f"root is outside of the allowed directory: '{root}'")
+		if not os.path.isdir(real_root):
+			raise FileNotFoundError(f"root directory not found: '{root}'")
+		return real_root, overrides
+
+	def _graph(self, key: str, root: str, overrides: dict) -> nx.MultiDiGraph | CSRGraph:
+		G: nx.MultiDiGraph | CSRGraph | None = self.graphs.get(key)
+		if G is not None:
+			return G
+
+		def _build() -> nx.MultiDiGraph | CSRGraph:
+			config: dict = deepcopy(overrides)
+			update_with_nested_dict(config, deepcopy(SERVICE_CONFIG))
+			G_built: nx.MultiDiGraph | CSRGraph = build_graph_for(
+				root, config, import_cache=ImportCache(cache_dir=None)
+			)
+			self.builds += 1
+			self.graphs.put(key, G_built)
+			return G_built
+
+		return self._coalescer.run(("graph", key), _build)
+
+	def _render(self, G: nx.MultiDiGraph | CSRGraph, output_fmt: str) -> bytes:
+		if output_fmt == "json":
+			return json.dumps(graph_to_json(G)).encode("utf-8")
+		config: dict = G.graph["config"]
+		dot: str = dot_source(
+			G,
+			dot_attrs=config["dot_attrs"],
+			writer=config.get("dot_writer", "native"),
+			element_ids=output_fmt == "html",
+		)
+		if output_fmt == "dot":
+			return dot.encode("utf-8")
+		elif output_fmt == "html":
+			html_config: dict = config.get("html") or dict()
+			return render_html(
+				dot,
+				layout=html_config.get("layout", "browser"),
+				adjacency=adjacency_index(G),
+				compress=html_config.get("compress", False),
+			).encode("utf-8")
+		return render_dot_source(dot, output_fmt)
+
+	def render(
+		self,
+		root: str | None = None,
+		module: str | None = None,
+		output_fmt: str = "dot",
+		overrides: dict | None = None,
+	) -> tuple[bytes, bool]:
+		"the graph of `root` or `module` in `output_fmt`, and whether it came from the cache"
+		if output_fmt not in CONTENT_TYPES:
+			raise ValueError(
+				f"unknown format: {output_fmt!r}, expected one of {list(CONTENT_TYPES)}"
+			)
+		root, overrides = self.resolve_root(root, module, overrides or dict())
+		key: str = hashlib.sha256(
+			json.dumps(
+				[root, tree_fingerprint(root), overrides], sort_keys=True, default=str
+			).encode("utf-8")
+		).hexdigest()
+
+		cached: bytes | None = self.outputs.get((key, output_fmt))
+		if cached is not None:
+			return cached, True
+
+		def _render_and_store() -> bytes:
+			output: bytes | None = self.outputs.get((key, output_fmt))
+			if output is None:
+				output = self._render(self._graph(key, root, overrides), output_fmt)
+				self.outputs.put((key, output_fmt), output)
+			return output
+
+		return self._coalescer.run(("output", key, output_fmt), _render_and_store), False
+
+	def stats(self) -> dict[str, int]:
+		return dict(
+			builds=self.builds,
+			graphs_cached=len(self.graphs),
+			outputs_cached=len(self.outputs),
+			output_hits=self.outputs.hits,
+			output_misses=self.outputs.misses,
+			coalesced=self._coalescer.coalesced,
+		)
+
+
+class GraphRequestHandler(BaseHTTPRequestHandler):
+	"handles `/graph`, `/stats` and `/health` with the `GraphService` of the server"
+
+	server: "GraphServer"
+
+	def do_GET(self) -> None:
+		url = urlsplit(self.path)
+		params: dict[str, str] = {k: v[-1] for k, v in parse_qs(url.query).items()}
+		if url.path == "/graph":
+			self._graph(params)
+		elif url.path == "/stats":
+			self._send(
+				HTTPStatus.OK,
+				json.dumps(self.server.service.stats()).encode("utf-8"),
+				CONTENT_TYPES["json"],
+			)
+		elif url.path == "/health":
+			self._send(HTTPStatus.OK, b"ok", "text/plain; charset=utf-8")
+		else:
+			self._error(HTTPStatus.NOT_FOUND, f"unknown path: {url.path}")
+
+	def _graph(self, params: dict[str, str]) -> None:
+		output_fmt: str = params.get("format", "dot")
+		try:
+			body, cache_hit = self.server.service.render(
+				root=params.get("root"),
+				module=params.get("module"),
+				output_fmt=output_fmt,
+				overrides=parse_overrides(params),
+			)
+		except (ValueError, ImportError) as e:
+			self._error(HTTPStatus.BAD_REQUEST, str(e))
+		except PermissionError as e:
+			self._error(HTTPStatus.FORBIDDEN, str(e))
+		except FileNotFoundError as e:
+			self._error(HTTPStatus.NOT_FOUND, str(e))
+		except Exception as e:
+			self._error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}")
+		else:
+			self._send(
+				HTTPStatus.OK,
+				body,
+				CONTENT_TYPES[output_fmt],
+				{"X-Cache": "hit" if cache_hit else "miss"},
+			)
+
+	def _send(
+		self,
+		status: HTTPStatus,
+		body: bytes,
+		content_type: str,
+		headers: dict[str, str] | None = None,
+	) -> None:
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		for k, v in (headers or dict()).items():
+			self.send_header(k, v)
+		self.end_headers()
+		self.wfile.write(body)
+
+	def _error(self, status: HTTPStatus, message: str) -> None:
+		self._send(
+			status,
+			json.dumps({"error": message}).encode("utf-8"),
+			CONTENT_TYPES["json"],
+		)
+
+	def log_message(self, format: str, *args: Any) -> None:
+		if not self.server.quiet:
+			super().log_message(format, *args)
+
+
+class GraphServer(ThreadingHTTPServer):
+	"`ThreadingHTTPServer` holding a `GraphService`, each request is handled in its own thread"
+
+	daemon_threads = True
+
+	def __init__(
+		self,
+		address: tuple[str, int],
+		service: GraphService,
+		quiet: bool = False,
+	) -> None:
+		super().__init__(address, GraphRequestHandler)
+		self.service: GraphService = service
+		self.quiet: bool = quiet
+
+
+def serve_main(
+	host: str = "127.0.0.1",
+	port: int = 8765,
+	max_entries: int = 64,
+	allowed_root: str | None = None,
+	quiet: bool = False,
+) -> None:
+	"""run the graph service until interrupted, see `dep_graph_viz.serve`
+
+	# Arguments
+	- `host: str`
+	    address to listen on, only local connections by default
+	    default: `"127.0.0.1"`
+	- `port: int`
+	    default: `8765`
+	- `max_entries: int`
+	    number of built graphs and of rendered outputs to keep in memory
+	    default: `64`
+	- `allowed_root: str | None`
+	    only serve graphs of directories inside this one
+	- `quiet: bool`
+	    don't log each request
+	"""
+	server: GraphServer = GraphServer(
+		(host, port),
+		GraphService(max_entries=max_entries, allowed_root=allowed_root),
+		quiet=quiet,
+	)
+	print(f"# serving dependency graphs on http://{host}:{server.server_address[1]}/graph")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		print("# stopped serving")
+	finally:
+		server.server_close()
@@ -0,0 +1,268 @@
+"""persistent on-disk cache for the imports extracted from source files
+
+entries are content-addressed: the extracted import list is stored under the sha256 of the file contents.
+a second table maps absolute file paths to their last seen `(size, mtime_ns, sha256)`, so that unchanged
+files are looked up from a single `os.stat` call without being read. if the stat signature changed but the
+contents did not (a `touch`, a fresh checkout), the content hash is used as a fallback before re-parsing.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import warnings
+from typing import Any
+
+from dep_graph_viz.util.util import ImportRecord, ImportScanOptions, scan_imports
+
+IMPORT_CACHE_VERSION: int = 3
+"bump this whenever the format of the cache file or the output of the import scanners changes"
+
+IMPORT_CACHE_FILENAME: str = f"imports-v{IMPORT_CACHE_VERSION}.json"
+
+LAST_USED_RESOLUTION_S: float = 24 * 60 * 60
+"""a hit only marks the cache as changed if it moves the `last_used` of an entry by more than this, so warm
+runs where every file hits don't rewrite the whole cache. eviction only needs a rough order"""
+
+
+def default_cache_dir() -> str:
+	"user-level cache directory, respecting `XDG_CACHE_HOME`"
+	cache_home: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+		os.path.expanduser("~"), ".cache"
+	)
+	return os.path.join(cache_home, "dep_graph_viz")
+
+
+def hash_bytes(data: bytes) -> str:
+	"sha256 hex digest of some bytes"
+	return hashlib.sha256(data).hexdigest()
+
+
+class ImportCache:
+	"""cache of `scan_imports` results, keyed by file path + size + mtime with a content-hash fallback
+
+	# Parameters:
+	 - `cache_dir : str | None`
+	    directory to persist the cache in. if `None`, the cache is kept in memory only
+	    (still useful when building several graphs in one process)
+	 - `max_entries : int`
+	    maximum number of content entries to keep. least recently used entries are evicted on `save()`
+	   (defaults to `100_000`)
+	"""
+
+	def __init__(
+		self,
+		cache_dir: str | None = None,
+		max_entries: int = 100_000,
+	) -> None:
+		self.cache_dir: str | None = cache_dir
+		self.max_entries: int = max_entries
+		self.hits: int = 0
+		self.misses: int = 0
+		# files read from disk in this run, ie which missed the stat fast path
+		self.files_read: int = 0
+		self.bytes_read: int = 0
+		# absolute path -> [size, mtime_ns, sha256]
+		self._paths: dict[str, list] = dict()
+		# "{sha256}:{ImportScanOptions.key()}" -> {"imports": [[module, level, [names]], ...], "last_used": float}
+		self._entries: dict[str, dict[str, Any]] = dict()
+		self._dirty: bool = False
+		self._load()
+
+	@classmethod
+	def from_config(cls, config: dict) -> "ImportCache":
+		"create a cache from the `import_cache` section of the config"
+		cache_config: dict = config.get("import_cache") or dict()
+		cache_dir: str | None = None
+		if cache_config.get("enabled", False):
+			cache_dir = cache_config.get("dir") or default_cache_dir()
+		return cls(
+			cache_dir=cache_dir,
+			max_entries=cache_config.get("max_entries", 100_000),
+		)
+
+	@property
+	def cache_file(self) -> str | None:
+		if self.cache_dir is None:
+			return None
+		return os.path.join(self.cache_dir, IMPORT_CACHE_FILENAME)
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def _load(self) -> None:
+		"load the cache file if it exists. a corrupt or incompatible file is ignored with a warning"
+		cache_file: str | None = self.cache_file
+		if cache_file is None or not os.path.isfile(cache_file):
+			return
+
+		try:
+			with open(cache_file, "r", encoding="utf-8") as f:
+				data: dict = json.load(f)
+			if data.get("version") != IMPORT_CACHE_VERSION:
+				raise ValueError(f"cache version mismatch: {data.get('version') = }")
+			self._paths = data["paths"]
+			self._entries = data["entries"]
+		except (OSError, ValueError, KeyError, TypeError) as e:
+			warnings.warn(f"ignoring unreadable import cache at '{cache_file}': {e}")
+			self._paths = dict()
+			self._entries = dict()
+
+	@staticmethod
+	def _entry_key(digest: str, options: ImportScanOptions) -> str:
+		# the scanner and its options change the output, so key on them
+		return f"{digest}:{options.key()}"
+
+	def _hit(self, entry: dict[str, Any]) -> list[ImportRecord]:
+		self.hits += 1
+		now: float = time.time()
+		if now - entry["last_used"] > LAST_USED_RESOLUTION_S:
+			self._dirty = True
+		entry["last_used"] = now
+		return [
+			ImportRecord(module, level, tuple(names))
+			for module, level, names in entry["imports"]
+		]
+
+	def lookup_stat(
+		self,
+		path: str,
+		options: ImportScanOptions = ImportScanOptions(),
+	) -> tuple[os.stat_result, list[ImportRecord] | None]:
+		"""fast path: stat the file and return cached imports if its size and mtime are unchanged
+
+		returns the stat result and the imports, or `None` if the file needs to be read
+		"""
+		abs_path: str = os.path.abspath(path)
+		stat: os.stat_result = os.stat(abs_path)
+		indexed: list | None = self._paths.get(abs_path)
+		if indexed is not None and indexed[:2] == [stat.st_size, stat.st_mtime_ns]:
+			entry: dict | None = self._entries.get(
+				self._entry_key(indexed[2], options)
+			)
+			if entry is not None:
+				return stat, self._hit(entry)
+		return stat, None
+
+	def lookup_digest(
+		self,
+		path: str,
+		stat: os.stat_result,
+		digest: str,
+		options: ImportScanOptions = ImportScanOptions(),
+	) -> list[ImportRecord] | None:
+		"record the content hash of a file that was read, and return cached imports for that content if present"
+		self.files_read += 1
+		self.bytes_read += stat.st_size
+		self._paths[os.path.abspath(path)] = [stat.st_size, stat.st_mtime_ns, digest]
+		self._dirty = True
+		entry: dict | None = self._entries.get(
+			self._entry_key(digest, options)
+		)
+		if entry is not None:
+			return self._hit(entry)
+		return None
+
+	def store(
+		self,
+		digest: str,
+		imports: list[ImportRecord],
+		options: ImportScanOptions = ImportScanOptions(),
+	) -> None:
+		"store freshly parsed imports for some content hash, counting a miss"
+		self.misses += 1
+		self._entries[self._entry_key(digest, options)] = {
+			"imports": [
+				[record.module, record.level, list(record.names)] for record in imports
+			],
+			"last_used": time.time(),
+		}
+		self._dirty = True
+
+	def known_digests(self, options: ImportScanOptions = ImportScanOptions()) -> set[str]:
+		"content hashes which already have an entry, for workers to skip parsing them"
+		suffix: str = self._entry_key("", options)
+		return {key.removesuffix(suffix) for key in self._entries if key.endswith(suffix)}
+
+	def get_imports(
+		self,
+		path: str,
+		options: ImportScanOptions = ImportScanOptions(),
+	) -> list[ImportRecord]:
+		"""get the imports of the file at `path`, from the cache if possible
+
+		raises the same errors as reading the file and calling `scan_imports` on it would.
+		results of files which fail to parse are not cached
+		"""
+		stat, imports = self.lookup_stat(path, options)
+		if imports is not None:
+			return imports
+
+		# slow path: read the file, fall back to the content hash
+		with open(os.path.abspath(path), "rb") as f:
+			data: bytes = f.read()
+		digest: str = hash_bytes(data)
+		imports = self.lookup_digest(path, stat, digest, options)
+		if imports is not None:
+			return imports
+
+		# miss: actually parse the file
+		imports = scan_imports(data.decode("utf-8"), options)
+		self.store(digest, imports, options)
+		return imports
+
+	def evict(self) -> int:
+		"evict least recently used entries until at most `max_entries` remain, returns the number evicted"
+		n_evict: int = len(self._entries) - self.max_entries
+		if n_evict <= 0:
+			return 0
+
+		by_age: list[str] = sorted(
+			self._entries, key=lambda k: self._entries[k]["last_used"]
+		)
+		for key in by_age[:n_evict]:
+			del self._entries[key]
+
+		# drop path records which no longer point at any entry
+		live_digests: set[str] = {key.split(":")[0] for key in self._entries}
+		self._paths = {
+			path: record
+			for path, record in self._paths.items()
+			if record[2] in live_digests
+		}
+		self._dirty = True
+		return n_evict
+
+	def save(self) -> None:
+		"evict old entries and atomically write the cache to disk, if it has a directory and changed"
+		self.evict()
+		cache_file: str | None = self.cache_file
+		if cache_file is None or not self._dirty:
+			return
+		cache_dir: str = os.path.dirname(cache_file)
+
+		os.makedirs(cache_dir, exist_ok=True)
+		# write to a temp file in the same directory, then atomically replace
+		fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+		try:
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(
+					dict(
+						version=IMPORT_CACHE_VERSION,
+						paths=self._paths,
+						entries=self._entries,
+					),
+					f,
+				)
+			os.replace(tmp_path, cache_file)
+		except BaseException:
+			if os.path.exists(tmp_path):
+				os.remove(tmp_path)
+			raise
+		self._dirty = False
+
+	def summary(self) -> str:
+		"one-line summary of hits and misses in this run"
+		location: str = self.cache_file or "in memory"
+		return f"import cache: {self.hits} hits, {self.misses} misses ({location})"
@@ -0,0 +1,128 @@
+"""single-pass, in-memory snapshot of the python files and directories under a root
+
+`FileSystemIndex.build` walks the tree once with `os.scandir`, recording for every directory whether it has
+an `__init__.py` and which `.py` files it contains. `get_python_files`, `get_relevant_directories`,
+`classify_node` and `build_graph` query the index instead of globbing or stat-ing the disk again.
+
+the walk mirrors `glob("**/*.py", recursive=True)`: hidden (dot-prefixed) files and directories are
+skipped, and symlinked directories are followed (each real directory is visited at most once).
+"""
+
+import os
+import warnings
+from dataclasses import dataclass, field
+
+
+@dataclass
+class DirectoryEntry:
+	"python-relevant contents of a single directory"
+
+	has_init: bool = False
+	py_files: list[str] = field(default_factory=list)
+	subdirs: list[str] = field(default_factory=list)
+
+
+def _join(rel_dir: str, name: str) -> str:
+	"join a root-relative posix directory and a name, with the root being `.`"
+	return name if rel_dir == "." else f"{rel_dir}/{name}"
+
+
+class FileSystemIndex:
+	"""in-memory index of the directories and python files under `root`
+
+	all paths are posix paths relative to `root`, with the root itself being `"."`
+	"""
+
+	def __init__(self, root: str, directories: dict[str, DirectoryEntry]) -> None:
+		self.root: str = root
+		self.directories: dict[str, DirectoryEntry] = directories
+		self.files: set[str] = {
+			_join(rel_dir, name)
+			for rel_dir, entry in directories.items()
+			for name in entry.py_files
+		}
+
+	@classmethod
+	def build(cls, root: str = ".") -> "FileSystemIndex":
+		"walk `root` once and build the index"
+		if not os.path.exists(root):
+			raise FileNotFoundError(f"root directory not found: '{root}'")
+
+		directories: dict[str, DirectoryEntry] = dict()
+		visited: set[str] = set()
+		# stack of (absolute-ish path on disk, root-relative posix path)
+		stack: list[tuple[str, str]] = [(root, ".")]
+		while stack:
+			dir_path, rel_dir = stack.pop()
+
+			# guard against symlink loops
+			real_path: str = os.path.realpath(dir_path)
+			if real_path in visited:
+				continue
+			visited.add(real_path)
+
+			entry: DirectoryEntry = DirectoryEntry()
+			try:
+				with os.scandir(dir_path) as it:
+					dir_entries: list[os.DirEntry] = sorted(it, key=lambda e: e.name)
+			except OSError as e:
+				# errors on the root are fatal, below it they are skipped like `glob` does
+				if rel_dir == ".":
+					raise
+				warnings.warn(f"could not read directory '{dir_path}', skipping it: {e}")
+				continue
+
+			for dir_entry in dir_entries:
+				name: str = dir_entry.name
+				if name.startswith("."):
+					continue
+				try:
+					if dir_entry.is_dir():
+						entry.subdirs.append(name)
+					elif name.endswith(".py") and dir_entry.is_file():
+						entry.py_files.append(name)
+						if name == "__init__.py":
+							entry.has_init = True
+				except OSError:
+					# broken symlinks and the like
+					continue
+
+			directories[rel_dir] = entry
+			for name in reversed(entry.subdirs):
+				stack.append((os.path.join(dir_path, name), _join(rel_dir, name)))
+
+		return cls(root=root, directories=directories)
+
+	def python_files(self) -> list[str]:
+		"all python files, relative to the root"
+		return [
+			_join(rel_dir, name)
+			for rel_dir, entry in self.directories.items()
+			for name in entry.py_files
+		]
+
+	def relevant_directories(self) -> set[str]:
+		"directories with python files in them, their ancestors, and the root"
+		output: set[str] = {"."}
+		for rel_dir, entry in self.directories.items():
+			if not entry.py_files:
+				continue
+			# add the directory and every ancestor up to the root
+			while rel_dir not in output:
+				output.add(rel_dir)
+				rel_dir = os.path.dirname(rel_dir) or "."
+		return output
+
+	def is_dir(self, rel_path: str) -> bool:
+		return rel_path in self.directories
+
+	def is_file(self, rel_path: str) -> bool:
+		return rel_path in self.files
+
+	def exists(self, rel_path: str) -> bool:
+		return rel_path in self.directories or rel_path in self.files
+
+	def has_init(self, rel_dir: str) -> bool:
+		"whether the directory `rel_dir` contains an `__init__.py`"
+		entry: DirectoryEntry | None = self.directories.get(rel_dir)
+		return entry is not None and entry.has_init
@@ -0,0 +1,218 @@
+"""remote url and branch of a git repository, read from its files instead of running `git`
+
+`.git` may be a directory, or a file holding `gitdir: <path>` (submodules and linked worktrees). a linked
+worktree has its own `HEAD` but shares the `config` of the main repository, found through its `commondir`
+file. `HEAD` is either `ref: refs/heads/<branch>` or, when detached, a commit hash which is used in place of
+the branch name. anything this doesn't understand (no `origin` remote in the config itself, `include`
+directives, a missing `.git`) falls back to running `git`.
+
+results are cached per git directory for the life of the process, and revalidated by the mtimes of `HEAD`
+and `config`, so batch runs over many packages in one repository read them once.
+"""
+
+import os
+import re
+import subprocess
+import threading
+from typing import NamedTuple
+
+from dep_graph_viz.util.paths import find_git_root
+
+_SECTION_REGEX: re.Pattern = re.compile(
+	r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]'
+)
+
+
+class GitInfo(NamedTuple):
+	"remote url of `origin` and the current branch, or commit hash if `HEAD` is detached"
+
+	remote_url: str
+	branch: str
+
+
+def resolve_git_dirs(work_tree: str) -> tuple[str, str] | None:
+	"the git dir of a work tree, and the common dir holding its config. they differ for linked worktrees"
+	dot_git: str = os.path.join(work_tree, ".git")
+	if os.path.isdir(dot_git):
+		git_dir: str = dot_git
+	elif os.path.isfile(dot_git):
+		with open(dot_git, "r", encoding="utf-8") as f:
+			content: str = f.read().strip()
+		if not content.startswith("gitdir:"):
+			return None
+		git_dir = os.path.normpath(
+			os.path.join(work_tree, content.removeprefix("gitdir:").strip())
+		)
+		if not os.path.isdir(git_dir):
+			return None
+	else:
+		return None
+
+	common_dir: str = git_dir
+	commondir_file: str = os.path.join(git_dir, "commondir")
+	if os.path.isfile(commondir_file):
+		with open(commondir_file, "r", encoding="utf-8") as f:
+			common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+	return git_dir, common_dir
+
+
+def _config_value(raw: str) -> str:
+	"strip comments and quotes from a git config value"
+	value: list[str] = []
+	in_quotes: bool = False
+	chars = iter(raw.strip())
+	for c in chars:
+		if c == "\\":
+			value.append(next(chars, ""))
+		elif c == '"':
+			in_quotes = not in_quotes
+		elif c in "#;" and not in_quotes:
+			break
+		else:
+			value.append(c)
+	return "".join(value).strip()
+
+
+def parse_git_config(text: str) -> dict[str, dict[str, list[str]]]:
+	"""sections of a git config file, keyed like `remote.origin`, mapping lowercased keys to all their values
+
+	section and key names are case-insensitive in git, subsection names are not
+	"""
+	sections: dict[str, dict[str, list[str]]] = dict()
+	current: dict[str, list[str]] | None = None
+	for line in text.splitlines():
+		line = line.strip()
+		if not line or line[0] in "#;":
+			continue
+		match: re.Match | None = _SECTION_REGEX.match(line)
+		if match is not None:
+			name: str = match.group(1).lower()
+			if match.group(2) is not None:
+				name = f"{name}.{match.group(2)}"
+			current = sections.setdefault(name, dict())
+			line = line[match.end() :].strip()
+			if not line:
+				continue
+		if current is None:
+			continue
+		key, sep, raw_value = line.partition("=")
+		# a key without a value is a boolean `true`
+		current.setdefault(key.strip().lower(), []).append(
+			_config_value(raw_value) if sep else "true"
+		)
+	return sections
+
+
+def rewrite_url(url: str, config: dict[str, dict[str, list[str]]]) -> str:
+	"apply `url.<base>.insteadOf` rewrites, as `git remote get-url` does. the longest matching prefix wins"
+	best: tuple[str, str] | None = None
+	for section, values in config.items():
+		if not section.startswith("url."):
+			continue
+		for prefix in values.get("insteadof", []):
+			if url.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+				best = (prefix, section.removeprefix("url."))
+	if best is None:
+		return url
+	return best[1] + url[len(best[0]) :]
+
+
+def read_head(git_dir: str) -> str | None:
+	"the branch `HEAD` points to, or the commit hash if it is detached"
+	try:
+		with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+			head: str = f.read().strip()
+	except OSError:
+		return None
+	if head.startswith("ref:"):
+		return head.removeprefix("ref:").strip().removeprefix("refs/heads/")
+	if re.fullmatch(r"[0-9a-f]{40}|[0-9a-f]{64}", head):
+		return head
+	return None
+
+
+def read_git_info(work_tree: str, remote: str = "origin") -> GitInfo | None:
+	"read the remote url and branch from the files of the repository at `work_tree`, `None` if that fails"
+	dirs: tuple[str, str] | None = resolve_git_dirs(work_tree)
+	if dirs is None:
+		return None
+	git_dir, common_dir = dirs
+	try:
+		with open(os.path.join(common_dir, "config"), "r", encoding="utf-8") as f:
+			config: dict[str, dict[str, list[str]]] = parse_git_config(f.read())
+	except OSError:
+		return None
+	if "include" in config or "includeif" in {s.split(".")[0] for s in config}:
+		# the remote might be defined in another file
+		return None
+	urls: list[str] = config.get(f"remote.{remote}", dict()).get("url", [])
+	branch: str | None = read_head(git_dir)
+	if not urls or branch is None:
+		return None
+	return GitInfo(remote_url=rewrite_url(urls[0], config), branch=branch)
+
+
+def _git_info_subprocess(root: str) -> GitInfo:
+	"fallback: ask `git`, raising `CalledProcessError` or `FileNotFoundError` if that fails"
+	remote_url: str = subprocess.check_output(
+		["git", "remote", "get-url", "origin"],
+		cwd=root,
+		encoding="utf-8",
+	)
+	branch: str = subprocess.check_output(
+		["git", "rev-parse", "--abbrev-ref", "HEAD"],
+		cwd=root,
+		encoding="utf-8",
+	)
+	return GitInfo(remote_url=remote_url.strip(), branch=branch.strip())
+
+
+_GIT_INFO_CACHE: dict[tuple, GitInfo] = dict()
+_GIT_INFO_LOCK: threading.Lock = threading.Lock()
+
+
+def _mtime_ns(path: str) -> int | None:
+	try:
+		return os.stat(path).st_mtime_ns
+	except OSError:
+		return None
+
+
+def get_git_info(root: str) -> GitInfo:
+	"""remote url and branch of the repository containing `root`, from its files or by running `git`
+
+	raises `subprocess.CalledProcessError` or `FileNotFoundError` if neither works
+	"""
+	work_tree: str | None = find_git_root(root)
+	dirs: tuple[str, str] | None = (
+		resolve_git_dirs(work_tree) if work_tree is not None else None
+	)
+	key: tuple
+	if dirs is not None:
+		git_dir, common_dir = dirs
+		key = (
+			git_dir,
+			_mtime_ns(os.path.join(git_dir, "HEAD")),
+			_mtime_ns(os.path.join(common_dir, "config")),
+		)
+	else:
+		key = ("subprocess", os.path.abspath(root))
+
+	with _GIT_INFO_LOCK:
+		cached: GitInfo | None = _GIT_INFO_CACHE.get(key)
+	if cached is not None:
+		return cached
+
+	info: GitInfo | None = (
+		read_git_info(work_tree) if work_tree is not None and dirs is not None else None
+	)
+	if info is None:
+		info = _git_info_subprocess(root)
+	with _GIT_INFO_LOCK:
+		_GIT_INFO_CACHE[key] = info
+	return info
+
+
+def clear_git_info_cache() -> None:
+	with _GIT_INFO_LOCK:
+		_GIT_INFO_CACHE.clear()
@@ -0,0 +1,214 @@
+"""trie over dotted module names, resolving imports to the longest known module prefix
+
+every importable node is added under its absolute module name, split into parts. resolving an import walks
+the trie once along the imported name, so the cost is proportional to the length of the name and not the
+number of modules:
+
+- `import a.b.c` resolves to `a.b.c`, or the longest prefix of it that is a known module
+- `from a.b import c` resolves to the submodule `a.b.c` if there is one, and to `a.b` otherwise
+- `from ..x import y` is made absolute from the importing module's package first
+"""
+
+from typing import Generic, Iterable, NamedTuple, TypeVar
+
+from dep_graph_viz.util.util import ImportRecord
+
+T = TypeVar("T")
+
+ModuleParts = tuple[str, ...]
+
+
+class _TrieNode(Generic[T]):
+	__slots__ = ("children", "value", "has_value")
+
+	def __init__(self) -> None:
+		self.children: dict[str, _TrieNode[T]] = dict()
+		self.value: T | None = None
+		self.has_value: bool = False
+
+
+class ResolvedImport(NamedTuple, Generic[T]):
+	"""result of resolving one `ImportRecord`
+
+	- `targets` are the known modules it refers to, without duplicates
+	- `external` is the module name, if it is not part of the index at all
+	- `error` describes why a relative import could not be made absolute
+	"""
+
+	targets: list[T]
+	external: str | None = None
+	error: str | None = None
+
+
+def split_module_name(name: str) -> ModuleParts:
+	"`'a.b.c'` to `('a', 'b', 'c')`, and `''` to `()`"
+	return tuple(name.split(".")) if name else ()
+
+
+class ModuleIndex(Generic[T]):
+	"""maps absolute module names to values, with longest-prefix lookups and import resolution
+
+	# Parameters:
+	 - `prefix : ModuleParts`
+	    parts which every absolute module name in the tree starts with -- the package name if the root
+	    directory is itself a package, empty otherwise. imports which leave it off are also tried with it,
+	    as the graph has always matched `pkg.a` and `a` to the same module
+	   (defaults to `()`)
+	"""
+
+	def __init__(self, prefix: ModuleParts = ()) -> None:
+		self.prefix: ModuleParts = prefix
+		self._root: _TrieNode[T] = _TrieNode()
+		self._len: int = 0
+
+	def __len__(self) -> int:
+		return self._len
+
+	def __contains__(self, parts: ModuleParts) -> bool:
+		node: _TrieNode[T] | None = self._find(parts)
+		return node is not None and node.has_value
+
+	def _find(self, parts: ModuleParts) -> "_TrieNode[T] | None":
+		node: _TrieNode[T] = self._root
+		for part in parts:
+			child: _TrieNode[T] | None = node.children.get(part)
+			if child is None:
+				return None
+			node = child
+		return node
+
+	def add(self, parts: ModuleParts, value: T) -> None:
+		"add `value` under the absolute module name `parts`, replacing any existing value"
+		node: _TrieNode[T] = self._root
+		for part in parts:
+			child: _TrieNode[T] | None = node.children.get(part)
+			if child is None:
+				child = _TrieNode()
+				node.children[part] = child
+			node = child
+		if not node.has_value:
+			self._len += 1
+		node.value = value
+		node.has_value = True
+
+	def remove(self, parts: ModuleParts) -> None:
+		"remove the value under `parts`, if any. empty branches are left in place"
+		node: _TrieNode[T] | None = self._find(parts)
+		if node is not None and node.has_value:
+			node.value = None
+			node.has_value = False
+			self._len -= 1
+
+	def get(self, parts: ModuleParts) -> T | None:
+		"value for exactly `parts`, or `None`"
+		node: _TrieNode[T] | None = self._find(parts)
+		return node.value if node is not None and node.has_value else None
+
+	def longest_prefix(
+		self, parts: ModuleParts, min_parts: int = 1
+	) -> tuple[T, int] | None:
+		"value of the longest prefix of `parts` with at least `min_parts` parts which is a module, and its length"
+		best: tuple[T, int] | None = None
+		node: _TrieNode[T] = self._root
+		if node.has_value and min_parts <= 0:
+			best = (node.value, 0)  # type: ignore[assignment]
+		for i, part in enumerate(parts):
+			child: _TrieNode[T] | None = node.children.get(part)
+			if child is None:
+				break
+			node = child
+			if node.has_value and i + 1 >= min_parts:
+				best = (node.value, i + 1)  # type: ignore[assignment]
+		return best
+
+	def absolute_base(
+		self,
+		record: ImportRecord,
+		importer: ModuleParts,
+		importer_is_package: bool,
+	) -> ModuleParts:
+		"""absolute module name of the module part of `record`, as imported from the module `importer`
+
+		raises `ValueError` for relative imports beyond the top-level package
+		"""
+		module: ModuleParts = split_module_name(record.module)
+		if not record.level:
+			return module
+		# the package a relative import is relative to: the module itself for an `__init__.py`
+		package: ModuleParts = importer if importer_is_package else importer[:-1]
+		n_keep: int = len(package) - (record.level - 1)
+		if n_keep < 1:
+			raise ValueError(
+				f"relative import beyond the top-level package: {'.' * record.level}{record.module} from {'.'.join(importer) or '<root>'}"
+			)
+		return package[:n_keep] + module
+
+	def _lookup(
+		self, base: ModuleParts, names: tuple[str, ...], min_parts: int = 1
+	) -> list[T]:
+		"submodules among `names`, plus the longest known prefix of `base` if anything else was imported"
+		targets: list[T] = []
+		base_node: _TrieNode[T] | None = self._find(base)
+		need_base: bool = not names
+		for name in names:
+			child: _TrieNode[T] | None = (
+				base_node.children.get(name) if base_node is not None else None
+			)
+			if name != "*" and child is not None and child.has_value:
+				targets.append(child.value)  # type: ignore[arg-type]
+			else:
+				need_base = True
+		if need_base:
+			found: tuple[T, int] | None = self.longest_prefix(base, min_parts=min_parts)
+			if found is not None:
+				targets.append(found[0])
+		return targets
+
+	def resolve(
+		self,
+		record: ImportRecord,
+		importer: ModuleParts,
+		importer_is_package: bool = False,
+	) -> ResolvedImport[T]:
+		"""resolve an import to the modules it refers to
+
+		# Parameters:
+		 - `record : ImportRecord`
+		    the import, as written in the source
+		 - `importer : ModuleParts`
+		    absolute module name of the importing module
+		 - `importer_is_package : bool`
+		    whether the importing module is an `__init__.py`, which relative imports are relative to
+		   (defaults to `False`)
+		"""
+		try:
+			base: ModuleParts = self.absolute_base(record, importer, importer_is_package)
+		except ValueError as e:
+			return ResolvedImport(targets=[], error=str(e))
+
+		targets: list[T] = self._lookup(base, record.names)
+		if (
+			not targets
+			and not record.level
+			and self.prefix
+			and base[: len(self.prefix)] != self.prefix
+		):
+			# `import a.b` for `pkg.a.b`, but never the package root on its own
+			targets = self._lookup(
+				self.prefix + base, record.names, min_parts=len(self.prefix) + 1
+			)
+
+		if not targets:
+			return ResolvedImport(targets=[], external=record.module if not record.level else None)
+		return ResolvedImport(targets=list(dict.fromkeys(targets)))
+
+
+def build_module_index(
+	items: Iterable[tuple[ModuleParts, T]],
+	prefix: ModuleParts = (),
+) -> ModuleIndex[T]:
+	"index `(absolute module name, value)` pairs"
+	index: ModuleIndex[T] = ModuleIndex(prefix=prefix)
+	for parts, value in items:
+		index.add(parts, value)
+	return index
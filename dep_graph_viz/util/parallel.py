@@ -0,0 +1,163 @@
+"""reading files and extracting their imports in a process pool
+
+only files which miss the stat fast path of the `ImportCache` are sent to the pool. workers read, hash and
+parse each file, and skip parsing for content hashes the cache already knows. results come back in input
+order, so the graph does not depend on the number of workers.
+"""
+
+import os
+from concurrent.futures import Executor
+
+from dep_graph_viz.util.cache import ImportCache, hash_bytes
+from dep_graph_viz.util.util import ImportRecord, ImportScanOptions, scan_imports
+
+MIN_FILES_PER_WORKER: int = 32
+"below this many files per worker, spinning up processes costs more than it saves"
+
+# set in each worker by `_init_worker`
+_KNOWN_DIGESTS: frozenset[str] = frozenset()
+
+
+def resolve_workers(workers: int | None) -> int:
+	"number of workers to use, `None` or `0` meaning the CPU count"
+	if not workers:
+		return os.cpu_count() or 1
+	return max(1, int(workers))
+
+
+def _init_worker(known_digests: frozenset[str]) -> None:
+	global _KNOWN_DIGESTS
+	_KNOWN_DIGESTS = known_digests
+
+
+def _read_imports_worker(
+	args: tuple[str, ImportScanOptions],
+) -> tuple[str | None, list[ImportRecord] | None, BaseException | None]:
+	"""read, hash and parse a single file, returning `(digest, imports, error)`
+
+	`imports` is `None` if the content hash is already known to the cache. errors are returned rather than
+	raised, so that one bad file doesn't abort the whole chunk and the caller can decide how to handle it
+	"""
+	path, options = args
+	try:
+		with open(path, "rb") as f:
+			data: bytes = f.read()
+		digest: str = hash_bytes(data)
+		if digest in _KNOWN_DIGESTS:
+			return digest, None, None
+		return digest, scan_imports(data.decode("utf-8"), options), None
+	except Exception as e:
+		return None, None, e
+
+
+def get_imports_many(
+	paths: list[str],
+	import_cache: ImportCache,
+	options: ImportScanOptions = ImportScanOptions(),
+	workers: int | None = None,
+	executor: Executor | None = None,
+) -> list[list[ImportRecord] | BaseException]:
+	"""get the imports of many files, in parallel where worthwhile
+
+	# Parameters:
+	 - `paths : list[str]`
+	    files to read
+	 - `import_cache : ImportCache`
+	    cache to look up and store results in. only accessed from the calling process
+	 - `options : ImportScanOptions`
+	    which scanner to use and whether to stop after the import header, passed to `scan_imports`
+	   (defaults to `ImportScanOptions()`)
+	 - `workers : int | None`
+	    number of worker processes. `None` or `0` means the CPU count, `1` means no pool
+	   (defaults to `None`)
+	 - `executor : Executor | None`
+	    an existing pool to submit to instead of creating one. if given, always used for cache misses
+	   (defaults to `None`)
+
+	# Returns:
+	 - `list[list[ImportRecord] | BaseException]`
+	    for each path, in order, either its imports or the exception raised while reading or parsing it
+	"""
+	n_workers: int = resolve_workers(workers)
+	results: list[list[ImportRecord] | BaseException | None] = [None] * len(paths)
+
+	# stat fast path in this process
+	pending: list[tuple[int, os.stat_result]] = []
+	for i, path in enumerate(paths):
+		try:
+			stat, imports = import_cache.lookup_stat(path, options)
+		except OSError as e:
+			results[i] = e
+			continue
+		if imports is not None:
+			results[i] = imports
+		else:
+			pending.append((i, stat))
+
+	n_workers = min(n_workers, len(pending) // MIN_FILES_PER_WORKER)
+	if executor is None and n_workers <= 1:
+		# not worth a pool, do it serially
+		for i, _ in pending:
+			try:
+				results[i] = import_cache.get_imports(paths[i], options)
+			except Exception as e:
+				results[i] = e
+		return _filled(results)
+
+	tasks: list[tuple[str, ImportScanOptions]] = [
+		(os.path.abspath(paths[i]), options) for i, _ in pending
+	]
+	known: frozenset[str] = frozenset(import_cache.known_digests(options))
+
+	def _collect(outcomes) -> None:
+		for (i, stat), (digest, imports, error) in zip(pending, outcomes):
+			if error is not None:
+				results[i] = error
+				continue
+			cached: list[ImportRecord] | None = import_cache.lookup_digest(
+				paths[i], stat, digest, options
+			)
+			if cached is not None:
+				results[i] = cached
+			elif imports is None:
+				# the worker skipped a digest which has since been evicted -- parse it here
+				try:
+					results[i] = import_cache.get_imports(paths[i], options)
+				except Exception as e:
+					results[i] = e
+			else:
+				import_cache.store(digest, imports, options)
+				results[i] = imports
+
+	if executor is not None:
+		# a shared pool has no initializer, so the workers can't skip known digests
+		_collect(executor.map(_read_imports_worker, tasks, chunksize=_chunksize(len(tasks), n_workers)))
+	else:
+		# imported here since it pulls in `multiprocessing`, which single-worker runs never need
+		from concurrent.futures import ProcessPoolExecutor
+
+		with ProcessPoolExecutor(
+			max_workers=n_workers,
+			initializer=_init_worker,
+			initargs=(known,),
+		) as pool:
+			_collect(pool.map(_read_imports_worker, tasks, chunksize=_chunksize(len(tasks), n_workers)))
+
+	return _filled(results)
+
+
+def _filled(
+	results: list[list[ImportRecord] | BaseException | None],
+) -> list[list[ImportRecord] | BaseException]:
+	"`results` once every slot has been set, so they still line up with the paths"
+	filled: list[list[ImportRecord] | BaseException] = []
+	for i, result in enumerate(results):
+		if result is None:
+			raise RuntimeError(f"no result for file {i} of {len(results)}")
+		filled.append(result)
+	return filled
+
+
+def _chunksize(n_tasks: int, n_workers: int) -> int:
+	"a few chunks per worker, to balance load without too much IPC"
+	return max(1, n_tasks // (max(1, n_workers) * 4))
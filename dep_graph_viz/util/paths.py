@@ -1,8 +1,10 @@
 import importlib
+import importlib.machinery
+import importlib.util
 import os
+import pkgutil
 import re
 import warnings
-import importlib.metadata
 import json
 
 MODULE_NAME_REGEX: re.Pattern = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
@@ -96,69 +98,165 @@ def path_to_module(path: str, strict_names: bool = True) -> str:
 
 
 
+def _find_submodule_spec(
+	fullname: str, search_locations: list[str]
+) -> importlib.machinery.ModuleSpec | None:
+	"""find a submodule in the search locations of its parent, as `PathFinder` would but without
+	needing the parent in `sys.modules`. portions of a namespace package are merged into one spec"""
+	namespace_portions: list[str] = []
+	for location in search_locations:
+		finder = pkgutil.get_importer(location)
+		if finder is None:
+			continue
+		spec: importlib.machinery.ModuleSpec | None = finder.find_spec(fullname)
+		if spec is None:
+			continue
+		if spec.loader is not None:
+			return spec
+		namespace_portions.extend(spec.submodule_search_locations or [])
+	if namespace_portions:
+		spec = importlib.machinery.ModuleSpec(fullname, None, is_package=True)
+		spec.submodule_search_locations = namespace_portions
+		return spec
+	return None
+
+
+def find_module_spec(module_name: str) -> importlib.machinery.ModuleSpec:
+	"""Find the spec of a module without executing any of its code, or that of its parents.
+
+	`importlib.util.find_spec` imports the parent packages of a dotted name, so only the
+	top level package is looked up that way and submodules are searched for in the
+	`submodule_search_locations` of their parent.
+
+	Raises:
+		ValueError: If `module_name` is not a valid dotted module name
+		ModuleNotFoundError: If the module cannot be found
+	"""
+	parts: list[str] = module_name.split(".")
+	if not all(MODULE_NAME_REGEX.match(part) for part in parts):
+		raise ValueError(f"invalid module name: {module_name!r}")
+
+	spec: importlib.machinery.ModuleSpec | None = importlib.util.find_spec(parts[0])
+	for i in range(1, len(parts)):
+		if spec is None or spec.submodule_search_locations is None:
+			# not a package, so it has no submodules
+			spec = None
+			break
+		spec = _find_submodule_spec(
+			".".join(parts[: i + 1]), list(spec.submodule_search_locations)
+		)
+	if spec is None:
+		raise ModuleNotFoundError(f"No module named {module_name!r}", name=module_name)
+	return spec
+
+
 def get_module_directory(module_name: str) -> str:
-    """Get the directory containing a module's source code.
-    
-    Args:
-        module_name: Name of module as you would use in an import statement
-        
-    Returns:
-        Absolute path to the directory containing the module
-        
-    Raises:
-        ImportError: If module cannot be imported
-        AttributeError: If module does not have a __file__ attribute
-    """
-    module = importlib.import_module(module_name)
-    
-    # Get the module's file path
-    if not hasattr(module, '__file__'):
-        raise AttributeError(f"Module {module_name} has no __file__ attribute")
-        
-    module_file = module.__file__
-    
-    # Get directory containing the module
-    module_dir = os.path.dirname(os.path.abspath(module_file))
-    
-    return module_dir
+	"""Get the directory containing a module's source code, without importing it.
+	
+	Args:
+		module_name: Name of module as you would use in an import statement
+		
+	Returns:
+		Absolute path to the directory containing the module.
+		For a namespace package, its first directory
+		
+	Raises:
+		ImportError: If module cannot be found
+		AttributeError: If module does not have a __file__ attribute (i.e. is built in)
+	"""
+	spec: importlib.machinery.ModuleSpec = find_module_spec(module_name)
+
+	if spec.has_location and spec.origin is not None:
+		module_file: str = spec.origin
+	elif getattr(spec.loader_state, "filename", None) is not None:
+		# frozen stdlib modules record their source file in the loader state
+		module_file = spec.loader_state.filename
+	elif spec.submodule_search_locations:
+		# namespace packages have no file, only directories
+		return os.path.abspath(list(spec.submodule_search_locations)[0])
+	else:
+		raise AttributeError(f"Module {module_name} has no __file__ attribute")
+
+	# Get directory containing the module
+	module_dir = os.path.dirname(os.path.abspath(module_file))
+	
+	return module_dir
+
+
+def distribution_name(module_name: str) -> str:
+	"name of the installed distribution providing a top level module, `module_name` itself if none is known"
+	import importlib.metadata
+
+	top_level: str = module_name.split(".")[0]
+	distributions: list[str] = importlib.metadata.packages_distributions().get(
+		top_level, []
+	)
+	return distributions[0] if distributions else top_level
 
 
 def get_package_repository_url(package_name: str) -> str|None:
-    """Get the repository URL for a Python package.
-    
-    Tries multiple methods:
-    1. package metadata "project_urls" under Repository/Source/Code keys
-    2. package metadata "home_page" 
-    3. package metadata "download_url"
-    
-    Args:
-        package_name: Name of the installed package
-        
-    Returns:
-        Repository URL if found, None otherwise
-    
-    Raises:
-        importlib.metadata.PackageNotFoundError: If package is not installed
-    """
-    metadata = importlib.metadata.metadata(package_name)
-    
-    # Check project_urls first
-    if "project_urls" in metadata:
-        try:
-            urls = json.loads(metadata["project_urls"])
-            repo_keys = ["Repository", "Source", "Code", "Source Code", "Homepage"]
-            for key in repo_keys:
-                if key in urls:
-                    return urls[key]
-        except:
-            pass
-    
-    # Try home_page
-    if "home-page" in metadata:
-        return metadata["home-page"]
-            
-    # Try download_url
-    if "download-url" in metadata:
-        return metadata["download-url"]
-    
-    return None
\ No newline at end of file
+	"""Get the repository URL for a Python package.
+	
+	The package is looked up by the distribution providing it, so module names
+	which differ from their distribution name (`yaml` from `PyYAML`) work too.
+	Tries multiple methods:
+	1. package metadata "project_urls" or "Project-URL" under Repository/Source/Code keys
+	2. package metadata "home_page" 
+	3. package metadata "download_url"
+	
+	Args:
+		package_name: Name of the installed package, or of a module it provides
+		
+	Returns:
+		Repository URL if found, None otherwise
+	
+	Raises:
+		importlib.metadata.PackageNotFoundError: If package is not installed
+	"""
+	import importlib.metadata
+
+	metadata = importlib.metadata.metadata(distribution_name(package_name))
+	repo_keys = ["Repository", "Source", "Code", "Source Code", "Homepage"]
+	
+	# Check project_urls first
+	if "project_urls" in metadata:
+		try:
+			urls = json.loads(metadata["project_urls"])
+			for key in repo_keys:
+				if key in urls:
+					return urls[key]
+		except:
+			pass
+
+	# core metadata stores them as "label, url" entries
+	if "Project-URL" in metadata:
+		urls = dict(
+			(label.strip(), url.strip())
+			for label, _, url in (
+				entry.partition(",") for entry in metadata.get_all("Project-URL") or []
+			)
+		)
+		for key in repo_keys:
+			if key in urls:
+				return urls[key]
+	
+	# Try home_page
+	if "home-page" in metadata:
+		return metadata["home-page"]
+			
+	# Try download_url
+	if "download-url" in metadata:
+		return metadata["download-url"]
+	
+	return None
+
+def find_git_root(path: str) -> str | None:
+	"absolute path of the git work tree containing `path`, found by looking for `.git` in it and its parents"
+	current: str = os.path.abspath(path)
+	while True:
+		if os.path.exists(os.path.join(current, ".git")):
+			return current
+		parent: str = os.path.dirname(current)
+		if parent == current:
+			return None
+		current = parent
@@ -0,0 +1,158 @@
+"""on-disk cache of rendered outputs, so that `dot` is not run again for DOT it has already laid out
+
+artifacts are content-addressed: the key is the sha256 of the graphviz version, the output format and the DOT
+text, and the artifact is stored as `{key[:2]}/{key}.{fmt}` in the cache directory. the files themselves are
+the index -- a hit bumps the artifact's mtime, and eviction removes the artifacts with the oldest mtime until
+the directory is within `max_bytes`. writes go through a temp file and `os.replace`, so concurrent runs
+sharing a cache directory never see partial artifacts.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import warnings
+
+from dep_graph_viz.util.cache import default_cache_dir, hash_bytes
+
+RENDER_CACHE_VERSION: int = 1
+"bump this whenever the layout of the cache directory changes"
+
+
+class RenderCache:
+	"""cache of rendered `dot` outputs, keyed by the hash of the DOT, the format and the graphviz version
+
+	# Parameters:
+	 - `cache_dir : str`
+	    directory to keep artifacts in
+	 - `graphviz_version : str`
+	    version string of the `dot` binary, part of every key since layouts differ between versions
+	 - `max_bytes : int`
+	    total size of artifacts to keep. least recently used ones are removed by `evict()`
+	   (defaults to `512 MiB`)
+	 - `hardlink : bool`
+	    hard-link cached artifacts to the output path instead of copying them, falling back to a copy
+	    across filesystems
+	   (defaults to `True`)
+	"""
+
+	def __init__(
+		self,
+		cache_dir: str,
+		graphviz_version: str,
+		max_bytes: int = 512 * 1024 * 1024,
+		hardlink: bool = True,
+	) -> None:
+		self.cache_dir: str = cache_dir
+		self.graphviz_version: str = graphviz_version
+		self.max_bytes: int = max_bytes
+		self.hardlink: bool = hardlink
+		self.hits: int = 0
+		self.misses: int = 0
+		# formats are rendered on several threads
+		self._lock: threading.Lock = threading.Lock()
+
+	@classmethod
+	def from_config(cls, config: dict) -> "RenderCache | None":
+		"create a cache from the `render_cache` section of the config, `None` if disabled or `dot` is missing"
+		cache_config: dict = config.get("render_cache") or dict()
+		if not cache_config.get("enabled", False):
+			return None
+		# imported here so that the cache module doesn't depend on the writer
+		from dep_graph_viz.dot import graphviz_version
+
+		version: str | None = graphviz_version()
+		if version is None:
+			return None
+		return cls(
+			cache_dir=cache_config.get("dir")
+			or os.path.join(default_cache_dir(), f"renders-v{RENDER_CACHE_VERSION}"),
+			graphviz_version=version,
+			max_bytes=cache_config.get("max_bytes", 512 * 1024 * 1024),
+			hardlink=cache_config.get("hardlink", True),
+		)
+
+	def key(self, dot_source: str, output_fmt: str) -> str:
+		"content hash identifying the output of rendering `dot_source` to `output_fmt`"
+		return hash_bytes(
+			f"{self.graphviz_version}\0{output_fmt}\0".encode("utf-8")
+			+ dot_source.encode("utf-8")
+		)
+
+	def artifact_path(self, key: str, output_fmt: str) -> str:
+		return os.path.join(self.cache_dir, key[:2], f"{key}.{output_fmt}")
+
+	def fetch(self, key: str, output_fmt: str, output_path: str) -> bool:
+		"put the cached artifact for `key` at `output_path`, returns whether there was one"
+		artifact: str = self.artifact_path(key, output_fmt)
+		if not os.path.isfile(artifact):
+			with self._lock:
+				self.misses += 1
+			return False
+
+		# never write through an existing file, which may be a link to another artifact
+		if os.path.lexists(output_path):
+			os.remove(output_path)
+		linked: bool = False
+		if self.hardlink:
+			try:
+				os.link(artifact, output_path)
+				linked = True
+			except OSError:
+				pass
+		if not linked:
+			shutil.copyfile(artifact, output_path)
+		# mark as recently used
+		os.utime(artifact)
+		with self._lock:
+			self.hits += 1
+		return True
+
+	def store(self, key: str, output_fmt: str, output_path: str) -> None:
+		"copy a freshly rendered `output_path` into the cache. failures only warn, the output is already written"
+		artifact: str = self.artifact_path(key, output_fmt)
+		try:
+			os.makedirs(os.path.dirname(artifact), exist_ok=True)
+			fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(artifact), suffix=".tmp")
+			os.close(fd)
+			try:
+				shutil.copyfile(output_path, tmp_path)
+				os.replace(tmp_path, artifact)
+			except BaseException:
+				if os.path.exists(tmp_path):
+					os.remove(tmp_path)
+				raise
+		except OSError as e:
+			warnings.warn(f"could not store render in cache at '{artifact}': {e}")
+
+	def evict(self) -> int:
+		"remove least recently used artifacts until at most `max_bytes` remain, returns the number removed"
+		artifacts: list[tuple[float, int, str]] = []
+		for dirpath, _, filenames in os.walk(self.cache_dir):
+			for filename in filenames:
+				if filename.endswith(".tmp"):
+					continue
+				path: str = os.path.join(dirpath, filename)
+				try:
+					stat: os.stat_result = os.stat(path)
+				except FileNotFoundError:
+					# removed by a concurrent run
+					continue
+				artifacts.append((stat.st_mtime, stat.st_size, path))
+
+		total: int = sum(size for _, size, _ in artifacts)
+		n_evicted: int = 0
+		for _, size, path in sorted(artifacts):
+			if total <= self.max_bytes:
+				break
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+			total -= size
+			n_evicted += 1
+		return n_evicted
+
+	def summary(self) -> str:
+		"one-line summary of hits and misses in this run"
+		return f"render cache: {self.hits} hits, {self.misses} misses ({self.cache_dir})"
@@ -1,11 +1,12 @@
 import ast
-import glob
-import os
-from pathlib import Path
+import io
+import keyword
+import tokenize
 import warnings
+from typing import Literal, NamedTuple
 
 
-from dep_graph_viz.util.paths import normalize_path
+from dep_graph_viz.util.fs_index import FileSystemIndex
 
 
 def pprint_ast_aliases(aliases: list[ast.alias]) -> str:
@@ -17,6 +18,37 @@ def pprint_ast_aliases(aliases: list[ast.alias]) -> str:
 
 	return f"[{x}]"
 
+class ImportRecord(NamedTuple):
+	"""a single imported module, as written in the source
+
+	- `import a.b` is `ImportRecord("a.b")`
+	- `from a.b import c, d` is `ImportRecord("a.b", 0, ("c", "d"))`
+	- `from ..a import c` is `ImportRecord("a", 2, ("c",))`, and `from . import c` is `ImportRecord("", 1, ("c",))`
+	"""
+
+	module: str
+	level: int = 0
+	names: tuple[str, ...] = ()
+
+
+def get_import_records(source_code: str) -> list[ImportRecord]:
+	"Get all the imports from a source code string, keeping relative import levels and imported names"
+	tree: ast.Module = ast.parse(source_code)
+	records: list[ImportRecord] = []
+	for node in ast.walk(tree):
+		if isinstance(node, ast.Import):
+			records.extend(ImportRecord(alias.name) for alias in node.names)
+		elif isinstance(node, ast.ImportFrom):
+			records.append(
+				ImportRecord(
+					module=node.module or "",
+					level=node.level,
+					names=tuple(alias.name for alias in node.names),
+				)
+			)
+	return records
+
+
 def get_imports(source_code: str, allow_missing_imports: bool = False) -> list[str]:
 	"Get all the imports from a source code string"
 	tree: ast.Module = ast.parse(source_code)
@@ -50,50 +82,247 @@ def get_imports(source_code: str, allow_missing_imports: bool = False) -> list[s
 
 	return imports
 
+
+class _AmbiguousImports(Exception):
+	"raised by the fast scanner when it can't be sure of its answer, to fall back to the ast"
+
+
+# tokens which never start or end a statement, and are skipped when reading one
+_SKIP_TOKENS: frozenset[int] = frozenset({tokenize.NL, tokenize.COMMENT})
+
+
+def _parse_dotted_name(tokens: list[tokenize.TokenInfo], i: int) -> tuple[str, int]:
+	"parse `NAME ('.' NAME)*` starting at `tokens[i]`, returning the name and the index after it"
+	parts: list[str] = []
+	while True:
+		if (
+			i >= len(tokens)
+			or tokens[i].type != tokenize.NAME
+			or keyword.iskeyword(tokens[i].string)
+		):
+			raise _AmbiguousImports(f"expected a name at {tokens[i:i+1]}")
+		parts.append(tokens[i].string)
+		i += 1
+		if i < len(tokens) and tokens[i].exact_type == tokenize.DOT:
+			i += 1
+		else:
+			return ".".join(parts), i
+
+
+def _skip_alias(tokens: list[tokenize.TokenInfo], i: int) -> int:
+	"skip an optional `as NAME`"
+	if i < len(tokens) and tokens[i].string == "as":
+		if (
+			i + 1 >= len(tokens)
+			or tokens[i + 1].type != tokenize.NAME
+			or keyword.iskeyword(tokens[i + 1].string)
+		):
+			raise _AmbiguousImports("bad alias")
+		return i + 2
+	return i
+
+
+def _parse_import_statement(tokens: list[tokenize.TokenInfo]) -> list[ImportRecord]:
+	"""get the import records from the tokens of a single `import` or `from` statement
+
+	mirrors what `get_import_records` extracts from the corresponding `ast.Import` or `ast.ImportFrom`.
+	anything which is not plainly valid raises `_AmbiguousImports`
+	"""
+	if tokens[0].string == "import":
+		# import a.b [as c], d [as e]
+		records: list[ImportRecord] = []
+		i: int = 1
+		while True:
+			name, i = _parse_dotted_name(tokens, i)
+			i = _skip_alias(tokens, i)
+			records.append(ImportRecord(name))
+			if i == len(tokens):
+				return records
+			if tokens[i].exact_type != tokenize.COMMA:
+				raise _AmbiguousImports(f"unexpected token {tokens[i]}")
+			i += 1
+
+	# from [.]*a.b import (c [as d], e) | *
+	i = 1
+	level: int = 0
+	while i < len(tokens) and tokens[i].exact_type in (tokenize.DOT, tokenize.ELLIPSIS):
+		level += 3 if tokens[i].exact_type == tokenize.ELLIPSIS else 1
+		i += 1
+	module: str = ""
+	if not (level and i < len(tokens) and tokens[i].string == "import"):
+		# `from . import x` has no module name
+		module, i = _parse_dotted_name(tokens, i)
+	if i >= len(tokens) or tokens[i].string != "import":
+		raise _AmbiguousImports("expected `import`")
+	i += 1
+
+	rest: list[tokenize.TokenInfo] = tokens[i:]
+	if len(rest) == 1 and rest[0].exact_type == tokenize.STAR:
+		return [ImportRecord(module, level, ("*",))]
+	if rest and rest[0].exact_type == tokenize.LPAR:
+		if rest[-1].exact_type != tokenize.RPAR:
+			raise _AmbiguousImports("unclosed parenthesis")
+		rest = rest[1:-1]
+		# a trailing comma is allowed inside parentheses
+		if rest and rest[-1].exact_type == tokenize.COMMA:
+			rest = rest[:-1]
+	names: list[str] = []
+	j: int = 0
+	while True:
+		if (
+			j >= len(rest)
+			or rest[j].type != tokenize.NAME
+			or keyword.iskeyword(rest[j].string)
+		):
+			raise _AmbiguousImports("expected an imported name")
+		names.append(rest[j].string)
+		j = _skip_alias(rest, j + 1)
+		if j == len(rest):
+			return [ImportRecord(module, level, tuple(names))]
+		if rest[j].exact_type != tokenize.COMMA:
+			raise _AmbiguousImports(f"unexpected token {rest[j]}")
+		j += 1
+
+
+def _get_imports_from_tokens(source_code: str, header_only: bool) -> list[ImportRecord]:
+	"token-stream import scanner, raising `_AmbiguousImports` whenever it is unsure"
+	# no import statement can start after the last occurrence of the word
+	last_import_pos: int = source_code.rfind("import")
+	if last_import_pos == -1:
+		return []
+	last_import_line: int = source_code.count("\n", 0, last_import_pos) + 1
+
+	imports: list[ImportRecord] = []
+	depth: int = 0
+	n_statements: int = 0
+	statement: list[tokenize.TokenInfo] = []
+
+	def _end_statement() -> bool:
+		"process a complete statement, returns whether to stop scanning"
+		nonlocal n_statements
+		if not statement:
+			return False
+		first: tokenize.TokenInfo = statement[0]
+		is_import: bool = first.type == tokenize.NAME and first.string in ("import", "from")
+		if is_import:
+			imports.extend(_parse_import_statement(statement))
+		elif any(
+			tok.type == tokenize.NAME and tok.string == "import" for tok in statement
+		):
+			# eg `if x: import y` -- leave compound statements to the ast
+			raise _AmbiguousImports(f"`import` inside another statement on line {first.start[0]}")
+		elif header_only and depth == 0:
+			# allow a module docstring, stop at anything else at the top level
+			if not (n_statements == 0 and first.type == tokenize.STRING):
+				return True
+		n_statements += 1
+		statement.clear()
+		return False
+
+	try:
+		for tok in tokenize.generate_tokens(io.StringIO(source_code).readline):
+			if tok.type == tokenize.ERRORTOKEN:
+				raise _AmbiguousImports(f"error token {tok}")
+			elif tok.type in _SKIP_TOKENS:
+				continue
+			elif tok.type == tokenize.INDENT:
+				depth += 1
+			elif tok.type == tokenize.DEDENT:
+				depth -= 1
+			elif tok.type in (tokenize.NEWLINE, tokenize.ENDMARKER) or (
+				tok.exact_type == tokenize.SEMI
+			):
+				if _end_statement():
+					break
+			else:
+				if not statement and tok.start[0] > last_import_line:
+					# the rest of the file can't contain an import statement
+					break
+				statement.append(tok)
+	except (tokenize.TokenError, SyntaxError) as e:
+		raise _AmbiguousImports(f"could not tokenize: {e}") from e
+
+	return imports
+
+
+def get_import_records_fast(
+	source_code: str,
+	header_only: bool = False,
+) -> list[ImportRecord]:
+	"""Get all the imports from a source code string using the token stream instead of a full AST
+
+	stops tokenizing after the last occurrence of the word `import`, and if `header_only` is set, at the first
+	top-level statement which is not an import (a module docstring is allowed). falls back to
+	`get_import_records` on anything ambiguous: imports inside compound statements on one line, malformed
+	import statements, or tokenizer errors.
+
+	unlike `get_import_records`, imports are returned in source order rather than breadth-first order of the
+	AST, and syntax errors outside of import statements are not detected.
+	"""
+	try:
+		return _get_imports_from_tokens(source_code, header_only=header_only)
+	except _AmbiguousImports:
+		return get_import_records(source_code)
+
+
+def get_imports_fast(
+	source_code: str,
+	allow_missing_imports: bool = False,
+	header_only: bool = False,
+) -> list[str]:
+	"""module names from `get_import_records_fast`, a drop-in for `get_imports`
+
+	relative imports without a module name fall back to `get_imports`, which warns or raises about them
+	"""
+	try:
+		records: list[ImportRecord] = _get_imports_from_tokens(
+			source_code, header_only=header_only
+		)
+	except _AmbiguousImports:
+		return get_imports(source_code, allow_missing_imports=allow_missing_imports)
+	if not all(record.module for record in records):
+		return get_imports(source_code, allow_missing_imports=allow_missing_imports)
+	return [record.module for record in records]
+
+
+class ImportScanOptions(NamedTuple):
+	"how to extract imports from a file, see `scan_imports`"
+
+	scanner: Literal["ast", "fast"] = "ast"
+	header_only: bool = False
+
+	@classmethod
+	def from_config(cls, config: dict) -> "ImportScanOptions":
+		return cls(
+			scanner=config["graph"].get("import_scanner", "ast"),
+			header_only=config["graph"].get("import_scanner_header_only", False),
+		)
+
+	def key(self) -> str:
+		"short string identifying these options, for cache keys"
+		return f"{self.scanner}{'-header' if self.header_only else ''}"
+
+
+def scan_imports(
+	source_code: str,
+	options: ImportScanOptions = ImportScanOptions(),
+) -> list[ImportRecord]:
+	"extract import records from source code with the scanner given in `options`"
+	if options.scanner == "ast":
+		return get_import_records(source_code)
+	elif options.scanner == "fast":
+		return get_import_records_fast(source_code, header_only=options.header_only)
+	else:
+		raise ValueError(f"unknown import scanner: {options.scanner!r}, expected 'ast' or 'fast'")
+
+
 ast.alias
 
 def get_python_files(root: str = ".") -> list[str]:
 	"Get all Python files in a directory and its subdirectories"
-	if not os.path.exists(root):
-		raise FileNotFoundError(f"root directory not found: {root}")
-
-	glob_pattern: str = Path(root).as_posix().rstrip("/") + "/**/*.py"
-	files: list[str] = glob.glob(glob_pattern, recursive=True)
-	files = [
-		Path(os.path.relpath(file, os.path.abspath(root))).as_posix() for file in files
-	]
-	return files
+	return FileSystemIndex.build(root).python_files()
 
 
 def get_relevant_directories(root: str = ".") -> set[str]:
 	"from a root, get a set of all directories with python files in them"
-	if not os.path.exists(root):
-		print(os.getcwd())
-		raise FileNotFoundError(f"root directory not found: '{root}'")
-
-	# get all directories with python files
-	directories_with_py_files: set[str] = {
-		os.path.dirname(file) for file in get_python_files(root)
-	}
-	directories_with_py_files = {
-		x if x != "" else "."  # map empty string to root
-		for x in directories_with_py_files
-	}
-	# allocate output
-	all_directories: set[str] = set(directories_with_py_files)
-	all_directories.add(".")
-
-	# get every directory between root and root dir
-	# since some directories might have no python files, but contain dirs with python files
-	for directory in directories_with_py_files:
-		while directory and os.path.abspath(directory) != os.path.abspath(root):
-			parent_directory = os.path.dirname(directory)
-			if parent_directory and parent_directory != directory:
-				all_directories.add(parent_directory)
-			directory = parent_directory
-
-	if "" in all_directories:
-		raise ValueError(f"empty string found in {all_directories = }")
-	all_directories = set(map(normalize_path, all_directories))
-
-	return all_directories
+	return FileSystemIndex.build(root).relevant_directories()
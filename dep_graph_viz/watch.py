@@ -0,0 +1,277 @@
+"""watch mode: poll for changed files, patch the graph in memory, and re-render only when it changed
+
+edits to existing files only re-parse those files and replace their import edges. added or removed files
+can change node types and names (eg adding an `__init__.py`), so they trigger a rebuild -- which still only
+parses the new files, since the rest hit the import cache.
+"""
+
+import os
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Callable
+
+import networkx as nx
+
+from dep_graph_viz.csr import IMPORT_EDGE_KEYS
+from dep_graph_viz.dep_graph_viz import Node, get_import_edges
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.fs_index import FileSystemIndex
+from dep_graph_viz.util.util import ImportRecord, ImportScanOptions
+
+FileSnapshot = dict[str, tuple[int, int]]
+"root-relative path of each python file -> `(size, mtime_ns)`"
+
+
+def snapshot_files(root: str) -> FileSnapshot:
+	"stat every python file under `root`"
+	snapshot: FileSnapshot = dict()
+	for rel_path in FileSystemIndex.build(root).python_files():
+		try:
+			stat: os.stat_result = os.stat(os.path.join(root, rel_path))
+		except FileNotFoundError:
+			# removed since the walk
+			continue
+		snapshot[rel_path] = (stat.st_size, stat.st_mtime_ns)
+	return snapshot
+
+
+@dataclass
+class FileChanges:
+	"files which changed between two snapshots"
+
+	changed: list[str] = field(default_factory=list)
+	added: list[str] = field(default_factory=list)
+	removed: list[str] = field(default_factory=list)
+
+	@classmethod
+	def between(cls, old: FileSnapshot, new: FileSnapshot) -> "FileChanges":
+		return cls(
+			changed=sorted(p for p in new if p in old and new[p] != old[p]),
+			added=sorted(p for p in new if p not in old),
+			removed=sorted(p for p in old if p not in new),
+		)
+
+	def __bool__(self) -> bool:
+		return bool(self.changed or self.added or self.removed)
+
+	def is_structural(self) -> bool:
+		"whether the set of files changed, which can change nodes and not just import edges"
+		return bool(self.added or self.removed)
+
+
+def graph_signature(G: nx.MultiDiGraph) -> tuple[frozenset, frozenset]:
+	"everything that ends up in the dot file, to tell whether a graph actually changed"
+	return (
+		frozenset(
+			(str(node), tuple(sorted((k, str(v)) for k, v in data.items())))
+			for node, data in G.nodes(data=True)
+		),
+		frozenset(
+			(str(u), str(v), key, tuple(sorted((k, str(x)) for k, x in data.items())))
+			for u, v, key, data in G.edges(keys=True, data=True)
+		),
+	)
+
+
+def source_paths(G: nx.MultiDiGraph) -> dict[str, Node]:
+	"map from the root-relative source file of each node to the node, `__init__.py` for directories"
+	output: dict[str, Node] = dict()
+	for node in G.nodes:
+		if not isinstance(node, Node):
+			continue
+		if node.is_root():
+			output["__init__.py"] = node
+		elif node.node_type in {"module_dir", "dir"}:
+			output[f"{node.rel_path}/__init__.py"] = node
+		else:
+			output[node.rel_path] = node
+	return output
+
+
+def patch_import_edges(
+	G: nx.MultiDiGraph,
+	rel_paths: list[str],
+	root: str,
+	config: dict,
+	import_cache: ImportCache,
+) -> list[str]:
+	"""re-parse the files at `rel_paths` and replace the import edges of their nodes in `G`, in place
+
+	the set of files must not have changed since `G` was built, otherwise use a full rebuild. files which
+	can't be parsed (eg half way through an edit) keep their old edges, and are returned
+	"""
+	if not config["graph"]["include_local_imports"]:
+		return []
+
+	nodes_by_path: dict[str, Node] = source_paths(G)
+	options: ImportScanOptions = ImportScanOptions.from_config(config)
+	failed: list[str] = []
+	for rel_path in rel_paths:
+		node: Node | None = nodes_by_path.get(rel_path)
+		if node is None:
+			continue
+
+		# read the new imports, before touching the old ones
+		try:
+			imports: list[ImportRecord] = import_cache.get_imports(
+				os.path.join(root, rel_path), options
+			)
+		except FileNotFoundError:
+			warnings.warn(f"could not read source code for {rel_path = }, skipping")
+			continue
+		except (SyntaxError, ValueError, UnicodeDecodeError) as e:
+			warnings.warn(f"could not parse {rel_path = }, keeping its old imports: {e!r}")
+			failed.append(rel_path)
+			continue
+
+		# drop the old import edges of this node
+		G.remove_edges_from(
+			[
+				(u, v, key)
+				for u, v, key in G.in_edges(node, keys=True)
+				if key in IMPORT_EDGE_KEYS
+			]
+		)
+
+		nodes_to_add, edges_to_add = get_import_edges(
+			node=node,
+			node_path=rel_path,
+			imports=list(dict.fromkeys(imports)),
+			module_index=G.graph["module_index"],
+			config=config,
+		)
+		for x in nodes_to_add:
+			G.add_node(**x)
+		for x in edges_to_add:
+			G.add_edge(**x)
+
+	# external modules nothing imports anymore
+	G.remove_nodes_from(
+		[node for node in G.nodes if not isinstance(node, Node) and G.degree(node) == 0]
+	)
+	return failed
+
+
+class GraphWatcher:
+	"""keeps a graph in memory and updates it as files under `root` change
+
+	# Parameters:
+	 - `root : str`
+	    directory being watched
+	 - `config : dict`
+	    processed config the graph was built with
+	 - `G : nx.MultiDiGraph`
+	    the graph as initially built
+	 - `rebuild : Callable[[], nx.MultiDiGraph]`
+	    builds the graph from scratch, called when files are added or removed
+	 - `import_cache : ImportCache`
+	    shared with `rebuild`, so that rebuilds only parse new or changed files
+	"""
+
+	def __init__(
+		self,
+		root: str,
+		config: dict,
+		G: nx.MultiDiGraph,
+		rebuild: Callable[[], nx.MultiDiGraph],
+		import_cache: ImportCache,
+	) -> None:
+		self.root: str = root
+		self.config: dict = config
+		self.G: nx.MultiDiGraph = G
+		self.rebuild: Callable[[], nx.MultiDiGraph] = rebuild
+		self.import_cache: ImportCache = import_cache
+		self.snapshot: FileSnapshot = snapshot_files(root)
+		# set when `on_change` failed, so that `run` calls it again even if the graph doesn't change
+		self.pending_render: bool = False
+
+	def poll(self) -> FileChanges:
+		"changes since the last applied snapshot, without applying them"
+		return FileChanges.between(self.snapshot, snapshot_files(self.root))
+
+	def wait_for_quiet(self, debounce: float) -> FileSnapshot:
+		"poll every `debounce` seconds until two snapshots in a row agree, so a burst of saves is one change"
+		latest: FileSnapshot = snapshot_files(self.root)
+		while True:
+			time.sleep(debounce)
+			newer: FileSnapshot = snapshot_files(self.root)
+			if newer == latest:
+				return newer
+			latest = newer
+
+	def apply(self, new_snapshot: FileSnapshot) -> bool:
+		"""update the graph to match `new_snapshot`, returning whether the graph changed
+
+		if a file can't be parsed, or a rebuild fails, the previous graph is kept and the snapshot isn't
+		advanced for the files involved, so they are retried on the next poll
+		"""
+		changes: FileChanges = FileChanges.between(self.snapshot, new_snapshot)
+		if not changes:
+			self.snapshot = new_snapshot
+			return False
+
+		before: tuple[frozenset, frozenset] = graph_signature(self.G)
+		transformed: bool = bool(
+			self.G.graph.get("collapsed") or "transitive_reduction" in self.G.graph
+		)
+		if changes.is_structural() or transformed:
+			if changes.is_structural():
+				print(f"# rebuilding: {len(changes.added)} added, {len(changes.removed)} removed")
+			else:
+				# edges of merged modules, or edges left out by the reduction, can't be patched in place
+				print(f"# rebuilding transformed graph: {len(changes.changed)} changed files")
+			try:
+				G_new: nx.MultiDiGraph = self.rebuild()
+			except Exception as e:
+				warnings.warn(f"rebuild failed, keeping the previous graph: {e!r}")
+				return False
+			self.G = G_new
+			self.snapshot = new_snapshot
+		else:
+			print(f"# re-parsing {len(changes.changed)} changed files")
+			failed: list[str] = patch_import_edges(
+				self.G,
+				rel_paths=changes.changed,
+				root=self.root,
+				config=self.config,
+				import_cache=self.import_cache,
+			)
+			self.snapshot = {
+				**new_snapshot,
+				**{rel_path: self.snapshot[rel_path] for rel_path in failed},
+			}
+		return graph_signature(self.G) != before
+
+	def run(
+		self,
+		on_change: Callable[[nx.MultiDiGraph], None],
+		interval: float = 1.0,
+		debounce: float = 0.5,
+		max_polls: int | None = None,
+	) -> None:
+		"""poll every `interval` seconds, calling `on_change` with the graph whenever it changed
+
+		if `on_change` raises, it is called again on every poll until it succeeds. runs until interrupted, or
+		for `max_polls` polls if given
+		"""
+		n_polls: int = 0
+		while max_polls is None or n_polls < max_polls:
+			n_polls += 1
+			changed: bool = False
+			if self.poll():
+				changed = self.apply(self.wait_for_quiet(debounce))
+				if changed:
+					print(f"\t graph now has {len(self.G.nodes)} nodes and {len(self.G.edges)} edges")
+				elif not self.pending_render:
+					print("\t graph unchanged, not re-rendering")
+			else:
+				time.sleep(interval)
+			if changed or self.pending_render:
+				try:
+					on_change(self.G)
+				except Exception as e:
+					self.pending_render = True
+					warnings.warn(f"could not write outputs, will retry on the next poll: {e!r}")
+				else:
+					self.pending_render = False
@@ -0,0 +1,164 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from dep_graph_viz.batch import (
+	BatchPackage,
+	batch_main,
+	build_packages,
+	combine_graphs,
+	package_configs,
+	read_manifest,
+	resolve_cross_package_imports,
+)
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.util.cache import ImportCache
+
+KWARGS: dict = {
+	"auto_url_format": None,
+	"import_cache.enabled": False,
+	"graph.workers": 1,
+}
+
+
+@pytest.fixture
+def monorepo(tmp_path):
+	files: dict[str, str] = {
+		"pkga/__init__.py": "",
+		"pkga/core.py": "import os\nfrom pkgb.utils import helper\nimport pkgb\n",
+		"pkgb/__init__.py": "from pkgb import utils\n",
+		"pkgb/utils.py": "import json\ndef helper(): pass\n",
+		"tools/run.py": "import pkga.core\n",
+	}
+	for path, content in files.items():
+		(tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+		(tmp_path / path).write_text(content)
+	return tmp_path
+
+
+def _packages(monorepo, names, **graph_config) -> list[BatchPackage]:
+	config = json.loads(json.dumps(_DEFAULT_CONFIG))
+	config["auto_url_format"] = None
+	config["graph"].update(graph_config)
+	packages = package_configs([str(monorepo / name) for name in names], [], config)
+	build_packages(packages, import_cache=ImportCache(cache_dir=None))
+	resolve_cross_package_imports(packages)
+	return packages
+
+
+def _edges(G) -> set[tuple[str, str, str]]:
+	return {(str(u).strip('"'), str(v).strip('"'), key) for u, v, key in G.edges(keys=True)}
+
+
+def test_cross_package_edges(monorepo):
+	pkga, pkgb, tools = _packages(monorepo, ["pkga", "pkgb", "tools"])
+	assert ("pkgb.utils", "core", "cross_package") in _edges(pkga.G)
+	assert ("pkgb", "core", "cross_package") in _edges(pkga.G)
+	assert ("pkga.core", "run.py", "cross_package") in _edges(tools.G)
+	# externals are dropped by default
+	assert "os" not in pkga.G
+	assert "json" not in pkgb.G
+	assert not any(key == "cross_package" for *_, key in _edges(pkgb.G))
+
+
+def test_cross_package_keeps_externals(monorepo):
+	pkga, pkgb = _packages(monorepo, ["pkga", "pkgb"], include_externals=True)
+	assert ("os", "core", "external") in _edges(pkga.G)
+	assert not any(u.startswith("pkgb") and key == "external" for u, _, key in _edges(pkga.G))
+
+
+def test_combined_graph(monorepo):
+	packages = _packages(monorepo, ["pkga", "pkgb", "tools"])
+	H = combine_graphs(packages)
+	edges = _edges(H)
+	# the cross-package edges meet the real nodes of the imported package
+	assert ("pkgb.utils", "pkga.core", "cross_package") in edges
+	assert ("pkga.core", "tools/run.py", "cross_package") in edges
+	assert ("pkgb.utils", "pkgb", "inits") in edges
+	assert H.nodes["pkgb.utils"]["shape"] == _DEFAULT_CONFIG["node"]["module_file"]["shape"]
+
+
+def test_batch_main(monorepo, tmp_path):
+	output_dir = tmp_path / "out"
+	manifest = monorepo / "manifest.json"
+	manifest.write_text(json.dumps({"roots": ["tools"]}))
+	outputs = batch_main(
+		str(monorepo / "pkga"),
+		str(monorepo / "pkgb"),
+		manifest=str(manifest),
+		output_dir=str(output_dir),
+		output_fmt="html",
+		combined=True,
+		**KWARGS,
+	)
+	assert set(outputs) == {"pkga", "pkgb", "tools", "combined"}
+	for output in outputs.values():
+		assert os.path.isfile(f"{output}.dot")
+		assert os.path.isfile(f"{output}.html")
+	assert "cross_package" in (output_dir / "pkga.dot").read_text()
+
+
+def test_batch_main_shared_pool(monorepo, tmp_path):
+	outputs = batch_main(
+		str(monorepo / "pkga"),
+		str(monorepo / "pkgb"),
+		output_dir=str(tmp_path / "out"),
+		output_fmt="html",
+		**{**KWARGS, "graph.workers": 2},
+	)
+	assert "cross_package" in open(f"{outputs['pkga']}.dot").read()
+
+
+def test_read_manifest(tmp_path):
+	manifest = tmp_path / "m.json"
+	manifest.write_text(json.dumps(["a", "/abs/b"]))
+	assert read_manifest(str(manifest)) == ([str(tmp_path / "a"), "/abs/b"], [])
+	manifest.write_text(json.dumps({"modules": ["json"]}))
+	assert read_manifest(str(manifest)) == ([], ["json"])
+
+
+def test_package_names_unique(monorepo, tmp_path):
+	(tmp_path / "other" / "pkga").mkdir(parents=True)
+	(tmp_path / "other" / "pkga" / "x.py").write_text("")
+	config = json.loads(json.dumps(_DEFAULT_CONFIG))
+	config["auto_url_format"] = None
+	packages = package_configs(
+		[str(monorepo / "pkga"), str(tmp_path / "other" / "pkga")], [], config
+	)
+	assert [p.name for p in packages] == ["pkga", "pkga_2"]
+
+
+def test_batch_requires_packages():
+	with pytest.raises(ValueError):
+		batch_main()
+
+
+def test_git_detected_once_per_repository(monorepo):
+	(monorepo / ".git").mkdir()
+	config = json.loads(json.dumps(_DEFAULT_CONFIG))
+	with patch("subprocess.check_output") as mock_subprocess:
+		mock_subprocess.side_effect = ["https://github.com/user/mono.git", "main"]
+		packages = package_configs(
+			[str(monorepo / name) for name in ("pkga", "pkgb", "tools")], [], config
+		)
+	assert mock_subprocess.call_count == 2
+	assert {p.config["url_prefix"] for p in packages} == {
+		"https://github.com/user/mono/tree/main/"
+	}
+
+
+def test_batch_main_collapsed(monorepo, tmp_path):
+	outputs = batch_main(
+		str(monorepo / "pkga"),
+		str(monorepo / "pkgb"),
+		output_dir=str(tmp_path / "out"),
+		output_fmt="html",
+		combined=True,
+		**{**KWARGS, "graph.collapse_depth": 0},
+	)
+	combined = open(f"{outputs['combined']}.dot").read()
+	# imports of merged modules point at the node they were merged into
+	assert "pkgb.utils" not in combined
+	assert "pkgb -> pkga" in combined
@@ -0,0 +1,72 @@
+import json
+import os
+
+from dep_graph_viz.benchmark import (
+	PHASES,
+	SyntheticPackageSpec,
+	compare_benchmarks,
+	generate_package,
+	run_benchmark,
+	run_benchmarks,
+)
+from dep_graph_viz.util.fs_index import FileSystemIndex
+from dep_graph_viz.util.util import get_imports
+
+
+def test_generate_package(tmp_path):
+	spec = SyntheticPackageSpec(n_modules=30, depth=2, branching=2, fan_out=4, lines_per_module=40)
+	package_path = generate_package(str(tmp_path), spec)
+
+	fs_index = FileSystemIndex.build(package_path)
+	assert len(spec.package_dirs()) == 1 + 2 + 4
+	assert all(fs_index.has_init(d) for d in spec.package_dirs())
+	files = [f for f in fs_index.python_files() if not f.endswith("__init__.py")]
+	assert len(files) == 30
+
+	for f in files:
+		with open(os.path.join(package_path, f), "r", encoding="utf-8") as fh:
+			source = fh.read()
+		assert len(source.splitlines()) >= 40
+		import_lines = [
+			line
+			for line in source.splitlines()
+			if line.startswith(("import synthpkg.", "from synthpkg"))
+		]
+		assert len(import_lines) == 4
+		assert all(m.startswith("synthpkg") for m in get_imports(source)[2:])
+
+
+def test_generate_package_deterministic(tmp_path):
+	spec = SyntheticPackageSpec(n_modules=10, seed=3)
+	paths = [generate_package(str(tmp_path / name), spec) for name in ("a", "b")]
+	for f in FileSystemIndex.build(paths[0]).python_files():
+		with open(os.path.join(paths[0], f)) as fa, open(os.path.join(paths[1], f)) as fb:
+			assert fa.read() == fb.read()
+
+
+def test_run_benchmark(tmp_path):
+	spec = SyntheticPackageSpec(n_modules=20, depth=1, fan_out=3)
+	result = run_benchmark(
+		spec, workdir=str(tmp_path), config_overrides={"graph": {"workers": 1}}
+	)
+	assert set(result["timings"]) == set(PHASES)
+	for name in PHASES:
+		if name != "rendering":
+			assert result["timings"][name] >= 0
+	# 20 modules, the root, 4 subpackages
+	assert result["n_nodes"] == 25
+	assert result["n_edges"] > 20
+	assert result["peak_memory_bytes"] > 0
+
+
+def test_run_and_compare_benchmarks(tmp_path):
+	output = str(tmp_path / "bench.json")
+	report = run_benchmarks(sizes=(5, 10), output=output, workdir=str(tmp_path), **{"graph.workers": 1})
+	assert report["config_overrides"] == {"graph": {"workers": 1}}
+	with open(output, "r", encoding="utf-8") as f:
+		assert json.load(f)["results"] == report["results"]
+
+	ratios = compare_benchmarks(output, output)
+	assert set(ratios) == {5, 10}
+	assert ratios[5]["discovery"] == 1.0
+	assert ratios[5]["peak_memory"] == 1.0
@@ -0,0 +1,84 @@
+import concurrent.futures
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dep_graph_viz import build_graph_for
+
+
+def _make_package(base, name: str, n_modules: int) -> str:
+	pkg = base / name
+	(pkg / "sub").mkdir(parents=True)
+	(pkg / "__init__.py").write_text(f"from {name} import m0\n")
+	(pkg / "sub" / "__init__.py").write_text("from . import s0\n")
+	for i in range(n_modules):
+		(pkg / f"m{i}.py").write_text(f"import os\nfrom {name}.sub import s{i}\n")
+		(pkg / "sub" / f"s{i}.py").write_text(f"from ..m{(i + 1) % n_modules} import x\n")
+	return str(pkg)
+
+
+def _edges(G) -> list[tuple[str, str, str]]:
+	return [(str(u), str(v), key) for u, v, key in G.edges(keys=True)]
+
+
+CONFIG: dict = {
+	"auto_url_format": None,
+	"graph": {"include_externals": True, "workers": 1},
+	"import_cache": {"enabled": False},
+}
+
+
+def test_build_graph_for_relative_root(tmp_path, monkeypatch):
+	root = _make_package(tmp_path, "pkga", 3)
+	monkeypatch.chdir(tmp_path)
+	G = build_graph_for("pkga", CONFIG)
+	assert os.getcwd() == str(tmp_path)
+	assert G.graph["config"]["PACKAGE_NAME"] == "pkga"
+	assert ('"m0"', '"sub.s2"', "uses") in _edges(G)
+	assert _edges(G) == _edges(build_graph_for(root, CONFIG))
+
+
+def test_build_graph_for_does_not_modify_config(tmp_path):
+	root = _make_package(tmp_path, "pkga", 2)
+	config = {"graph": {"strip_module_prefix": False}, "auto_url_format": None}
+	G = build_graph_for(root, config)
+	assert config == {"graph": {"strip_module_prefix": False}, "auto_url_format": None}
+	assert G.graph["config"]["root_node_name"] == "pkga"
+
+
+def test_build_graph_for_threads(tmp_path, monkeypatch):
+	roots = [
+		_make_package(tmp_path, name, n)
+		for name, n in (("pkga", 3), ("pkgb", 7), ("pkgc", 40))
+	]
+	expected = {root: _edges(build_graph_for(root, CONFIG)) for root in roots}
+
+	def _no_chdir(path):
+		raise AssertionError(f"os.chdir({path!r}) called while building")
+
+	def _no_pool(*args, **kwargs):
+		raise AssertionError("process pool started while building from threads")
+
+	monkeypatch.setattr(os, "chdir", _no_chdir)
+	monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", _no_pool)
+	# so that the default would start a pool on any machine
+	monkeypatch.setattr(os, "cpu_count", lambda: 8)
+	# the default `graph.workers`, which parses in each calling thread
+	config = {**CONFIG, "graph": {"include_externals": True}}
+	cwd = os.getcwd()
+	jobs = roots * 6
+	with ThreadPoolExecutor(max_workers=8) as pool:
+		results = list(pool.map(lambda root: _edges(build_graph_for(root, config)), jobs))
+
+	assert os.getcwd() == cwd
+	for root, edges in zip(jobs, results):
+		assert edges == expected[root]
+
+
+@pytest.mark.parametrize("engine", ["networkx", "csr"])
+def test_build_graph_for_engines(tmp_path, engine):
+	root = _make_package(tmp_path, "pkga", 3)
+	G = build_graph_for(root, {**CONFIG, "graph": {**CONFIG["graph"], "engine": engine}})
+	# root, sub, the modules in each, and `os`
+	assert G.number_of_nodes() == 1 + 1 + 3 + 3 + 1
@@ -0,0 +1,104 @@
+import pytest
+
+from dep_graph_viz import build_graph_for
+from dep_graph_viz.collapse import collapse_graph, depth_limit, parse_overrides
+
+
+def _make_package(base) -> str:
+	pkg = base / "pkg"
+	(pkg / "sub" / "deep").mkdir(parents=True)
+	(pkg / "__init__.py").write_text("")
+	(pkg / "a.py").write_text("import os\nfrom pkg.sub import b\nfrom pkg.sub.deep import c, d\n")
+	(pkg / "sub" / "__init__.py").write_text("")
+	(pkg / "sub" / "b.py").write_text("from pkg.sub.deep import c\nfrom pkg import a\n")
+	(pkg / "sub" / "deep" / "__init__.py").write_text("")
+	(pkg / "sub" / "deep" / "c.py").write_text("import os\nfrom pkg import a\n")
+	(pkg / "sub" / "deep" / "d.py").write_text("from pkg import a\n")
+	return str(pkg)
+
+
+CONFIG: dict = {
+	"auto_url_format": None,
+	"graph": {"include_externals": True, "workers": 1},
+	"import_cache": {"enabled": False},
+}
+
+
+def _build(root: str, engine: str = "networkx", **graph_config):
+	return build_graph_for(
+		root, {**CONFIG, "graph": {**CONFIG["graph"], "engine": engine, **graph_config}}
+	)
+
+
+def _edges(G) -> dict[tuple[str, str, str], int | None]:
+	return {
+		(str(u), str(v), key): attrs.get("weight")
+		for u, v, key, attrs in G.edges(keys=True, data=True)
+	}
+
+
+def test_depth_limit():
+	overrides = parse_overrides({"sub": 3, "sub.deep": None, "other/x": 0})
+	assert overrides == {("sub",): 3, ("sub", "deep"): None, ("other", "x"): 0}
+	assert depth_limit(("a",), 1, overrides) == 1
+	assert depth_limit(("sub", "b"), 1, overrides) == 3
+	assert depth_limit(("sub", "deep", "c"), 1, overrides) is None
+	assert depth_limit(("other", "x", "y"), None, overrides) == 0
+	assert depth_limit((), None, overrides) is None
+
+
+@pytest.mark.parametrize("engine", ["networkx", "csr"])
+def test_collapse_depth(tmp_path, engine):
+	root = _make_package(tmp_path)
+	G = _build(root, engine, collapse_depth=1)
+	assert sorted(str(node) for node in G.nodes()) == ['"a"', '"sub"', "ROOT", "os"]
+	assert G.graph["collapsed"]
+	assert _edges(G) == {
+		("ROOT", '"sub"', "module_hierarchy"): None,
+		("ROOT", '"a"', "hierarchy"): None,
+		("os", '"a"', "external"): None,
+		# `a` imports `sub.b`, `sub.deep.c` and `sub.deep.d`
+		('"sub"', '"a"', "uses"): 3,
+		# `sub.b`, `sub.deep.c` and `sub.deep.d` import `a`
+		('"a"', '"sub"', "uses"): 3,
+		("os", '"sub"', "external"): None,
+	}
+	(sub,) = [node for node in G.nodes() if str(node) == '"sub"']
+	attrs = dict(G.nodes(data=True))[sub]
+	assert attrs["peripheries"] == 2
+	assert attrs["tooltip"] == "sub (+4 modules)"
+
+
+def test_collapse_overrides(tmp_path):
+	root = _make_package(tmp_path)
+	G = _build(root, collapse_depth=1, collapse_overrides={"sub": 2})
+	assert sorted(str(node) for node in G.nodes()) == [
+		'"a"',
+		'"sub"',
+		'"sub.b"',
+		'"sub.deep"',
+		"ROOT",
+		"os",
+	]
+	assert _edges(G)[('"sub.deep"', '"a"', "uses")] == 2
+	assert _edges(G)[('"sub.deep"', '"sub.b"', "uses")] is None
+
+	# `None` keeps everything under a path
+	G = _build(root, collapse_depth=0, collapse_overrides={"sub/deep": None})
+	assert sorted(str(node) for node in G.nodes()) == [
+		'"sub.deep"',
+		'"sub.deep.c"',
+		'"sub.deep.d"',
+		"ROOT",
+		"os",
+	]
+	assert ("ROOT", '"sub.deep"', "module_hierarchy") in _edges(G)
+
+
+def test_collapse_deeper_than_tree_changes_nothing(tmp_path):
+	root = _make_package(tmp_path)
+	G = _build(root)
+	H = collapse_graph(G, collapse_depth=5)
+	assert list(H.nodes(data=True)) == list(G.nodes(data=True))
+	assert list(H.edges(keys=True, data=True)) == list(G.edges(keys=True, data=True))
+	assert not H.graph["collapsed"]
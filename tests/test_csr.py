@@ -0,0 +1,158 @@
+import io
+import random
+import tracemalloc
+from copy import deepcopy
+
+import networkx as nx
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.csr import EDGE_KINDS, CSRBuilder, CSRGraph, as_networkx
+from dep_graph_viz.dep_graph_viz import build_graph
+from dep_graph_viz.dot import write_dot_stream
+from dep_graph_viz.util.cache import ImportCache
+
+
+def _random_ops(seed: int, n_nodes: int = 30, n_edges: int = 300) -> list[tuple]:
+	rng = random.Random(seed)
+	ops: list[tuple] = []
+	for i in range(n_nodes):
+		ops.append(("node", f"n{i}", {"rank": i % 3, "shape": "box"}))
+	for _ in range(n_edges):
+		u, v = rng.randrange(n_nodes + 5), rng.randrange(n_nodes + 5)
+		key = rng.choice(EDGE_KINDS + ("other",))
+		ops.append(("edge", f"n{u}", f"n{v}", key, {"color": rng.choice("rgb")}))
+	# re-adding a node updates its attributes
+	ops.append(("node", "n0", {"URL": '"http://x"', "shape": "oval"}))
+	return ops
+
+
+def _apply(G, ops: list[tuple]) -> None:
+	for op in ops:
+		if op[0] == "node":
+			G.add_node(op[1], **op[2])
+		else:
+			G.add_edge(op[1], op[2], key=op[3], **op[4])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_networkx(seed):
+	ops = _random_ops(seed)
+	G_nx = nx.MultiDiGraph()
+	_apply(G_nx, ops)
+	builder = CSRBuilder()
+	_apply(builder, ops)
+	G_csr = builder.build()
+
+	assert G_csr.number_of_nodes() == G_nx.number_of_nodes()
+	assert G_csr.number_of_edges() == G_nx.number_of_edges()
+	assert list(G_csr.nodes(data=True)) == list(G_nx.nodes(data=True))
+	assert list(G_csr.edges(keys=True, data=True)) == list(
+		G_nx.edges(keys=True, data=True)
+	)
+	G_back = G_csr.to_networkx()
+	assert list(G_back.edges(keys=True, data=True)) == list(
+		G_nx.edges(keys=True, data=True)
+	)
+	for node in ("n0", "n7", "n33"):
+		assert G_csr.successors(node) == list(G_nx.successors(node))
+		assert G_csr.out_degree(node) == G_nx.out_degree(node)
+
+
+def test_shared_attribute_rows():
+	builder = CSRBuilder()
+	for i in range(100):
+		builder.add_node(i, rank=1, color="red", URL=f'"u{i}"')
+	for i in range(100):
+		builder.add_edge(i, (i + 1) % 100, key="uses", color="red")
+	G = builder.build()
+	assert len(G.node_table) == 1
+	assert len(G.edge_table) == 1
+	assert G.node_attrs(5) == {"rank": 1, "color": "red", "URL": '"u5"'}
+	assert G.kinds.tolist() == [EDGE_KINDS.index("uses")] * 100
+	assert list(G.out_edges(3)) == [(4, "uses")]
+	assert 99 in G and 100 not in G
+
+
+def test_to_numpy():
+	np = pytest.importorskip("numpy")
+	builder = CSRBuilder()
+	builder.add_edge("a", "b", key="uses")
+	builder.add_edge("a", "c", key="inits")
+	arrays = builder.build().to_numpy()
+	assert arrays["indptr"].tolist() == [0, 2, 2, 2]
+	assert arrays["indices"].tolist() == [1, 2]
+	assert arrays["kinds"].dtype == np.uint8
+
+
+def test_memory_vs_networkx():
+	n_nodes, n_edges = 2_000, 20_000
+	rng = random.Random(0)
+	edges = [
+		(rng.randrange(n_nodes), rng.randrange(n_nodes), rng.choice(EDGE_KINDS))
+		for _ in range(n_edges)
+	]
+	nodes = [f"pkg.module_{i}" for i in range(n_nodes)]
+	attrs = {k: {"color": "red", "penwidth": "1", "style": "solid"} for k in EDGE_KINDS}
+
+	def _retained(G) -> int:
+		tracemalloc.start()
+		try:
+			for i, node in enumerate(nodes):
+				G.add_node(node, rank=i % 5, shape="box")
+			for u, v, key in edges:
+				G.add_edge(nodes[u], nodes[v], key=key, **attrs[key])
+			if isinstance(G, CSRBuilder):
+				G = G.build()
+			retained, _ = tracemalloc.get_traced_memory()
+		finally:
+			tracemalloc.stop()
+		assert G.number_of_edges() > 0.99 * n_edges
+		return retained
+
+	assert _retained(nx.MultiDiGraph()) >= 10 * _retained(CSRBuilder())
+
+
+@pytest.fixture
+def pkg_config(tmp_path, monkeypatch):
+	pkg = tmp_path / "pkg"
+	(pkg / "sub").mkdir(parents=True)
+	(pkg / "__init__.py").write_text("from pkg import a\n")
+	(pkg / "a.py").write_text("import os\nfrom pkg.sub import b\nimport pkg.sub.b\n")
+	(pkg / "sub" / "__init__.py").write_text("from . import b\n")
+	(pkg / "sub" / "b.py").write_text("import json\nfrom .. import a\n")
+	(pkg / "scripts").mkdir()
+	(pkg / "scripts" / "run.py").write_text("import pkg.a\n")
+	monkeypatch.chdir(pkg)
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["PACKAGE_NAME"] = "pkg"
+	config["url_prefix"] = "https://example.com/pkg/"
+	config["graph"]["include_externals"] = True
+	return config
+
+
+def test_build_graph_engines_agree(pkg_config):
+	outputs: dict[str, str] = dict()
+	graphs: dict = dict()
+	for engine in ("networkx", "csr"):
+		config = deepcopy(pkg_config)
+		config["graph"]["engine"] = engine
+		G = build_graph(".", config, import_cache=ImportCache(cache_dir=None))
+		f = io.StringIO()
+		write_dot_stream(G, f, dot_attrs=config["dot_attrs"])
+		outputs[engine] = f.getvalue()
+		graphs[engine] = G
+
+	assert isinstance(graphs["csr"], CSRGraph)
+	assert outputs["csr"] == outputs["networkx"]
+	assert "module_index" in graphs["csr"].graph
+	G_back = as_networkx(graphs["csr"])
+	assert list(G_back.edges(keys=True, data=True)) == list(
+		graphs["networkx"].edges(keys=True, data=True)
+	)
+
+
+def test_build_graph_unknown_engine(pkg_config):
+	pkg_config["graph"]["engine"] = "igraph"
+	with pytest.raises(ValueError, match="unknown graph engine"):
+		build_graph(".", pkg_config, import_cache=ImportCache(cache_dir=None))
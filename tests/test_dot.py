@@ -0,0 +1,172 @@
+import copy
+import io
+import re
+
+import networkx as nx
+import pydot
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import build_graph, dot_source, write_dot
+from dep_graph_viz.dot import common_attrs, format_attrs, quote_id, write_dot_stream
+from dep_graph_viz.html import adjacency_index
+
+
+@pytest.mark.parametrize(
+	"value, expected",
+	[
+		("abc", "abc"),
+		("a_b1", "a_b1"),
+		("a.b", '"a.b"'),
+		("a b", '"a b"'),
+		("12", "12"),
+		("-1.5", "-1.5"),
+		("node", '"node"'),
+		('"already quoted"', '"already quoted"'),
+		('say "hi"', '"say \\"hi\\""'),
+		("dir\\", '"dir\\\\"'),
+		('a\\"b', '"a\\\\\\"b"'),
+		(3, "3"),
+	],
+)
+def test_quote_id(value, expected):
+	assert quote_id(value) == expected
+
+
+def test_format_attrs_skips_none():
+	assert format_attrs({"color": "red", "rank": None, "label": "a b"}) == (
+		'color=red, label="a b"'
+	)
+
+
+def test_common_attrs():
+	assert common_attrs([{"a": 1, "b": 2}, {"a": 1, "b": 3}, {"a": 1}]) == {"a": 1}
+	assert common_attrs([{"a": 1}, {"a": 2}]) == {}
+	assert common_attrs([]) == {}
+
+
+def _example_graph() -> nx.MultiDiGraph:
+	G = nx.MultiDiGraph()
+	G.add_node("x", color="red", shape="box", rank=1)
+	G.add_node("y.z", color="red", shape="box", rank=2)
+	G.add_edge("x", "y.z", key="uses", color="blue", penwidth=2)
+	G.add_edge("y.z", "x", key="uses", color="blue", penwidth=1)
+	G.add_edge("x", "y.z", key="hierarchy", style="dashed")
+	return G
+
+
+def test_write_dot_stream_keeps_ids_on_single_members():
+	f = io.StringIO()
+	write_dot_stream(_example_graph(), f, dot_attrs={}, element_ids=True)
+	text = f.getvalue()
+	# the only `hierarchy` edge shares all its attributes with its group, but not its id
+	assert "edge [style=dashed];" in text
+	assert re.search(r'^x -> "y\.z" \[id=e\d\];$', text, re.MULTILINE)
+	assert not re.search(r"^(node|edge) \[.*\bid=", text, re.MULTILINE)
+
+
+def test_write_dot_stream_groups_shared_attrs():
+	f = io.StringIO()
+	write_dot_stream(_example_graph(), f, dot_attrs={"rankdir": "LR", "unused": None})
+	text = f.getvalue()
+
+	assert "rankdir=LR;" in text
+	assert "unused" not in text
+	# shared attributes are written once, in the group defaults
+	assert text.count("color=red") == 1
+	assert text.count("color=blue") == 1
+	assert "node [color=red, shape=box];" in text
+	assert "edge [color=blue];" in text
+	# per-element attributes stay on the element
+	assert "x [rank=1];" in text
+	assert '"y.z" [rank=2];' in text
+
+
+def _pydot_elements(text: str) -> tuple[dict, list]:
+	"flatten a parsed dot graph into node and edge attributes, applying subgraph defaults"
+	(P,) = pydot.graph_from_dot_data(text)
+	nodes: dict = dict()
+	edges: list = list()
+
+	def visit(g, node_defaults: dict, edge_defaults: dict) -> None:
+		for n in g.get_nodes():
+			name = n.get_name()
+			if name == "node":
+				node_defaults = {**node_defaults, **n.get_attributes()}
+			elif name not in ("edge", "graph"):
+				nodes[name.strip('"')] = {**node_defaults, **n.get_attributes()}
+		for e in g.get_edges():
+			attrs = {k: str(v) for k, v in {**edge_defaults, **e.get_attributes()}.items()}
+			edges.append(
+				(
+					e.get_source().strip('"'),
+					e.get_destination().strip('"'),
+					tuple(sorted(attrs.items())),
+				)
+			)
+		for s in g.get_subgraphs():
+			sub_edge_defaults = dict(edge_defaults)
+			for n in s.get_nodes():
+				if n.get_name() == "edge":
+					sub_edge_defaults.update(n.get_attributes())
+			visit(s, dict(node_defaults), sub_edge_defaults)
+
+	visit(P, dict(), dict())
+	nodes = {k: {a: str(v) for a, v in attrs.items()} for k, attrs in nodes.items()}
+	return nodes, sorted(edges)
+
+
+def test_write_dot_native_matches_pydot(tmp_path):
+	config = copy.deepcopy(_DEFAULT_CONFIG)
+	config["PACKAGE_NAME"] = "dep_graph_viz"
+	config["import_cache"]["enabled"] = False
+	G = build_graph(root="dep_graph_viz", config=config)
+	native = tmp_path / "native.dot"
+	via_pydot = tmp_path / "pydot.dot"
+	write_dot(G, str(native), dot_attrs=_DEFAULT_CONFIG["dot_attrs"], writer="native")
+	write_dot(G, str(via_pydot), dot_attrs=_DEFAULT_CONFIG["dot_attrs"], writer="pydot")
+
+	nodes_native, edges_native = _pydot_elements(native.read_text())
+	nodes_pydot, edges_pydot = _pydot_elements(via_pydot.read_text())
+	# pydot also writes the edge key as an attribute
+	edges_pydot = sorted(
+		(u, v, tuple(kv for kv in attrs if kv[0] != "key")) for u, v, attrs in edges_pydot
+	)
+	assert len(nodes_native) == len(G.nodes)
+	assert len(edges_native) == len(G.edges)
+	assert nodes_native == nodes_pydot
+	assert edges_native == edges_pydot
+
+
+@pytest.mark.parametrize("writer", ["native", "pydot"])
+def test_element_ids_match_adjacency_index(writer):
+	G = nx.MultiDiGraph()
+	G.add_node("a", shape="box")
+	G.add_node("b.c", shape="box")
+	G.add_edge("a", "b.c", key="uses", color="red")
+	G.add_edge("a", "b.c", key="inits", color="blue")
+	G.add_edge("b.c", "ext", key="external")
+	text: str = dot_source(G, dot_attrs={}, writer=writer, element_ids=True)
+	nodes, edges = _pydot_elements(text)
+
+	assert {name: attrs["id"] for name, attrs in nodes.items()} == {
+		"a": "n0",
+		"b.c": "n1",
+		"ext": "n2",
+	}
+	index = adjacency_index(G)
+	names: list[str] = list(G.nodes)
+	assert sorted(
+		(u, v, dict(attrs)["id"]) for u, v, attrs in edges
+	) == sorted(
+		(names[u], names[v], f"e{j}") for j, (u, v) in enumerate(index["edges"])
+	)
+	assert index["out"] == [[0, 1], [2], []]
+	assert index["in"] == [[], [0, 1], [2]]
+	# without ids, the output is unchanged
+	assert "id=" not in dot_source(G, dot_attrs={}, writer=writer)
+
+
+def test_write_dot_unknown_writer(tmp_path):
+	with pytest.raises(ValueError):
+		write_dot(_example_graph(), str(tmp_path / "x.dot"), dot_attrs={}, writer="nope")
@@ -0,0 +1,482 @@
+import base64
+import gzip
+import importlib.resources
+import json
+import re
+import shutil
+import subprocess
+from copy import deepcopy
+
+import networkx as nx
+import pytest
+
+import dep_graph_viz.dot
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import write_outputs
+from dep_graph_viz.html import (
+	adjacency_index,
+	canvas_geometry,
+	encode_payload,
+	render_html,
+	render_html_canvas,
+	render_html_svg,
+)
+
+SVG: str = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN"
+ "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">
+<!-- Generated by graphviz version 2.43.0 (0)
+ -->
+<svg width="62pt" height="116pt" viewBox="0.00 0.00 62.00 116.00" xmlns="http://www.w3.org/2000/svg">
+<g id="graph0" class="graph">
+<g id="node1" class="node"><title>a</title></g>
+<g id="node2" class="node"><title>b</title></g>
+<g id="edge1" class="edge"><title>a&#45;&gt;b</title></g>
+</g>
+</svg>
+"""
+
+
+@pytest.fixture
+def fake_dot(monkeypatch):
+	"stand-in for `dot` which always produces `SVG`, recording its arguments"
+	calls: list[list[str]] = []
+
+	def _run(args, **kwargs):
+		calls.append(args)
+		if "-o" in args:
+			with open(args[args.index("-o") + 1], "w", encoding="utf-8") as f:
+				f.write(SVG)
+			return subprocess.CompletedProcess(args, 0)
+		return subprocess.CompletedProcess(args, 0, stdout=SVG.encode("utf-8"))
+
+	monkeypatch.setattr(dep_graph_viz.dot.subprocess, "run", _run)
+	return calls
+
+
+def _config(layout: str) -> dict:
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["html"]["layout"] = layout
+	config["render_cache"]["enabled"] = False
+	return config
+
+
+def _graph() -> nx.MultiDiGraph:
+	G = nx.MultiDiGraph()
+	G.add_edge("a", "b", key="uses", color="red")
+	return G
+
+
+def test_render_html_svg():
+	html: str = render_html_svg(SVG)
+	assert '<div id="graph"><svg width="62pt"' in html
+	assert "<?xml" not in html and "<!DOCTYPE svg" not in html
+	# nothing is laid out in the browser
+	assert "d3-graphviz" not in html and "wasm" not in html
+	assert "$$" not in html
+
+
+def test_render_html_layouts(fake_dot):
+	browser: str = render_html("digraph { a -> b }")
+	assert "d3-graphviz" in browser and "digraph { a -> b }" in browser
+	assert fake_dot == []
+
+	server: str = render_html("digraph { a -> b }", layout="server")
+	assert '<g id="edge1" class="edge">' in server
+	assert "digraph" not in server
+	assert fake_dot == [["dot", "-Tsvg"]]
+
+	with pytest.raises(ValueError, match="unknown html layout"):
+		render_html("digraph {}", layout="client")
+
+
+def test_write_outputs_reuses_svg(tmp_path, fake_dot):
+	paths = write_outputs(
+		_graph(), output=str(tmp_path / "out"), output_fmt="svg,html", config=_config("server")
+	)
+	# one layout, shared by the svg and the html
+	assert len(fake_dot) == 1
+	html: str = open(paths["html"], encoding="utf-8").read()
+	assert '<g id="edge1" class="edge">' in html
+
+
+def test_write_outputs_html_only(tmp_path, fake_dot):
+	paths = write_outputs(
+		_graph(), output=str(tmp_path / "out"), output_fmt="html", config=_config("server")
+	)
+	assert fake_dot == [["dot", "-Tsvg"]]
+	assert "<svg" in open(paths["html"], encoding="utf-8").read()
+
+
+@pytest.mark.skipif(shutil.which("dot") is None, reason="graphviz not installed")
+def test_server_layout_with_graphviz():
+	html: str = render_html('digraph { "pkg/a.py" -> b }', layout="server")
+	assert "<svg" in html and 'class="edge"' in html
+	assert "pkg/a.py&#45;&gt;b" in html
+
+
+def test_html_embeds_adjacency_index(tmp_path):
+	paths = write_outputs(
+		_graph(), output=str(tmp_path / "out"), output_fmt="html", config=_config("browser")
+	)
+	html: str = open(paths["html"], encoding="utf-8").read()
+	assert (
+		"const adjacencyPayload = "
+		+ encode_payload(adjacency_index(_graph()))
+		in html
+	)
+	assert "function attachHighlighting" in html
+	assert "$$" not in html
+	# the DOT gives the elements the ids the index refers to
+	assert "id=n0" in html and "id=e0" in html
+
+
+# fake svg elements, enough for `highlight.js`
+_JS_HARNESS: str = """
+class Element {
+	constructor(id, title) { this.id = id; this.title = title; this.classes = new Set(); this.listeners = {}; }
+	get classList() {
+		return { add: (c) => this.classes.add(c), remove: (c) => this.classes.delete(c) };
+	}
+	addEventListener(event, fn) { this.listeners[event] = fn; }
+	querySelector() { return { textContent: this.title }; }
+}
+const names = ["a", "b", "c", "d"];
+const pairs = [[0, 1], [1, 2], [2, 3], [3, 0]];
+const nodes = names.map((name, i) => new Element("n" + i, name));
+const edges = pairs.map(([u, v], j) => new Element("e" + j, names[u] + "->" + names[v]));
+const byId = new Map([...nodes, ...edges].map((el) => [el.id, el]));
+const svg = {
+	getElementById: (id) => byId.get(id),
+	querySelectorAll: (selector) => (selector === "g.node" ? nodes : edges),
+};
+const controls = { hops: { value: "1" }, direction: { value: "both" } };
+const document = { getElementById: (id) => controls[id] };
+const highlighted = () => ({
+	edges: edges.filter((e) => e.classes.has("highlighted")).map((e) => e.id),
+	nodes: nodes.filter((n) => n.classes.has("neighbor")).map((n) => n.id),
+});
+const results = [];
+const adjacency = ADJACENCY;
+attachHighlighting(svg, adjacency);
+for (const [hops, direction] of [["1", "both"], ["2", "out"], ["3", "in"]]) {
+	controls.hops.value = hops;
+	controls.direction.value = direction;
+	nodes[0].listeners.mouseover();
+	results.push(highlighted());
+	nodes[0].listeners.mouseout();
+}
+results.push(highlighted());
+console.log(JSON.stringify(results));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+@pytest.mark.parametrize("precomputed", [True, False])
+def test_highlight_script(tmp_path, precomputed):
+	G = nx.MultiDiGraph()
+	for u, v in [("a", "b"), ("b", "c"), ("c", "d"), ("d", "a")]:
+		G.add_edge(u, v, key="uses")
+	script: str = (
+		importlib.resources.files("dep_graph_viz").joinpath("highlight.js").read_text()
+	)
+	harness: str = _JS_HARNESS.replace(
+		"ADJACENCY", json.dumps(adjacency_index(G)) if precomputed else "null"
+	)
+	(tmp_path / "test.js").write_text(script + harness)
+	result = subprocess.run(
+		["node", str(tmp_path / "test.js")], capture_output=True, text=True, check=True
+	)
+	assert json.loads(result.stdout) == [
+		# direct neighbours both ways
+		{"edges": ["e0", "e3"], "nodes": ["n1", "n3"]},
+		# two hops downstream
+		{"edges": ["e0", "e1"], "nodes": ["n1", "n2"]},
+		# three hops upstream
+		{"edges": ["e1", "e2", "e3"], "nodes": ["n1", "n2", "n3"]},
+		# cleared on mouseout
+		{"edges": [], "nodes": []},
+	]
+
+
+def _decode(payload: str):
+	"what `loadPayload` resolves to"
+	parsed = json.loads(payload)
+	if parsed is None or parsed["encoding"] == "identity":
+		return parsed and parsed["data"]
+	text: str = gzip.decompress(base64.b64decode(parsed["data"])).decode("utf-8")
+	return json.loads(text) if parsed["json"] else text
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_encode_payload(compress):
+	dot: str = 'digraph { a [label=<<b>a</b>>]; a -> b } </script><!-- ' * 100
+	adjacency: dict = adjacency_index(_graph())
+	for value in [adjacency, None, dot]:
+		payload: str = encode_payload(value, compress=compress)
+		# safe inside a script tag
+		assert "</" not in payload and "<!--" not in payload
+		assert _decode(payload) == value
+	if compress:
+		assert len(payload) < len(dot) / 5
+	# the same input gives the same page
+	assert encode_payload(dot, compress=compress) == encode_payload(dot, compress=compress)
+
+
+def test_render_html_compressed(fake_dot):
+	adjacency: dict = adjacency_index(_graph())
+	browser: str = render_html("digraph { a -> b }", adjacency=adjacency, compress=True)
+	assert "digraph" not in browser and "gzip+base64" in browser
+	assert "$$" not in browser
+
+	server: str = render_html("digraph { a -> b }", layout="server", compress=True)
+	assert '<div id="graph"></div>' in server
+	assert "<svg" not in server and "gzip+base64" in server
+	assert "$$" not in server
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+def test_load_payload_script(tmp_path):
+	script: str = (
+		importlib.resources.files("dep_graph_viz").joinpath("payload.js").read_text()
+	)
+	values: list = ["digraph { a -> b }", adjacency_index(_graph()), None]
+	payloads: str = ", ".join(
+		encode_payload(value, compress=compress)
+		for value in values
+		for compress in [False, True]
+	)
+	(tmp_path / "test.js").write_text(
+		script
+		+ f"Promise.all([{payloads}].map(loadPayload))"
+		+ ".then((values) => console.log(JSON.stringify(values)));"
+	)
+	result = subprocess.run(
+		["node", str(tmp_path / "test.js")], capture_output=True, text=True, check=True
+	)
+	assert json.loads(result.stdout) == [value for value in values for _ in range(2)]
+
+
+# what `dot -Tjson` gives for `digraph { subgraph s { a [id=n0, URL="http://a"] } b [id=n1]; a -> b [id=e0] }`
+LAYOUT: dict = {
+	"name": "%3",
+	"directed": True,
+	"bb": "0,0,54,108",
+	"_draw_": [
+		{"op": "c", "grad": "none", "color": "#fffffe00"},
+		{"op": "C", "grad": "none", "color": "#ffffff"},
+		{"op": "P", "points": [[0, 0], [0, 108], [54, 108], [54, 0]]},
+	],
+	"_subgraph_cnt": 1,
+	"objects": [
+		{"name": "s", "_gvid": 0, "nodes": [1]},
+		{
+			"_gvid": 1,
+			"name": "a",
+			"id": "n0",
+			"URL": "http://a",
+			"_draw_": [
+				{"op": "c", "grad": "none", "color": "#000000"},
+				{"op": "e", "rect": [27, 90, 27, 18]},
+			],
+			"_ldraw_": [
+				{"op": "F", "size": 14, "face": "Times-Roman"},
+				{"op": "c", "grad": "none", "color": "#000000"},
+				{"op": "T", "pt": [27, 86.3], "align": "c", "width": 7, "text": "a"},
+			],
+		},
+		{
+			"_gvid": 2,
+			"name": "b",
+			"id": "n1",
+			"_draw_": [
+				{"op": "c", "grad": "none", "color": "#000000"},
+				{"op": "p", "points": [[0, 0], [54, 0], [54, 36], [0, 36]]},
+			],
+		},
+	],
+	"edges": [
+		{
+			"_gvid": 0,
+			"tail": 1,
+			"head": 2,
+			"id": "e0",
+			"_draw_": [
+				{"op": "c", "grad": "none", "color": "red"},
+				{"op": "S", "style": "setlinewidth(2)"},
+				{"op": "b", "points": [[27, 72], [27, 64], [27, 55], [27, 46]]},
+			],
+			"_hdraw_": [
+				{"op": "S", "style": "solid"},
+				{"op": "C", "grad": "none", "color": "red"},
+				{"op": "P", "points": [[30, 46], [27, 36], [24, 46]]},
+			],
+		}
+	],
+}
+
+
+def test_canvas_geometry():
+	geometry: dict = canvas_geometry(LAYOUT)
+	assert (geometry["width"], geometry["height"]) == (54, 108)
+	# the background of the graph, the subgraph draws nothing
+	assert geometry["background"][2] == ["p", True, True, 0, 108, 0, 0, 54, 0, 54, 108]
+
+	(a, b) = geometry["nodes"]
+	assert a[0] == 0 and a[3:] == ["http://a", "a"]
+	# `y` points down
+	assert a[2] == [
+		["c", "#000000"],
+		["e", False, 27, 18, 27, 18],
+		["F", 14, "Times-Roman"],
+		["c", "#000000"],
+		["T", 27, 21.7, "c", "a"],
+	]
+	assert a[1][0] <= 0 and a[1][1] <= 0 and a[1][2] >= 54 and a[1][3] >= 36
+	assert b[:2] == [1, [0, 72, 54, 108]] and b[3] is None
+
+	((j, tail, head, bbox, ops),) = geometry["edges"]
+	assert (j, tail, head) == (0, 0, 1)
+	assert bbox == [24, 36, 30, 72]
+	assert ["w", 2.0] in ops and ["d", ""] in ops and ["C", "red"] in ops
+	assert ["b", False, 27, 36, 27, 44, 27, 53, 27, 62] in ops
+
+
+def _grid_layout(n: int) -> dict:
+	"`-Tjson` output for an `n` by `n` grid of nodes, each with an edge to its right and lower neighbours"
+	size: float = 100.0 * n
+
+	def node(k: int) -> dict:
+		x, y = 50 + 100 * (k % n), size - 50 - 100 * (k // n)
+		return {
+			"_gvid": k,
+			"name": f"m{k}",
+			"id": f"n{k}",
+			"_draw_": [{"op": "e", "rect": [x, y, 27, 18]}],
+			"_ldraw_": [
+				{"op": "F", "size": 14, "face": "Times-Roman"},
+				{"op": "T", "pt": [x, y - 4], "align": "c", "width": 20, "text": f"m{k}"},
+			],
+		}
+
+	def edge(j: int, u: int, v: int) -> dict:
+		(x0, y0), (x1, y1) = [
+			(50 + 100 * (k % n), size - 50 - 100 * (k // n)) for k in (u, v)
+		]
+		points = [[x0 + (x1 - x0) * t / 3, y0 + (y1 - y0) * t / 3] for t in range(4)]
+		return {
+			"_gvid": j,
+			"tail": u,
+			"head": v,
+			"id": f"e{j}",
+			"_draw_": [{"op": "b", "points": points}],
+		}
+
+	pairs: list[tuple[int, int]] = [
+		(k, k + step)
+		for k in range(n * n)
+		for step in (1, n)
+		if (step == n and k + n < n * n) or (step == 1 and k % n < n - 1)
+	]
+	return {
+		"bb": f"0,0,{size},{size}",
+		"objects": [node(k) for k in range(n * n)],
+		"edges": [edge(j, u, v) for j, (u, v) in enumerate(pairs)],
+	}
+
+
+# just enough of the DOM and canvas for `template_canvas.html`, counting what is drawn
+_CANVAS_HARNESS: str = """
+const counts = {};
+const strokeStyles = new Set();
+const count = (name) => counts[name] = (counts[name] || 0) + 1;
+const fakeContext = new Proxy({}, {
+	get: (target, name) => name in target ? target[name] : (...args) => count(name),
+	set: (target, name, value) => { if (name === "strokeStyle") strokeStyles.add(value); target[name] = value; return true; },
+});
+class Path2D {
+	moveTo() { count("path.moveTo"); }
+	lineTo() { count("path.lineTo"); }
+	rect() { count("path.rect"); }
+}
+const listeners = {};
+const fakeCanvas = {
+	clientWidth: 800, clientHeight: 600, width: 0, height: 0,
+	getContext: () => fakeContext,
+	getBoundingClientRect: () => ({ left: 0, top: 0 }),
+	addEventListener: (event, fn) => listeners[event] = fn,
+	classList: { add() {}, remove() {}, toggle() {} },
+};
+const window = { devicePixelRatio: 1, addEventListener: (event, fn) => listeners["window." + event] = fn };
+const controls = { hops: { value: "1" }, direction: { value: "both" } };
+const document = { getElementById: (id) => id === "graph" ? fakeCanvas : controls[id] };
+let frame = null;
+const requestAnimationFrame = (fn) => frame = fn;
+const results = [];
+function drawFrame() {
+	for (const key in counts) delete counts[key];
+	strokeStyles.clear();
+	frame();
+	results.push({ ...counts, red: strokeStyles.has("red") });
+}
+"""
+
+_CANVAS_STEPS: str = """
+function steps() {
+	if (frame === null) {
+		// still decompressing
+		setTimeout(steps, 1);
+		return;
+	}
+	// fitted
+	drawFrame();
+	// zoomed in on the first node, and hovering it
+	listeners.wheel({ preventDefault() {}, clientX: NODE_X, clientY: NODE_Y, deltaY: -3000 });
+	drawFrame();
+	listeners["window.mousemove"]({ target: fakeCanvas, clientX: NODE_X, clientY: NODE_Y });
+	drawFrame();
+	// zoomed far out
+	listeners["window.mousemove"]({ target: null, clientX: 0, clientY: 0 });
+	listeners.wheel({ preventDefault() {}, clientX: NODE_X, clientY: NODE_Y, deltaY: 6000 });
+	drawFrame();
+	console.log(JSON.stringify(results));
+}
+steps();
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+@pytest.mark.parametrize("compress", [False, True])
+def test_canvas_page_culls_and_simplifies(tmp_path, compress):
+	n: int = 20
+	n_edges: int = 2 * n * (n - 1)
+	html: str = render_html_canvas(json.dumps(_grid_layout(n)), compress=compress)
+	assert "$$" not in html
+	scripts: list[str] = re.findall(r"<script>(.*?)</script>", html, re.DOTALL)
+	# where the first node is once the graph is fitted to the 800x600 canvas
+	scale: float = 600 / (100 * n) * 0.95
+	steps: str = _CANVAS_STEPS.replace(
+		"NODE_X", str(50 * scale + (800 - 100 * n * scale) / 2)
+	).replace("NODE_Y", str(50 * scale + (600 - 100 * n * scale) / 2))
+	(tmp_path / "test.js").write_text(_CANVAS_HARNESS + "\n".join(scripts) + steps)
+	result = subprocess.run(
+		["node", str(tmp_path / "test.js")], capture_output=True, text=True, check=True
+	)
+	fitted, zoomed, hovered, far = json.loads(result.stdout)
+
+	# fitted: every edge as one batched straight line, no labels
+	assert fitted["path.lineTo"] == n_edges
+	assert fitted["ellipse"] == n * n
+	assert "bezierCurveTo" not in fitted and "fillText" not in fitted
+
+	# zoomed in: full detail, but only for the few nodes and edges in view
+	assert 0 < zoomed["bezierCurveTo"] < n_edges / 20
+	assert 0 < zoomed["fillText"] < n * n / 20
+	assert "path.lineTo" not in zoomed
+
+	# the hovered node's edges are drawn in red on top
+	assert hovered["red"] and not zoomed["red"]
+
+	# zoomed far out: thin edges are hidden, and nodes drawn as boxes
+	assert "path.lineTo" not in far and "ellipse" not in far
+	assert far["path.rect"] == n * n
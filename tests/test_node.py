@@ -0,0 +1,74 @@
+from copy import deepcopy
+
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import Node, build_graph, node_url
+from dep_graph_viz.util.cache import ImportCache
+
+
+@pytest.fixture
+def pkg(tmp_path, monkeypatch):
+	pkg = tmp_path / "pkg"
+	(pkg / "sub").mkdir(parents=True)
+	(pkg / "__init__.py").write_text("")
+	(pkg / "sub" / "__init__.py").write_text("")
+	(pkg / "sub" / "a.py").write_text("from pkg.sub import b\n")
+	(pkg / "sub" / "b.py").write_text("import os\n")
+	monkeypatch.chdir(pkg)
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["PACKAGE_NAME"] = "pkg"
+	return config
+
+
+def test_node_is_compact(pkg):
+	node = Node.get_node("sub/a.py", config=pkg, node_id=3)
+	assert not hasattr(node, "__dict__")
+	assert not hasattr(node, "config")
+	assert node.id == 3
+	assert hash(node) == 3
+	assert node.rel_path == "sub/a.py"
+	assert node.parent_dir == "sub"
+	assert node.aliases == {"sub/a.py", "sub.a"}
+
+	other = Node.get_node("sub/b.py", config=pkg)
+	# strings shared between nodes are interned
+	assert node.parent_dir is other.parent_dir
+	with pytest.raises(AttributeError):
+		node.rel_path = "x"
+
+
+def test_node_equality_by_id(pkg):
+	a = Node.get_node("sub/a.py", config=pkg, node_id=0)
+	b = Node.get_node("sub/b.py", config=pkg, node_id=1)
+	assert a == Node.get_node("sub/a.py", config=pkg, node_id=0)
+	assert a != b
+	assert a != "sub.a"
+	assert len({a, b}) == 2
+	# the same id in another graph is another node
+	other = Node.get_node("sub/b.py", config=pkg, node_id=0)
+	assert hash(other) == hash(a)
+	assert a != other
+	assert len({a, other}) == 2
+
+
+def test_node_str(pkg):
+	assert str(Node.get_node("sub/a.py", config=pkg)) == '"sub.a"'
+	assert str(Node.get_node(".", config=pkg)) == pkg["root_node_name"]
+	pkg["git_remote_url"] = "https://example.com/pkg"
+	assert str(Node.get_node(".", config=pkg)) == '"https://example.com/pkg"'
+
+
+def test_node_url(pkg):
+	node = Node.get_node("sub/a.py", config=pkg)
+	assert node_url(node, pkg) is None
+	pkg["url_prefix"] = "https://example.com/blob/main/"
+	pkg["auto_url_replace"] = {"/blob/main/": "/tree/main/"}
+	assert node_url(node, pkg) == "https://example.com/tree/main/sub/a.py"
+
+
+def test_build_graph_dense_ids(pkg):
+	G = build_graph(".", pkg, import_cache=ImportCache(cache_dir=None))
+	ids = sorted(node.id for node in G.nodes if isinstance(node, Node))
+	assert ids == list(range(len(ids)))
+	assert G.graph["config"] is pkg
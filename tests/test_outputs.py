@@ -0,0 +1,118 @@
+import subprocess
+import threading
+from copy import deepcopy
+
+import networkx as nx
+import pytest
+
+import dep_graph_viz.dot
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import main, output_formats, write_outputs
+
+
+def _config() -> dict:
+	config = deepcopy(_DEFAULT_CONFIG)
+	# `graphviz_version` would run the fake `dot`
+	config["render_cache"]["enabled"] = False
+	return config
+
+
+@pytest.fixture
+def graph():
+	G = nx.MultiDiGraph()
+	G.add_node("a", shape="box")
+	G.add_edge("a", "b", key="uses", color="red")
+	return G
+
+
+@pytest.fixture
+def fake_dot(monkeypatch):
+	"record `dot` calls, which must run concurrently, and write the output file they ask for"
+	calls: list[dict] = []
+	barrier = threading.Barrier(2, timeout=5)
+	real_run = subprocess.run
+
+	def _run(args, **kwargs):
+		if not (isinstance(args, list) and args[0] == "dot"):
+			return real_run(args, **kwargs)
+		calls.append(dict(args=args, **kwargs))
+		# both formats have to be in flight at once to get past this
+		barrier.wait()
+		output_path: str = args[args.index("-o") + 1]
+		with open(output_path, "wb") as f:
+			f.write(args[1].encode() + b"\n" + kwargs["input"])
+		return subprocess.CompletedProcess(args, 0, stdout=None, stderr=b"")
+
+	monkeypatch.setattr(dep_graph_viz.dot.subprocess, "run", _run)
+	return calls
+
+
+def test_output_formats():
+	assert output_formats("svg") == ["svg"]
+	assert output_formats("svg, PNG,svg") == ["svg", "png"]
+	assert output_formats(("svg", "html")) == ["svg", "html"]
+	with pytest.raises(ValueError):
+		output_formats(",")
+
+
+def test_write_outputs_many_formats(graph, tmp_path, fake_dot):
+	output = str(tmp_path / "out")
+	paths = write_outputs(
+		graph, output=output, output_fmt=["svg", "png", "html"], config=_config()
+	)
+	assert paths == {
+		"dot": f"{output}.dot",
+		"svg": f"{output}.svg",
+		"png": f"{output}.png",
+		"html": f"{output}.html",
+	}
+
+	dot: str = (tmp_path / "out.dot").read_text()
+	assert dot.startswith("digraph")
+	assert sorted(call["args"][1] for call in fake_dot) == ["-Tpng", "-Tsvg"]
+	for call in fake_dot:
+		# argv list with the DOT on stdin, not a command string reading the file
+		assert call["args"] == ["dot", call["args"][1], "-o", call["args"][3]]
+		assert call["input"] == dot.encode("utf-8")
+		assert call.get("shell", False) is False
+	assert (tmp_path / "out.svg").read_bytes() == b"-Tsvg\n" + dot.encode("utf-8")
+	assert "digraph" in (tmp_path / "out.html").read_text()
+
+
+def test_dot_failure(graph, tmp_path, monkeypatch):
+	def _fail(args, **kwargs):
+		raise subprocess.CalledProcessError(1, args, stderr=b"syntax error")
+
+	monkeypatch.setattr(dep_graph_viz.dot.subprocess, "run", _fail)
+	with pytest.raises(RuntimeError, match="syntax error"):
+		write_outputs(
+			graph, output=str(tmp_path / "out"), output_fmt="svg", config=_config()
+		)
+
+
+def test_main_builds_once(tmp_path, monkeypatch):
+	import dep_graph_viz.dep_graph_viz as dgv
+
+	pkg = tmp_path / "pkg"
+	pkg.mkdir()
+	(pkg / "__init__.py").write_text("")
+	(pkg / "a.py").write_text("import os\n")
+	builds: list = []
+	build_graph = dgv.build_graph
+
+	def _counting_build_graph(*args, **kwargs):
+		builds.append(args)
+		return build_graph(*args, **kwargs)
+
+	monkeypatch.setattr(dgv, "build_graph", _counting_build_graph)
+	main(
+		root=str(pkg),
+		output=str(tmp_path / "out"),
+		output_fmt="dot,html",
+		auto_url_format=None,
+		import_cache={"enabled": False},
+		no_render_cache=True,
+	)
+	assert len(builds) == 1
+	assert (tmp_path / "out.dot").read_text().startswith("digraph")
+	assert "digraph" in (tmp_path / "out.html").read_text()
@@ -0,0 +1,136 @@
+import random
+
+import networkx as nx
+import pytest
+
+from dep_graph_viz import build_graph_for
+from dep_graph_viz.csr import CSRBuilder
+from dep_graph_viz.reduction import (
+	import_reachability,
+	strongly_connected_components,
+	transitive_reduction,
+)
+
+
+def _random_graph(seed: int, n: int = 30, p: float = 0.06, dag: bool = False) -> nx.MultiDiGraph:
+	"random import graph, plus hierarchy edges and some parallel `inits` edges"
+	rng = random.Random(seed)
+	G = nx.MultiDiGraph()
+	G.add_nodes_from(range(n))
+	for u in range(n):
+		for v in range(n):
+			if u != v and (not dag or u < v) and rng.random() < p:
+				G.add_edge(u, v, key="uses", color="red")
+				if rng.random() < 0.2:
+					G.add_edge(u, v, key="inits")
+		if u > 0:
+			G.add_edge(rng.randrange(u), u, key="hierarchy")
+	G.add_edge(0, 0, key="uses")
+	return G
+
+
+def _import_graph(G) -> nx.DiGraph:
+	D = nx.DiGraph()
+	D.add_nodes_from(G.nodes())
+	D.add_edges_from((u, v) for u, v, key in G.edges(keys=True) if key != "hierarchy")
+	return D
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_strongly_connected_components(seed):
+	D = _import_graph(_random_graph(seed))
+	successors = [list(D.successors(i)) for i in range(len(D))]
+	component = strongly_connected_components(successors)
+	assert {
+		frozenset(i for i in D if component[i] == c) for c in set(component)
+	} == {frozenset(scc) for scc in nx.strongly_connected_components(D)}
+	# numbered in reverse topological order
+	assert all(component[u] >= component[v] for u, v in D.edges)
+
+
+def test_strongly_connected_components_deep_chain():
+	n = 20_000
+	component = strongly_connected_components([[i + 1] for i in range(n - 1)] + [[0]])
+	assert set(component) == {0}
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_reachability_unchanged(seed):
+	G = _random_graph(seed)
+	H, stats = transitive_reduction(G)
+	assert stats.removed > 0
+	assert stats.import_edges == sum(key != "hierarchy" for _, _, key in G.edges(keys=True))
+	assert H.number_of_edges() == G.number_of_edges() - stats.removed
+	assert H.graph["transitive_reduction"] == stats
+
+	reach = import_reachability(G)
+	assert import_reachability(H) == reach
+	D = _import_graph(G)
+	for node in G:
+		assert reach[node] - {node} == nx.descendants(D, node)
+
+	# hierarchy edges and self loops are kept as they are
+	assert [e for e in H.edges(keys=True, data=True) if e[2] == "hierarchy" or e[0] == e[1]] == [
+		e for e in G.edges(keys=True, data=True) if e[2] == "hierarchy" or e[0] == e[1]
+	]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_minimal(seed):
+	G = _random_graph(seed)
+	H, _ = transitive_reduction(G)
+	reach = import_reachability(H)
+	successors = [list(_import_graph(H).successors(i)) for i in range(len(H))]
+	component = strongly_connected_components(successors)
+	for u, v, key in list(H.edges(keys=True)):
+		if key == "hierarchy" or component[u] == component[v]:
+			continue
+		# every edge between components is needed
+		K = H.copy()
+		K.remove_edges_from([(u, v, k) for k in list(K[u][v])])
+		assert import_reachability(K) != reach
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_networkx_on_dags(seed):
+	G = _random_graph(seed, p=0.2, dag=True)
+	G.remove_edge(0, 0)
+	H, _ = transitive_reduction(G)
+	assert set(_import_graph(H).edges) == set(nx.transitive_reduction(_import_graph(G)).edges)
+
+
+def test_csr_graph():
+	G = _random_graph(0)
+	builder = CSRBuilder()
+	for node in G.nodes():
+		builder.add_node(node)
+	for u, v, key, attrs in G.edges(keys=True, data=True):
+		builder.add_edge(u, v, key=key, **attrs)
+	H, stats = transitive_reduction(builder.build())
+	expected, expected_stats = transitive_reduction(G)
+	assert stats == expected_stats
+	assert list(H.edges(keys=True)) == list(expected.edges(keys=True))
+
+
+@pytest.mark.parametrize("engine", ["networkx", "csr"])
+def test_build_graph_transitive_reduction(tmp_path, engine):
+	pkg = tmp_path / "pkg"
+	pkg.mkdir()
+	(pkg / "__init__.py").write_text("")
+	(pkg / "x.py").write_text("from pkg import y, z\n")
+	(pkg / "y.py").write_text("from pkg import z\n")
+	(pkg / "z.py").write_text("")
+	config = {
+		"auto_url_format": None,
+		"graph": {"workers": 1, "engine": engine, "transitive_reduction": True},
+		"import_cache": {"enabled": False},
+	}
+	G = build_graph_for(str(pkg), config)
+	edges = {(str(u), str(v), key) for u, v, key in G.edges(keys=True)}
+	assert ('"z"', '"y"', "uses") in edges and ('"y"', '"x"', "uses") in edges
+	# implied by the two above
+	assert ('"z"', '"x"', "uses") not in edges
+	assert ("ROOT", '"z"', "hierarchy") in edges
+	assert G.graph["transitive_reduction"].summary() == (
+		"transitive reduction removed 1 of 3 import edges"
+	)
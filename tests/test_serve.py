@@ -0,0 +1,227 @@
+import json
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import dep_graph_viz.serve as serve
+from dep_graph_viz.serve import (
+	Coalescer,
+	GraphServer,
+	GraphService,
+	LRUCache,
+	parse_overrides,
+)
+
+OVERRIDES: str = "auto_url_format=null&graph.include_externals=true"
+
+
+@pytest.fixture
+def pkg(tmp_path):
+	files: dict[str, str] = {
+		"pkg/__init__.py": "from pkg import a\n",
+		"pkg/a.py": "import os\nfrom pkg.sub import b\n",
+		"pkg/sub/__init__.py": "",
+		"pkg/sub/b.py": "import json\n",
+	}
+	for path, content in files.items():
+		(tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+		(tmp_path / path).write_text(content)
+	return tmp_path / "pkg"
+
+
+@pytest.fixture
+def server():
+	server = GraphServer(("127.0.0.1", 0), GraphService(max_entries=8), quiet=True)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+def _get(server, query: str, path: str = "/graph") -> tuple[int, dict, bytes]:
+	url = f"http://127.0.0.1:{server.server_address[1]}{path}?{query}"
+	try:
+		with urllib.request.urlopen(url) as response:
+			return response.status, dict(response.headers), response.read()
+	except urllib.error.HTTPError as e:
+		return e.code, dict(e.headers), e.read()
+
+
+def test_cache_hit_and_invalidation(server, pkg):
+	status, headers, body = _get(server, f"root={pkg}&{OVERRIDES}")
+	assert status == 200
+	assert headers["X-Cache"] == "miss"
+	assert headers["Content-Type"].startswith("text/vnd.graphviz")
+	assert body.startswith(b"digraph")
+
+	status, headers, body_again = _get(server, f"root={pkg}&{OVERRIDES}")
+	assert headers["X-Cache"] == "hit"
+	assert body_again == body
+
+	# a changed config is a different entry
+	_, headers, body_lr = _get(server, f"root={pkg}&{OVERRIDES}&dot_attrs.rankdir=LR")
+	assert headers["X-Cache"] == "miss"
+	assert b"LR" in body_lr
+
+	# editing a file invalidates
+	time.sleep(0.01)
+	(pkg / "sub" / "b.py").write_text("import json\nimport csv\n")
+	_, headers, body_edited = _get(server, f"root={pkg}&{OVERRIDES}")
+	assert headers["X-Cache"] == "miss"
+	assert b"csv" in body_edited
+
+	_, _, stats = _get(server, "", path="/stats")
+	stats = json.loads(stats)
+	assert stats["builds"] == 3
+	assert stats["output_hits"] == 1
+
+
+def test_json_and_html(server, pkg):
+	status, headers, body = _get(server, f"root={pkg}&{OVERRIDES}&format=json")
+	assert status == 200
+	data = json.loads(body)
+	ids = {node["id"] for node in data["nodes"]}
+	assert {"a", "sub.b", "os", "json"} <= ids
+	assert {
+		(e["source"], e["target"], e["key"]) for e in data["edges"]
+	} >= {("os", "a", "external"), ("sub.b", "a", "uses")}
+
+	status, headers, body = _get(server, f"root={pkg}&{OVERRIDES}&format=html")
+	assert status == 200
+	assert headers["Content-Type"].startswith("text/html")
+	assert b"digraph" in body
+
+
+@pytest.mark.skipif(shutil.which("dot") is None, reason="graphviz not installed")
+def test_svg(server, pkg):
+	status, headers, body = _get(server, f"root={pkg}&{OVERRIDES}&format=svg")
+	assert status == 200
+	assert b"<svg" in body
+
+
+@pytest.mark.parametrize(
+	"query, status",
+	[
+		("format=svg", 400),
+		(f"root=/no/such/dir&{OVERRIDES}", 404),
+		("root=.&format=pdf", 400),
+		(f"root=/no/such/dir&{OVERRIDES}&import_cache.dir=/tmp", 400),
+	],
+)
+def test_errors(server, query, status):
+	got, _, body = _get(server, query)
+	assert got == status
+	assert "error" in json.loads(body)
+
+
+def test_unknown_path(server):
+	assert _get(server, "", path="/nope")[0] == 404
+
+
+def test_allowed_root(pkg, tmp_path):
+	service = GraphService(allowed_root=str(pkg / "sub"))
+	with pytest.raises(PermissionError):
+		service.render(root=str(pkg), overrides=parse_overrides({"auto_url_format": "null"}))
+
+
+def test_concurrent_requests_build_once(pkg, monkeypatch):
+	builds: list[str] = []
+	build_graph_for = serve.build_graph_for
+
+	def _slow_build(root, config=None, **kwargs):
+		builds.append(root)
+		# the service's own settings, not the on-disk cache or a process pool per request
+		assert config["graph"]["workers"] == 1
+		assert kwargs["import_cache"].cache_dir is None
+		time.sleep(0.2)
+		return build_graph_for(root, config, **kwargs)
+
+	monkeypatch.setattr(serve, "build_graph_for", _slow_build)
+	service = GraphService()
+	overrides = parse_overrides({"auto_url_format": "null"})
+	results: list[bytes] = []
+
+	def _request():
+		results.append(service.render(root=str(pkg), overrides=overrides)[0])
+
+	threads = [threading.Thread(target=_request) for _ in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	assert len(builds) == 1
+	assert len(results) == 8
+	assert len(set(results)) == 1
+
+
+def test_parse_overrides():
+	assert parse_overrides(
+		{
+			"root": "x",
+			"format": "svg",
+			"edge.uses.color": "green",
+			"graph.include_externals": "true",
+			"graph.collapse_overrides.sub": "null",
+		}
+	) == {
+		"edge": {"uses": {"color": "green"}},
+		"graph": {"include_externals": True, "collapse_overrides": {"sub": None}},
+	}
+
+
+@pytest.mark.parametrize(
+	"key", ["import_cache.dir", "render_cache.enabled", "graph.workers", "graph", "watch.interval"]
+)
+def test_parse_overrides_rejects_service_keys(key):
+	with pytest.raises(ValueError, match="can't be overridden"):
+		parse_overrides({key: "1"})
+
+
+def test_lru_cache():
+	cache: LRUCache[str, int] = LRUCache(max_entries=2)
+	cache.put("a", 1)
+	cache.put("b", 2)
+	assert cache.get("a") == 1
+	cache.put("c", 3)
+	assert cache.get("b") is None
+	assert cache.get("a") == 1
+	assert cache.get("c") == 3
+	assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_coalescer_propagates_errors():
+	coalescer = Coalescer()
+	started = threading.Event()
+	release = threading.Event()
+	errors: list[Exception] = []
+
+	def _fail():
+		started.set()
+		release.wait()
+		raise RuntimeError("boom")
+
+	def _run(fn):
+		try:
+			coalescer.run("key", fn)
+		except RuntimeError as e:
+			errors.append(e)
+
+	owner = threading.Thread(target=_run, args=(_fail,))
+	owner.start()
+	started.wait()
+	waiter = threading.Thread(target=_run, args=(lambda: None,))
+	waiter.start()
+	while coalescer.coalesced == 0:
+		time.sleep(0.001)
+	release.set()
+	owner.join()
+	waiter.join()
+	assert len(errors) == 2
+	# the key is free again once the computation is done
+	assert coalescer.run("key", lambda: 5) == 5
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES: tuple[str, ...] = ("networkx", "pydot", "importlib.metadata")
+
+# cumulative import time of the `dep_graph_viz` package itself, in microseconds. it takes around 20ms, and
+# took around 300ms when networkx and pydot were imported eagerly
+IMPORT_BUDGET_US: int = 100_000
+
+
+def _run(code: str, *args: str) -> subprocess.CompletedProcess:
+	return subprocess.run(
+		[sys.executable, *args, "-c", code],
+		cwd=REPO_ROOT,
+		capture_output=True,
+		text=True,
+		check=True,
+	)
+
+
+def _import_times(stderr: str) -> dict[str, int]:
+	"cumulative import time in microseconds for each module, from `-X importtime` output"
+	times: dict[str, int] = dict()
+	for line in stderr.splitlines():
+		if not line.startswith("import time:") or "cumulative" in line:
+			continue
+		_, cumulative, name = line.removeprefix("import time:").split("|")
+		times[name.strip()] = int(cumulative)
+	return times
+
+
+def test_import_time_budget():
+	# best of a few runs, so a busy machine doesn't fail the test
+	times: list[dict[str, int]] = [
+		_import_times(_run("import dep_graph_viz", "-X", "importtime").stderr)
+		for _ in range(3)
+	]
+	for heavy in HEAVY_MODULES:
+		assert heavy not in times[0]
+	best: int = min(t["dep_graph_viz"] for t in times)
+	assert best < IMPORT_BUDGET_US, f"import dep_graph_viz took {best / 1000:.1f}ms"
+
+
+@pytest.mark.parametrize(
+	"code",
+	[
+		"import dep_graph_viz.dep_graph_viz",
+		"from dep_graph_viz.util.util import get_imports",
+		"from dep_graph_viz import main; import dep_graph_viz.html",
+		"import dep_graph_viz.reduction",
+		"from dep_graph_viz import main\ntry:\n\tmain('.', print_cfg=True)\nexcept SystemExit:\n\tpass",
+	],
+)
+def test_no_heavy_imports(code: str):
+	result = _run(f"{code}\nimport sys\nprint(sorted(sys.modules))")
+	modules: str = result.stdout.splitlines()[-1]
+	for heavy in HEAVY_MODULES:
+		assert repr(heavy) not in modules
+
+
+def test_lazy_attributes():
+	import dep_graph_viz
+	from dep_graph_viz import html
+	from dep_graph_viz.dep_graph_viz import build_graph_for, main
+
+	assert dep_graph_viz.main is main
+	assert dep_graph_viz.build_graph_for is build_graph_for
+	assert "$$DOT_PAYLOAD$$" in html.HTML_TEMPLATE
+	with pytest.raises(AttributeError):
+		dep_graph_viz.not_an_attribute
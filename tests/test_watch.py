@@ -0,0 +1,199 @@
+import os
+from copy import deepcopy
+
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import build_graph
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.watch import FileChanges, GraphWatcher, graph_signature
+
+
+def _edges(G) -> set[tuple[str, str, str]]:
+	return {(str(u), str(v), key) for u, v, key in G.edges(keys=True)}
+
+
+def _write(path, content: str, mtime_s: int) -> None:
+	path.write_text(content)
+	os.utime(path, (mtime_s, mtime_s))
+
+
+@pytest.fixture
+def watched_package(tmp_path, monkeypatch):
+	pkg = tmp_path / "pkg"
+	pkg.mkdir()
+	_write(pkg / "__init__.py", "", 1000)
+	_write(pkg / "a.py", "import pkg.b\n", 1000)
+	_write(pkg / "b.py", "import os\n", 1000)
+	_write(pkg / "c.py", "", 1000)
+	monkeypatch.chdir(pkg)
+
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["PACKAGE_NAME"] = "pkg"
+	config["graph"]["include_externals"] = True
+	config["graph"]["workers"] = 1
+	import_cache = ImportCache(cache_dir=None)
+
+	def rebuild():
+		return build_graph(".", config, import_cache=import_cache)
+
+	watcher = GraphWatcher(
+		root=".",
+		config=config,
+		G=rebuild(),
+		rebuild=rebuild,
+		import_cache=import_cache,
+	)
+	return pkg, watcher, rebuild
+
+
+def test_file_changes_between():
+	old = {"a.py": (1, 1), "b.py": (1, 1), "c.py": (1, 1)}
+	new = {"a.py": (1, 1), "b.py": (2, 1), "d.py": (1, 1)}
+	changes = FileChanges.between(old, new)
+	assert changes.changed == ["b.py"]
+	assert changes.added == ["d.py"]
+	assert changes.removed == ["c.py"]
+	assert changes.is_structural()
+	assert not FileChanges.between(old, old)
+
+
+def test_watch_patches_changed_file(watched_package):
+	pkg, watcher, rebuild = watched_package
+	assert ('"b"', '"a"', "uses") in _edges(watcher.G)
+	misses_before = watcher.import_cache.misses
+
+	_write(pkg / "c.py", "import pkg.a\nimport json\n", 2000)
+	assert watcher.poll().changed == ["c.py"]
+	assert watcher.apply(watcher.wait_for_quiet(0.0))
+
+	# only the changed file was parsed
+	assert watcher.import_cache.misses == misses_before + 1
+	assert ('"a"', '"c"', "uses") in _edges(watcher.G)
+	assert ("json", '"c"', "external") in _edges(watcher.G)
+	# patched graph matches a full rebuild
+	assert graph_signature(watcher.G) == graph_signature(rebuild())
+
+
+def test_watch_removes_stale_edges_and_externals(watched_package):
+	pkg, watcher, rebuild = watched_package
+	assert "os" in {str(n) for n in watcher.G.nodes}
+
+	_write(pkg / "b.py", "\n", 2000)
+	assert watcher.apply(watcher.wait_for_quiet(0.0))
+	assert "os" not in {str(n) for n in watcher.G.nodes}
+	assert graph_signature(watcher.G) == graph_signature(rebuild())
+
+
+def test_watch_unchanged_graph(watched_package):
+	pkg, watcher, _ = watched_package
+	# a change to the file which doesn't change its imports
+	_write(pkg / "a.py", "import pkg.b\n# a comment\n", 2000)
+	assert watcher.poll()
+	assert not watcher.apply(watcher.wait_for_quiet(0.0))
+	assert not watcher.poll()
+
+
+def test_watch_added_and_removed_files(watched_package):
+	pkg, watcher, rebuild = watched_package
+	_write(pkg / "d.py", "import pkg.c\n", 2000)
+	assert watcher.apply(watcher.wait_for_quiet(0.0))
+	assert ('"c"', '"d"', "uses") in _edges(watcher.G)
+
+	(pkg / "a.py").unlink()
+	assert watcher.apply(watcher.wait_for_quiet(0.0))
+	assert '"a"' not in {str(n) for n in watcher.G.nodes}
+	assert graph_signature(watcher.G) == graph_signature(rebuild())
+
+
+def test_watch_run_renders_once_per_burst(watched_package):
+	pkg, watcher, _ = watched_package
+	rendered = []
+
+	# several saves before the poll are debounced into a single render
+	_write(pkg / "c.py", "import pkg.a\n", 2000)
+	_write(pkg / "c.py", "import pkg.a\nimport pkg.b\n", 3000)
+	_write(pkg / "b.py", "import sys\n", 3000)
+	watcher.run(on_change=rendered.append, interval=0.0, debounce=0.0, max_polls=3)
+	assert len(rendered) == 1
+	assert ('"b"', '"c"', "uses") in _edges(rendered[0])
+
+
+def test_watch_rebuilds_collapsed_graph(watched_package):
+	pkg, watcher, rebuild = watched_package
+	watcher.config["graph"]["collapse_depth"] = 0
+	watcher.G = rebuild()
+	assert watcher.G.graph["collapsed"]
+	assert _edges(watcher.G) == {("os", "ROOT", "external")}
+
+	_write(pkg / "c.py", "import json\n", 2000)
+	assert watcher.apply(watcher.wait_for_quiet(0.0))
+	assert _edges(watcher.G) == {("os", "ROOT", "external"), ("json", "ROOT", "external")}
+
+
+def test_watch_keeps_edges_of_unparseable_file(watched_package):
+	pkg, watcher, rebuild = watched_package
+	edges_before = _edges(watcher.G)
+
+	with pytest.warns(UserWarning, match="could not parse"):
+		_write(pkg / "a.py", "import pkg.c\ndef broken(:\n", 2000)
+		assert not watcher.apply(watcher.wait_for_quiet(0.0))
+	assert _edges(watcher.G) == edges_before
+	# not marked as seen, so it is retried
+	assert watcher.poll().changed == ["a.py"]
+
+	_write(pkg / "a.py", "import pkg.c\n", 3000)
+	assert watcher.apply(watcher.wait_for_quiet(0.0))
+	assert ('"c"', '"a"', "uses") in _edges(watcher.G)
+	assert graph_signature(watcher.G) == graph_signature(rebuild())
+
+
+def test_watch_run_survives_errors(watched_package):
+	pkg, watcher, _ = watched_package
+	watcher.config["graph"]["collapse_depth"] = 0
+	watcher.G = watcher.rebuild()
+	calls = []
+
+	def on_change(G):
+		calls.append(G)
+		if len(calls) == 1:
+			raise RuntimeError("dot failed")
+
+	# a rebuild which fails, then a render which fails, and the loop keeps going
+	_write(pkg / "c.py", "def broken(:\n", 2000)
+	with pytest.warns(UserWarning) as record:
+		watcher.run(on_change=on_change, interval=0.0, debounce=0.0, max_polls=2)
+		assert not calls
+		_write(pkg / "c.py", "import json\n", 3000)
+		watcher.run(on_change=on_change, interval=0.0, debounce=0.0, max_polls=1)
+	assert len(calls) == 1
+	assert watcher.pending_render
+	messages = [str(w.message) for w in record]
+	assert any("rebuild failed" in m for m in messages)
+	assert any("could not write outputs" in m for m in messages)
+
+	# an edit which leaves the graph as it is still gets the failed render retried
+	_write(pkg / "c.py", "import json\n# a comment\n", 4000)
+	watcher.run(on_change=on_change, interval=0.0, debounce=0.0, max_polls=1)
+	assert len(calls) == 2
+	assert not watcher.pending_render
+
+	# and once it succeeded, nothing is rendered without a change
+	watcher.run(on_change=on_change, interval=0.0, debounce=0.0, max_polls=2)
+	assert len(calls) == 2
+
+
+def test_watch_run_retries_failed_render_without_changes(watched_package):
+	pkg, watcher, _ = watched_package
+	calls = []
+
+	def on_change(G):
+		calls.append(G)
+		if len(calls) < 3:
+			raise RuntimeError("dot failed")
+
+	_write(pkg / "c.py", "import json\n", 2000)
+	with pytest.warns(UserWarning, match="will retry on the next poll"):
+		watcher.run(on_change=on_change, interval=0.0, debounce=0.0, max_polls=5)
+	assert len(calls) == 3
+	assert not watcher.pending_render
@@ -4,6 +4,19 @@ import subprocess
 from unittest.mock import patch
 
 from dep_graph_viz.config import _DEFAULT_CONFIG, _process_config, NULL_STRINGS
+from dep_graph_viz.util import git
+
+
+@pytest.fixture(autouse=True)
+def git_subprocess_only(monkeypatch):
+	"""these tests mock `git` itself, so skip reading `.git` and the per-process cache
+
+	reading the files is tested in `test_git.py`
+	"""
+	monkeypatch.setattr(git, "read_git_info", lambda work_tree: None)
+	git.clear_git_info_cache()
+	yield
+	git.clear_git_info_cache()
 
 
 def test_process_config_convert_none():
@@ -261,32 +274,26 @@ def test_process_config_git_error_handling():
 	assert test_config["url_prefix"] is None
 
 
-@pytest.mark.parametrize(
-	"cwd, root, expected_cwd_after",
-	[
-		("/original/path", ".", "/original/path"),
-		("/original/path", "/other/path", "/original/path"),
-		("/original/path", "../relative/path", "/original/path"),
-	],
-)
-def test_process_config_directory_handling(cwd, root, expected_cwd_after):
-	"""Test directory changes during git operations"""
+@pytest.mark.parametrize("root", [".", "/other/path", "../relative/path"])
+def test_process_config_directory_handling(root):
+	"""git runs in the root without changing the working directory"""
 	test_config = deepcopy(_DEFAULT_CONFIG)
 	test_config["url_prefix"] = None
 	test_config["auto_url_format"] = "{git_remote_url}/blob/{git_branch}/"
 
 	with (
-		patch("os.getcwd") as mock_getcwd,
 		patch("os.chdir") as mock_chdir,
 		patch("subprocess.check_output") as mock_subprocess,
 	):
-		mock_getcwd.return_value = cwd
 		mock_subprocess.side_effect = ["https://github.com/user/repo.git", "main"]
 
 		_process_config(root=root, config=test_config)
 
-		# Verify we return to original directory
-		mock_chdir.assert_called_with(expected_cwd_after)
+		mock_chdir.assert_not_called()
+		for call in mock_subprocess.call_args_list:
+			assert call.kwargs["cwd"] == root
+
+	assert test_config["url_prefix"] == "https://github.com/user/repo/blob/main/"
 
 
 @pytest.mark.parametrize("null_value", NULL_STRINGS)
@@ -313,3 +320,14 @@ def test_config_immutability():
 
 	assert CONFIG == original_config
 	assert "custom" not in CONFIG["edge"]
+
+
+def test_process_config_html_layout():
+	CONFIG = deepcopy(_DEFAULT_CONFIG)
+	CONFIG["auto_url_format"] = None
+	CONFIG["html"]["layout"] = "canvas"
+	_process_config(CONFIG)
+
+	CONFIG["html"]["layout"] = "sever"
+	with pytest.raises(ValueError, match="unknown html layout: 'sever'"):
+		_process_config(CONFIG)
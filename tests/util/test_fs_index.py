@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from dep_graph_viz.dep_graph_viz import classify_node
+from dep_graph_viz.util.fs_index import FileSystemIndex
+
+
+@pytest.fixture
+def package_tree(tmp_path):
+	structure = [
+		"__init__.py",
+		"a.py",
+		"sub/__init__.py",
+		"sub/b.py",
+		"sub/nested/__init__.py",
+		"sub/nested/c.py",
+		"scripts/run.py",
+		"scripts/deeper/tool.py",
+		"empty_parent/only/d.py",
+		"no_python/readme.txt",
+		".hidden/e.py",
+		".hidden_file.py",
+	]
+	for path in structure:
+		full_path = tmp_path / path
+		full_path.parent.mkdir(parents=True, exist_ok=True)
+		full_path.write_text("")
+	return tmp_path
+
+
+def test_fs_index_contents(package_tree):
+	fs_index = FileSystemIndex.build(str(package_tree))
+
+	assert set(fs_index.python_files()) == {
+		"__init__.py",
+		"a.py",
+		"sub/__init__.py",
+		"sub/b.py",
+		"sub/nested/__init__.py",
+		"sub/nested/c.py",
+		"scripts/run.py",
+		"scripts/deeper/tool.py",
+		"empty_parent/only/d.py",
+	}
+	assert fs_index.relevant_directories() == {
+		".",
+		"sub",
+		"sub/nested",
+		"scripts",
+		"scripts/deeper",
+		"empty_parent",
+		"empty_parent/only",
+	}
+	assert fs_index.has_init(".")
+	assert fs_index.has_init("sub/nested")
+	assert not fs_index.has_init("scripts")
+	assert not fs_index.has_init("does/not/exist")
+	assert fs_index.is_dir("no_python")
+	assert fs_index.is_file("sub/b.py")
+	assert not fs_index.exists(".hidden/e.py")
+
+
+def test_fs_index_deterministic_order(package_tree):
+	assert (
+		FileSystemIndex.build(str(package_tree)).python_files()
+		== FileSystemIndex.build(str(package_tree)).python_files()
+	)
+
+
+def test_classify_node_matches_disk(package_tree, monkeypatch):
+	monkeypatch.chdir(package_tree)
+	fs_index = FileSystemIndex.build(".")
+	paths = fs_index.python_files() + sorted(fs_index.relevant_directories())
+	for path in paths:
+		if path.endswith("__init__.py"):
+			continue
+		assert classify_node(path, fs_index=fs_index) == classify_node(path), path
+
+
+def test_classify_node_does_not_touch_disk(package_tree, monkeypatch):
+	monkeypatch.chdir(package_tree)
+	fs_index = FileSystemIndex.build(".")
+
+	def _fail(*args, **kwargs):
+		raise AssertionError("should not touch the disk")
+
+	monkeypatch.setattr(os, "listdir", _fail)
+	monkeypatch.setattr(os.path, "exists", _fail)
+	assert classify_node(".", fs_index=fs_index) == "module_root"
+	assert classify_node("sub", fs_index=fs_index) == "module_dir"
+	assert classify_node("scripts", fs_index=fs_index) == "dir"
+	assert classify_node("sub/b.py", fs_index=fs_index) == "module_file"
+	assert classify_node("scripts/run.py", fs_index=fs_index) == "script"
+	with pytest.raises(FileNotFoundError):
+		classify_node("missing.py", fs_index=fs_index)
+
+
+def test_fs_index_symlink_loop(tmp_path):
+	if os.name == "nt":
+		pytest.skip("symlinks need admin privileges on Windows")
+	(tmp_path / "pkg").mkdir()
+	(tmp_path / "pkg" / "m.py").write_text("")
+	os.symlink(str(tmp_path), str(tmp_path / "pkg" / "loop"))
+
+	fs_index = FileSystemIndex.build(str(tmp_path))
+	assert fs_index.python_files() == ["pkg/m.py"]
+
+
+def test_fs_index_invalid_root():
+	with pytest.raises(FileNotFoundError):
+		FileSystemIndex.build("non_existent_directory")
@@ -3,7 +3,7 @@ import os
 import stat
 
 # Import the functions to be tested
-from dep_graph_viz.dep_graph_viz import get_python_files, get_relevant_directories
+from dep_graph_viz.util.util import get_python_files, get_relevant_directories
 
 
 def test_get_python_files(tmp_path):
@@ -1,36 +1,47 @@
+import ast
+import glob
+import os
+import warnings
+
 import pytest
 
 # Import the functions to be tested
-from dep_graph_viz.dep_graph_viz import get_imports
+from dep_graph_viz.util.util import (
+	ImportRecord,
+	ImportScanOptions,
+	get_import_records,
+	get_import_records_fast,
+	get_imports,
+	get_imports_fast,
+	scan_imports,
+)
 
 
-@pytest.mark.parametrize(
-	"source, expected",
-	[
-		("import os", ["os"]),
-		("import os\nimport sys", ["os", "sys"]),
-		("from collections import defaultdict", ["collections"]),
-		("from math import sqrt", ["math"]),
-		("import module.submodule", ["module.submodule"]),
-		(
-			"""
+GET_IMPORTS_CASES: list[tuple[str, list[str]]] = [
+	("import os", ["os"]),
+	("import os\nimport sys", ["os", "sys"]),
+	("from collections import defaultdict", ["collections"]),
+	("from math import sqrt", ["math"]),
+	("import module.submodule", ["module.submodule"]),
+	(
+		"""
 import os
 import sys
 from collections import defaultdict
 from math import sqrt
 """,
-			["os", "sys", "collections", "math"],
-		),
-		(
-			"""
+		["os", "sys", "collections", "math"],
+	),
+	(
+		"""
 # No imports here
 def foo():
     pass
 """,
-			[],
-		),
-		(
-			"""
+		[],
+	),
+	(
+		"""
 import os
 import sys
 from collections import defaultdict
@@ -38,110 +49,110 @@ from math import sqrt
 import module.submodule
 from package.module import Class
 """,
-			["os", "sys", "collections", "math", "module.submodule", "package.module"],
-		),
-		("", []),
-		(
-			"""
+		["os", "sys", "collections", "math", "module.submodule", "package.module"],
+	),
+	("", []),
+	(
+		"""
 import os  # This is a comment
 from sys import path  # Another comment
 """,
-			["os", "sys"],
-		),
-		(
-			"""
+		["os", "sys"],
+	),
+	(
+		"""
 def func():
     import math
     from collections import deque
 """,
-			["math", "collections"],
-		),
-		(
-			"""
+		["math", "collections"],
+	),
+	(
+		"""
 from ..parent import parent_module
 """,
-			["parent"],
-		),
-		(
-			"""
+		["parent"],
+	),
+	(
+		"""
 import package.module.submodule
 """,
-			["package.module.submodule"],
-		),
-		(
-			"""
+		["package.module.submodule"],
+	),
+	(
+		"""
 import numpy as np
 import pandas as pd
 """,
-			["numpy", "pandas"],
-		),
-		(
-			"""
+		["numpy", "pandas"],
+	),
+	(
+		"""
 from package import *
 """,
-			["package"],
-		),
-		(
-			"""
+		["package"],
+	),
+	(
+		"""
 try:
     import optional_module
 except ImportError:
     optional_module = None
 """,
-			["optional_module"],
-		),
-		(
-			"""
+		["optional_module"],
+	),
+	(
+		"""
 if CONDITION:
     import conditional_module
 """,
-			["conditional_module"],
-		),
-		(
-			"""
+		["conditional_module"],
+	),
+	(
+		"""
 import 你好
 """,
-			["你好"],
-		),
-		(
-			"""
+		["你好"],
+	),
+	(
+		"""
 from __future__ import print_function
 """,
-			["__future__"],
-		),
-		# Basic imports
-		("import os", ["os"]),
-		("import sys", ["sys"]),
-		("from collections import defaultdict", ["collections"]),
-		("from math import sqrt", ["math"]),
-		# Multiple imports
-		("import os, sys", ["os", "sys"]),
-		("import os, sys, pathlib", ["os", "sys", "pathlib"]),
-		("from collections import defaultdict, deque", ["collections"]),
-		# Submodule imports
-		("import module.submodule", ["module.submodule"]),
-		("import package.module.submodule", ["package.module.submodule"]),
-		("from package.module import submodule", ["package.module"]),
-		# Import aliases
-		("import numpy as np", ["numpy"]),
-		(
-			"import pandas as pd, matplotlib.pyplot as plt",
-			["pandas", "matplotlib.pyplot"],
-		),
-		("from collections import defaultdict as dd", ["collections"]),
-		# Multiple imports on multiple lines
-		(
-			"""
+		["__future__"],
+	),
+	# Basic imports
+	("import os", ["os"]),
+	("import sys", ["sys"]),
+	("from collections import defaultdict", ["collections"]),
+	("from math import sqrt", ["math"]),
+	# Multiple imports
+	("import os, sys", ["os", "sys"]),
+	("import os, sys, pathlib", ["os", "sys", "pathlib"]),
+	("from collections import defaultdict, deque", ["collections"]),
+	# Submodule imports
+	("import module.submodule", ["module.submodule"]),
+	("import package.module.submodule", ["package.module.submodule"]),
+	("from package.module import submodule", ["package.module"]),
+	# Import aliases
+	("import numpy as np", ["numpy"]),
+	(
+		"import pandas as pd, matplotlib.pyplot as plt",
+		["pandas", "matplotlib.pyplot"],
+	),
+	("from collections import defaultdict as dd", ["collections"]),
+	# Multiple imports on multiple lines
+	(
+		"""
 import os
 import sys
 from collections import defaultdict
 from math import sqrt
         """,
-			["os", "sys", "collections", "math"],
-		),
-		# Complex nested imports
-		(
-			"""
+		["os", "sys", "collections", "math"],
+	),
+	# Complex nested imports
+	(
+		"""
 def func():
 	import math
 	class Inner:
@@ -149,70 +160,70 @@ def func():
 		def method():
 			import json
         """,
-			["math", "collections", "json"],
-		),
-		# Conditional imports
-		(
-			"""
+		["math", "collections", "json"],
+	),
+	# Conditional imports
+	(
+		"""
 try:
 	import optional_module
 except ImportError:
 	pass
         """,
-			["optional_module"],
-		),
-		(
-			"""
+		["optional_module"],
+	),
+	(
+		"""
 if CONDITION:
 	import conditional_module
 elif OTHER_CONDITION:
 	from other_module import thing
         """,
-			["conditional_module", "other_module"],
-		),
-		# Comments and docstrings
-		(
-			"""
+		["conditional_module", "other_module"],
+	),
+	# Comments and docstrings
+	(
+		"""
 # Comment with fake import
 '''
 This is a docstring with import os
 '''
 import real_module  # Real import
         """,
-			["real_module"],
-		),
-		# Empty or whitespace
-		("", []),
-		("   ", []),
-		("\n\n\n", []),
-		# Special module names
-		("import __main__", ["__main__"]),
-		("from __future__ import print_function", ["__future__"]),
-		("import _internal", ["_internal"]),
-		("from _private import thing", ["_private"]),
-		# Unicode module names
-		("import 你好", ["你好"]),
-		("from 模块 import 函数", ["模块"]),
-		("import صالح", ["صالح"]),
-		# Multiple dots in module paths
-		("import very.deep.module.path", ["very.deep.module.path"]),
-		("from very.deep.module.path import thing", ["very.deep.module.path"]),
-		# Star imports
-		("from module import *", ["module"]),
-		("from package.subpackage import *", ["package.subpackage"]),
-		# Mixed imports
-		(
-			"""
+		["real_module"],
+	),
+	# Empty or whitespace
+	("", []),
+	("   ", []),
+	("\n\n\n", []),
+	# Special module names
+	("import __main__", ["__main__"]),
+	("from __future__ import print_function", ["__future__"]),
+	("import _internal", ["_internal"]),
+	("from _private import thing", ["_private"]),
+	# Unicode module names
+	("import 你好", ["你好"]),
+	("from 模块 import 函数", ["模块"]),
+	("import صالح", ["صالح"]),
+	# Multiple dots in module paths
+	("import very.deep.module.path", ["very.deep.module.path"]),
+	("from very.deep.module.path import thing", ["very.deep.module.path"]),
+	# Star imports
+	("from module import *", ["module"]),
+	("from package.subpackage import *", ["package.subpackage"]),
+	# Mixed imports
+	(
+		"""
 import os
 from sys import path
 import module.submodule as msm
 from package.module import *
         """,
-			["os", "sys", "module.submodule", "package.module"],
-		),
-		# Imports in different scopes
-		(
-			"""
+		["os", "sys", "module.submodule", "package.module"],
+	),
+	# Imports in different scopes
+	(
+		"""
 import global_module
 def func():
 	import func_module
@@ -221,11 +232,11 @@ def func():
 		def method():
 			import method_module
         """,
-			["global_module", "func_module", "class_module", "method_module"],
-		),
-		# Imports in complex structures
-		(
-			"""
+		["global_module", "func_module", "class_module", "method_module"],
+	),
+	# Imports in complex structures
+	(
+		"""
 try:
 	try:
 		import deep_try
@@ -234,60 +245,60 @@ try:
 finally:
 	import deep_finally
         """,
-			["deep_finally", "deep_try", "deep_except"],
-		),
-		# Async function imports
-		(
-			"""
+		["deep_finally", "deep_try", "deep_except"],
+	),
+	# Async function imports
+	(
+		"""
 async def async_func():
 	import asyncio
 	import aiohttp
         """,
-			["asyncio", "aiohttp"],
-		),
-		# Generator function imports
-		(
-			"""
+		["asyncio", "aiohttp"],
+	),
+	# Generator function imports
+	(
+		"""
 def generator():
 	import itertools
 	yield
         """,
-			["itertools"],
-		),
-		# Imports with type annotations
-		(
-			"""
+		["itertools"],
+	),
+	# Imports with type annotations
+	(
+		"""
 from typing import List, Dict
 import dataclasses
         """,
-			["typing", "dataclasses"],
-		),
-		# Relative imports (parent/sibling)
-		("from ..parent import thing", ["parent"]),
-		("from ...grandparent import thing", ["grandparent"]),
-		# Mixed relative and absolute imports
-		(
-			"""
+		["typing", "dataclasses"],
+	),
+	# Relative imports (parent/sibling)
+	("from ..parent import thing", ["parent"]),
+	("from ...grandparent import thing", ["grandparent"]),
+	# Mixed relative and absolute imports
+	(
+		"""
 from ..parent import thing
 import os
 from ...other import module
         """,
-			["parent", "os", "other"],
-		),
-		# additional specialized
-		(
-			"import    os   ;    import    sys   ;   from    collections   import   defaultdict",
-			["os", "sys", "collections"],
-		),
-		("import モジュール  # Japanese module", ["モジュール"]),
-		(
-			"\n".join(
-				[f"import module_{i}" for i in range(5)]
-			),  # Reduced from 1000 for practicality
-			[f"module_{i}" for i in range(5)],
-		),
-		(
-			"""
+		["parent", "os", "other"],
+	),
+	# additional specialized
+	(
+		"import    os   ;    import    sys   ;   from    collections   import   defaultdict",
+		["os", "sys", "collections"],
+	),
+	("import モジュール  # Japanese module", ["モジュール"]),
+	(
+		"\n".join(
+			[f"import module_{i}" for i in range(5)]
+		),  # Reduced from 1000 for practicality
+		[f"module_{i}" for i in range(5)],
+	),
+	(
+		"""
 def level1():
     def level2():
         def level3():
@@ -295,20 +306,22 @@ def level1():
                 def level5():
                     import deep_module
 """,
-			["deep_module"],
-		),
-		(
-			"""
+		["deep_module"],
+	),
+	(
+		"""
 import os  # Comment
 # Comment
 from sys import path  # Comment
 # Comment
 import json
 """,
-			["os", "sys", "json"],
-		),
-	],
-)
+		["os", "sys", "json"],
+	),
+]
+
+
+@pytest.mark.parametrize("source, expected", GET_IMPORTS_CASES)
 def test_get_imports(source, expected):
 	assert get_imports(source) == expected, f"{expected = }\nsource = '''\n{source}'''"
 
@@ -409,3 +422,124 @@ def test_get_imports_error(source, expected_exception):
 	print(f"source = '''\n{source}'''")
 	with pytest.raises(expected_exception):
 		get_imports(source)
+
+
+# fast (token stream) scanner
+# ==================================================
+
+# the fast scanner returns imports in source order, the ast one breadth-first
+@pytest.mark.parametrize("source, expected", GET_IMPORTS_CASES)
+def test_get_imports_fast_matches_ast(source, expected):
+	assert sorted(get_imports_fast(source)) == sorted(get_imports(source))
+
+
+def _corpus_files() -> list[str]:
+	"this package and part of the top level of the standard library"
+	package_dir: str = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+	return sorted(
+		glob.glob(os.path.join(package_dir, "dep_graph_viz", "**", "*.py"), recursive=True)
+	) + sorted(glob.glob(os.path.join(os.path.dirname(ast.__file__), "*.py")))[:60]
+
+
+def test_get_imports_fast_corpus():
+	n_checked: int = 0
+	for path in _corpus_files():
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				source: str = f.read()
+			with warnings.catch_warnings():
+				warnings.simplefilter("ignore")
+				expected: list[str] = get_imports(source, allow_missing_imports=True)
+		except (SyntaxError, ValueError, UnicodeDecodeError):
+			continue
+		with warnings.catch_warnings():
+			warnings.simplefilter("ignore")
+			found: list[str] = get_imports_fast(source, allow_missing_imports=True)
+		assert sorted(found) == sorted(expected), path
+		n_checked += 1
+	assert n_checked > 50
+
+
+@pytest.mark.parametrize(
+	"source, expected",
+	[
+		("import os\nimport sys\nx = 1\nimport json", ["os", "sys"]),
+		('"""docstring"""\nfrom a import b\n\ndef f():\n\timport c\nimport d', ["a"]),
+		("# comment\n\nimport os  # trailing\nif x:\n\timport sys\n", ["os"]),
+		("x = 1\nimport os", []),
+		("import os\n\nfrom a import (\n\tb,\n\tc,\n)\nprint(b)", ["os", "a"]),
+	],
+)
+def test_get_imports_fast_header_only(source, expected):
+	assert get_imports_fast(source, header_only=True) == expected
+
+
+@pytest.mark.parametrize(
+	"source, expected_exception",
+	[
+		("import", SyntaxError),
+		("import os as", SyntaxError),
+		("from math import", SyntaxError),
+		("import $invalid_module", SyntaxError),
+		("from . import sibling_module", ValueError),
+		("from .... import thing", ValueError),
+		("import ''", SyntaxError),
+		("import module/submodule", SyntaxError),
+		("from module:submodule import thing", SyntaxError),
+	],
+)
+def test_get_imports_fast_falls_back_on_errors(source, expected_exception):
+	with pytest.raises(expected_exception):
+		get_imports_fast(source)
+
+
+# import records, keeping relative levels and imported names
+# ==================================================
+
+IMPORT_RECORDS_CASES: list[tuple[str, list[ImportRecord]]] = [
+	("import a.b as c, d", [ImportRecord("a.b"), ImportRecord("d")]),
+	("from a.b import (c, d as e,)", [ImportRecord("a.b", 0, ("c", "d"))]),
+	("from . import x", [ImportRecord("", 1, ("x",))]),
+	("from .sibling import y", [ImportRecord("sibling", 1, ("y",))]),
+	("from ..a import *", [ImportRecord("a", 2, ("*",))]),
+	("from ... import y", [ImportRecord("", 3, ("y",))]),
+	("from .... import thing", [ImportRecord("", 4, ("thing",))]),
+]
+
+
+@pytest.mark.parametrize("source, expected", IMPORT_RECORDS_CASES)
+def test_get_import_records(source, expected):
+	assert get_import_records(source) == expected
+
+
+@pytest.mark.parametrize("source, expected", IMPORT_RECORDS_CASES)
+def test_get_import_records_fast(source, expected):
+	assert get_import_records_fast(source) == expected
+
+
+def test_get_import_records_fast_corpus():
+	n_checked: int = 0
+	for path in _corpus_files():
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				source: str = f.read()
+			expected: list[ImportRecord] = get_import_records(source)
+		except (SyntaxError, UnicodeDecodeError):
+			continue
+		assert sorted(get_import_records_fast(source)) == sorted(expected), path
+		n_checked += 1
+	assert n_checked > 50
+
+
+def test_scan_imports_options():
+	source: str = "import os\nx = 1\nimport json\n"
+	assert scan_imports(source) == [ImportRecord("os"), ImportRecord("json")]
+	assert scan_imports(source, ImportScanOptions(scanner="fast")) == [
+		ImportRecord("os"),
+		ImportRecord("json"),
+	]
+	assert scan_imports(
+		source, ImportScanOptions(scanner="fast", header_only=True)
+	) == [ImportRecord("os")]
+	with pytest.raises(ValueError):
+		scan_imports(source, ImportScanOptions(scanner="nonexistent"))
@@ -0,0 +1,161 @@
+import os
+import shutil
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from dep_graph_viz.util import git
+from dep_graph_viz.util.git import (
+	GitInfo,
+	get_git_info,
+	parse_git_config,
+	read_git_info,
+	rewrite_url,
+)
+
+SHA: str = "0123456789abcdef0123456789abcdef01234567"
+
+CONFIG: str = """\
+[core]
+	bare = false
+[remote "origin"]
+	url = https://github.com/user/repo.git  # a comment
+	fetch = +refs/heads/*:refs/remotes/origin/*
+[branch "main"]
+	remote = origin
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+	git.clear_git_info_cache()
+	yield
+	git.clear_git_info_cache()
+
+
+def _make_repo(path, config: str = CONFIG, head: str = "ref: refs/heads/main\n"):
+	(path / ".git").mkdir(parents=True)
+	(path / ".git" / "config").write_text(config)
+	(path / ".git" / "HEAD").write_text(head)
+	return path
+
+
+def test_read_git_info(tmp_path):
+	repo = _make_repo(tmp_path / "repo")
+	(repo / "src" / "pkg").mkdir(parents=True)
+	expected = GitInfo("https://github.com/user/repo.git", "main")
+	assert read_git_info(str(repo)) == expected
+	assert get_git_info(str(repo / "src" / "pkg")) == expected
+
+
+def test_detached_head(tmp_path):
+	repo = _make_repo(tmp_path, head=f"{SHA}\n")
+	assert read_git_info(str(repo)) == GitInfo("https://github.com/user/repo.git", SHA)
+
+
+def test_linked_worktree(tmp_path):
+	main = _make_repo(tmp_path / "main")
+	wt_git_dir = main / ".git" / "worktrees" / "wt"
+	wt_git_dir.mkdir(parents=True)
+	(wt_git_dir / "HEAD").write_text("ref: refs/heads/feature/x\n")
+	(wt_git_dir / "commondir").write_text("../..\n")
+	worktree = tmp_path / "wt"
+	worktree.mkdir()
+	(worktree / ".git").write_text(f"gitdir: {wt_git_dir}\n")
+	assert read_git_info(str(worktree)) == GitInfo(
+		"https://github.com/user/repo.git", "feature/x"
+	)
+
+
+def test_relative_gitdir_file(tmp_path):
+	_make_repo(tmp_path / "modules" / "sub", head="ref: refs/heads/dev\n")
+	(tmp_path / "modules" / "sub" / ".git").rename(tmp_path / "sub.git")
+	(tmp_path / "modules" / "sub" / ".git").write_text("gitdir: ../../sub.git\n")
+	assert read_git_info(str(tmp_path / "modules" / "sub")) == GitInfo(
+		"https://github.com/user/repo.git", "dev"
+	)
+
+
+def test_parse_git_config():
+	config = parse_git_config(
+		'[Remote "Origin"]\n'
+		'\tURL = "git@host:a b.git" ; comment\n'
+		"[url \"https://github.com/\"]\n"
+		"\tinsteadOf = gh:\n"
+		"\tinsteadOf = github:\n"
+		"[core] bare\n"
+	)
+	assert config["remote.Origin"] == {"url": ["git@host:a b.git"]}
+	assert config["url.https://github.com/"] == {"insteadof": ["gh:", "github:"]}
+	assert config["core"] == {"bare": ["true"]}
+	assert rewrite_url("gh:user/repo", config) == "https://github.com/user/repo"
+	assert rewrite_url("https://x.org/a", config) == "https://x.org/a"
+
+
+@pytest.mark.parametrize(
+	"config",
+	[
+		"[core]\n\tbare = false\n",
+		CONFIG + "[include]\n\tpath = other.config\n",
+	],
+)
+def test_fallback_to_subprocess(tmp_path, config):
+	repo = _make_repo(tmp_path, config=config)
+	assert read_git_info(str(repo)) is None
+	with patch("subprocess.check_output") as mock_subprocess:
+		mock_subprocess.side_effect = ["https://example.com/r.git\n", "main\n"]
+		assert get_git_info(str(repo)) == GitInfo("https://example.com/r.git", "main")
+	assert mock_subprocess.call_args_list[0].kwargs["cwd"] == str(repo)
+
+
+def test_cached_per_repository(tmp_path, monkeypatch):
+	repo = _make_repo(tmp_path)
+	(repo / "a").mkdir()
+	(repo / "b").mkdir()
+	reads: list[str] = []
+	read = git.read_git_info
+
+	def _counting_read(work_tree):
+		reads.append(work_tree)
+		return read(work_tree)
+
+	monkeypatch.setattr(git, "read_git_info", _counting_read)
+	with patch("subprocess.check_output") as mock_subprocess:
+		for root in (repo, repo / "a", repo / "b"):
+			assert get_git_info(str(root)).branch == "main"
+		assert len(reads) == 1
+
+		# switching branches changes the mtime of HEAD
+		(repo / ".git" / "HEAD").write_text("ref: refs/heads/other\n")
+		os.utime(repo / ".git" / "HEAD", ns=(1, 1))
+		assert get_git_info(str(repo)).branch == "other"
+		assert len(reads) == 2
+	mock_subprocess.assert_not_called()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_matches_git(tmp_path):
+	def _git(*args: str, cwd=tmp_path / "repo") -> str:
+		return subprocess.check_output(
+			["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+			cwd=cwd,
+			encoding="utf-8",
+		).strip()
+
+	(tmp_path / "repo").mkdir()
+	_git("init", "-q", "-b", "main")
+	_git("remote", "add", "origin", "https://github.com/user/repo.git")
+	_git("commit", "-q", "--allow-empty", "-m", "init")
+	_git("worktree", "add", "-q", "-b", "feature", str(tmp_path / "wt"))
+
+	for work_tree in (tmp_path / "repo", tmp_path / "wt"):
+		info = read_git_info(str(work_tree))
+		assert info is not None
+		assert info == git._git_info_subprocess(str(work_tree))
+
+	_git("checkout", "-q", "--detach")
+	sha: str = _git("rev-parse", "HEAD")
+	assert read_git_info(str(tmp_path / "repo")) == GitInfo(
+		"https://github.com/user/repo.git", sha
+	)
@@ -0,0 +1,197 @@
+import json
+import os
+import time
+
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+import dep_graph_viz.util.cache as cache_module
+from dep_graph_viz.util.cache import IMPORT_CACHE_FILENAME, LAST_USED_RESOLUTION_S, ImportCache
+from dep_graph_viz.util.util import ImportRecord, ImportScanOptions
+
+
+def _modules(records: list[ImportRecord]) -> list[str]:
+	return [record.module for record in records]
+
+
+def _write(path, content: str, mtime_ns: int | None = None) -> None:
+	path.write_text(content, encoding="utf-8")
+	if mtime_ns is not None:
+		os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_import_cache_hit_and_miss(tmp_path):
+	src = tmp_path / "a.py"
+	_write(src, "import os\nfrom sys import path\n")
+
+	cache = ImportCache(cache_dir=str(tmp_path / "cache"))
+	assert _modules(cache.get_imports(str(src))) == ["os", "sys"]
+	assert (cache.hits, cache.misses) == (0, 1)
+
+	assert _modules(cache.get_imports(str(src))) == ["os", "sys"]
+	assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_import_cache_persists(tmp_path):
+	src = tmp_path / "a.py"
+	_write(src, "import os\n")
+	cache_dir = str(tmp_path / "cache")
+
+	cache = ImportCache(cache_dir=cache_dir)
+	cache.get_imports(str(src))
+	cache.save()
+	assert os.path.isfile(os.path.join(cache_dir, IMPORT_CACHE_FILENAME))
+
+	cache_reloaded = ImportCache(cache_dir=cache_dir)
+	assert _modules(cache_reloaded.get_imports(str(src))) == ["os"]
+	assert (cache_reloaded.hits, cache_reloaded.misses) == (1, 0)
+
+
+def test_import_cache_warm_run_does_not_rewrite(tmp_path, monkeypatch):
+	src = tmp_path / "a.py"
+	_write(src, "import os\n")
+	cache_dir = str(tmp_path / "cache")
+	cache = ImportCache(cache_dir=cache_dir)
+	cache.get_imports(str(src))
+	cache.save()
+	cache_file = os.path.join(cache_dir, IMPORT_CACHE_FILENAME)
+	os.utime(cache_file, ns=(1, 1))
+
+	# every file hits, so there is nothing to write
+	cache = ImportCache(cache_dir=cache_dir)
+	cache.get_imports(str(src))
+	assert cache.hits == 1
+	cache.save()
+	assert os.stat(cache_file).st_mtime_ns == 1
+
+	# unless the entry was last used long enough ago for the bump to matter
+	later: float = time.time() + LAST_USED_RESOLUTION_S + 60
+	monkeypatch.setattr(cache_module.time, "time", lambda: later)
+	cache = ImportCache(cache_dir=cache_dir)
+	cache.get_imports(str(src))
+	cache.save()
+	assert os.stat(cache_file).st_mtime_ns != 1
+
+
+def test_import_cache_invalidates_on_change(tmp_path):
+	src = tmp_path / "a.py"
+	_write(src, "import os\n", mtime_ns=1_000_000_000)
+
+	cache = ImportCache(cache_dir=None)
+	assert _modules(cache.get_imports(str(src))) == ["os"]
+
+	_write(src, "import json\nimport re\n", mtime_ns=2_000_000_000)
+	assert _modules(cache.get_imports(str(src))) == ["json", "re"]
+	assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_import_cache_content_hash_fallback(tmp_path):
+	src = tmp_path / "a.py"
+	_write(src, "import os\n", mtime_ns=1_000_000_000)
+
+	cache = ImportCache(cache_dir=None)
+	cache.get_imports(str(src))
+
+	# same contents, different mtime: should hit via the content hash
+	_write(src, "import os\n", mtime_ns=3_000_000_000)
+	assert _modules(cache.get_imports(str(src))) == ["os"]
+	assert (cache.hits, cache.misses) == (1, 1)
+
+	# identical contents at a different path also hit
+	other = tmp_path / "b.py"
+	_write(other, "import os\n")
+	assert _modules(cache.get_imports(str(other))) == ["os"]
+	assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_import_cache_relative_imports_round_trip(tmp_path):
+	src = tmp_path / "a.py"
+	_write(src, "from . import thing, other\nfrom ..pkg.sub import x\nimport os\n")
+	expected = [
+		ImportRecord("", 1, ("thing", "other")),
+		ImportRecord("pkg.sub", 2, ("x",)),
+		ImportRecord("os"),
+	]
+	cache_dir = str(tmp_path / "cache")
+
+	cache = ImportCache(cache_dir=cache_dir)
+	assert cache.get_imports(str(src)) == expected
+	cache.save()
+
+	# records survive the trip through json
+	reloaded = ImportCache(cache_dir=cache_dir)
+	assert reloaded.get_imports(str(src)) == expected
+	assert reloaded.hits == 1
+
+
+def test_import_cache_keyed_on_scanner(tmp_path):
+	src = tmp_path / "a.py"
+	_write(src, "import os\nx = 1\nimport json\n")
+
+	cache = ImportCache(cache_dir=None)
+	assert _modules(cache.get_imports(str(src))) == ["os", "json"]
+	assert _modules(
+		cache.get_imports(str(src), ImportScanOptions(scanner="fast", header_only=True))
+	) == ["os"]
+	assert _modules(cache.get_imports(str(src), ImportScanOptions(scanner="fast"))) == [
+		"os",
+		"json",
+	]
+	assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_import_cache_errors_propagate(tmp_path):
+	cache = ImportCache(cache_dir=None)
+	with pytest.raises(FileNotFoundError):
+		cache.get_imports(str(tmp_path / "missing.py"))
+
+	bad = tmp_path / "bad.py"
+	_write(bad, "def broken(:\n")
+	with pytest.raises(SyntaxError):
+		cache.get_imports(str(bad))
+	assert len(cache) == 0
+
+
+def test_import_cache_eviction(tmp_path):
+	cache = ImportCache(cache_dir=str(tmp_path / "cache"), max_entries=3)
+	paths = []
+	for i in range(5):
+		src = tmp_path / f"m{i}.py"
+		_write(src, f"import module_{i}\n")
+		paths.append(str(src))
+		cache.get_imports(str(src))
+
+	# touch the first one so it is the most recently used
+	cache._entries[next(iter(cache._entries))]["last_used"] += 1e6
+	cache.save()
+	assert len(cache) == 3
+
+	reloaded = ImportCache(cache_dir=str(tmp_path / "cache"), max_entries=3)
+	reloaded.get_imports(paths[0])
+	assert reloaded.hits == 1
+	reloaded.get_imports(paths[1])
+	assert reloaded.misses == 1
+
+
+def test_import_cache_corrupt_file(tmp_path):
+	cache_dir = tmp_path / "cache"
+	cache_dir.mkdir()
+	(cache_dir / IMPORT_CACHE_FILENAME).write_text("{not json")
+
+	with pytest.warns(UserWarning):
+		cache = ImportCache(cache_dir=str(cache_dir))
+	assert len(cache) == 0
+
+	(cache_dir / IMPORT_CACHE_FILENAME).write_text(json.dumps({"version": -1}))
+	with pytest.warns(UserWarning):
+		cache = ImportCache(cache_dir=str(cache_dir))
+	assert len(cache) == 0
+
+
+def test_import_cache_from_config(tmp_path):
+	config = {"import_cache": dict(_DEFAULT_CONFIG["import_cache"])}
+	config["import_cache"]["dir"] = str(tmp_path)
+	assert ImportCache.from_config(config).cache_dir == str(tmp_path)
+
+	config["import_cache"]["enabled"] = False
+	assert ImportCache.from_config(config).cache_dir is None
@@ -0,0 +1,148 @@
+from copy import deepcopy
+
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import build_graph
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.module_index import (
+	ModuleIndex,
+	build_module_index,
+	split_module_name,
+)
+from dep_graph_viz.util.util import ImportRecord
+
+
+def _index(prefix=("pkg",)) -> ModuleIndex[str]:
+	names = ["pkg", "pkg.a", "pkg.a.b", "pkg.a.b.c", "pkg.sub", "pkg.sub.x"]
+	return build_module_index(
+		((split_module_name(name), name) for name in names), prefix=prefix
+	)
+
+
+def test_split_module_name():
+	assert split_module_name("a.b.c") == ("a", "b", "c")
+	assert split_module_name("") == ()
+
+
+def test_trie_basics():
+	index = _index()
+	assert len(index) == 6
+	assert ("pkg", "a", "b") in index
+	assert ("pkg", "a", "z") not in index
+	assert index.get(("pkg", "sub")) == "pkg.sub"
+	assert index.get(("pkg", "nope")) is None
+
+	index.add(("pkg", "sub"), "replaced")
+	assert len(index) == 6
+	assert index.get(("pkg", "sub")) == "replaced"
+
+	index.remove(("pkg", "sub"))
+	assert len(index) == 5
+	assert ("pkg", "sub") not in index
+	# children are still reachable
+	assert index.get(("pkg", "sub", "x")) == "pkg.sub.x"
+
+
+def test_longest_prefix():
+	index = _index()
+	assert index.longest_prefix(("pkg", "a", "b", "c", "d")) == ("pkg.a.b.c", 4)
+	assert index.longest_prefix(("pkg", "a", "zzz")) == ("pkg.a", 2)
+	assert index.longest_prefix(("numpy", "linalg")) is None
+	assert index.longest_prefix(("pkg", "zzz"), min_parts=2) is None
+
+
+@pytest.mark.parametrize(
+	"record, importer, is_package, targets, external",
+	[
+		# absolute
+		(ImportRecord("pkg.a.b"), ("pkg", "sub", "x"), False, ["pkg.a.b"], None),
+		(ImportRecord("pkg.a.b.c.func"), ("pkg", "sub", "x"), False, ["pkg.a.b.c"], None),
+		(ImportRecord("pkg"), ("pkg", "sub", "x"), False, ["pkg"], None),
+		# from X import submodule, and from X import some_function
+		(ImportRecord("pkg.a", 0, ("b",)), ("pkg", "sub", "x"), False, ["pkg.a.b"], None),
+		(ImportRecord("pkg.a", 0, ("func",)), ("pkg", "sub", "x"), False, ["pkg.a"], None),
+		(ImportRecord("pkg.a", 0, ("b", "func")), ("pkg",), True, ["pkg.a.b", "pkg.a"], None),
+		(ImportRecord("pkg.a", 0, ("*",)), ("pkg",), True, ["pkg.a"], None),
+		# relative, from a module and from a package
+		(ImportRecord("", 1, ("x",)), ("pkg", "sub", "y"), False, ["pkg.sub.x"], None),
+		(ImportRecord("", 1, ("x",)), ("pkg", "sub"), True, ["pkg.sub.x"], None),
+		(ImportRecord("a.b", 2, ("c",)), ("pkg", "sub", "y"), False, ["pkg.a.b.c"], None),
+		(ImportRecord("", 2, ("a",)), ("pkg", "sub", "y"), False, ["pkg.a"], None),
+		# without the package prefix
+		(ImportRecord("a.b"), ("pkg", "sub", "x"), False, ["pkg.a.b"], None),
+		(ImportRecord("sub", 0, ("x",)), ("pkg",), True, ["pkg.sub.x"], None),
+		# external, never resolved to the package root through the prefix
+		(ImportRecord("numpy"), ("pkg", "a"), False, [], "numpy"),
+		(ImportRecord("os.path", 0, ("join",)), ("pkg", "a"), False, [], "os.path"),
+	],
+)
+def test_resolve(record, importer, is_package, targets, external):
+	resolved = _index().resolve(record, importer, importer_is_package=is_package)
+	assert resolved.targets == targets
+	assert resolved.external == external
+	assert resolved.error is None
+
+
+def test_resolve_beyond_top_level():
+	index = _index()
+	resolved = index.resolve(ImportRecord("", 2, ("x",)), ("pkg", "a"))
+	assert resolved.targets == []
+	assert resolved.external is None
+	assert "beyond the top-level package" in resolved.error
+
+	# a root which isn't a package has no package for relative imports at its top level
+	resolved = _index(prefix=()).resolve(ImportRecord("", 1, ("x",)), ("script",))
+	assert resolved.error is not None
+
+
+def test_resolve_dedupes_targets():
+	resolved = _index().resolve(
+		ImportRecord("pkg.a", 0, ("f", "g", "b")), ("pkg",), importer_is_package=True
+	)
+	assert resolved.targets == ["pkg.a.b", "pkg.a"]
+
+
+def _build(tmp_path, monkeypatch, files: dict[str, str], **graph_config):
+	pkg = tmp_path / "pkg"
+	for path, content in files.items():
+		(pkg / path).parent.mkdir(parents=True, exist_ok=True)
+		(pkg / path).write_text(content)
+	monkeypatch.chdir(pkg)
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["PACKAGE_NAME"] = "pkg"
+	config["graph"].update(graph_config)
+	if not config["graph"]["strip_module_prefix"]:
+		config["root_node_name"] = "pkg"
+	G = build_graph(".", config, import_cache=ImportCache(cache_dir=None))
+	return {
+		(str(u).strip('"'), str(v).strip('"'))
+		for u, v, key in G.edges(keys=True)
+		if key in ("uses", "inits", "external")
+	}
+
+
+@pytest.mark.parametrize("strip_module_prefix", [True, False])
+def test_build_graph_resolves_imports(tmp_path, monkeypatch, strip_module_prefix):
+	edges = _build(
+		tmp_path,
+		monkeypatch,
+		{
+			"__init__.py": "from .sub import helper\n",
+			"sub/__init__.py": "from . import x\ndef helper(): pass\n",
+			"sub/x.py": "from ..a import func\nimport numpy\n",
+			"a.py": "from pkg.sub import helper, x\ndef func(): pass\n",
+		},
+		strip_module_prefix=strip_module_prefix,
+		include_externals=True,
+	)
+	p = "" if strip_module_prefix else "pkg."
+	root = "ROOT" if strip_module_prefix else "pkg"
+	assert edges == {
+		(f"{p}sub", root),
+		(f"{p}sub.x", f"{p}sub"),
+		(f"{p}a", f"{p}sub.x"),
+		("numpy", f"{p}sub.x"),
+		(f"{p}sub", f"{p}a"),
+		(f"{p}sub.x", f"{p}a"),
+	}
@@ -0,0 +1,121 @@
+from copy import deepcopy
+
+import pytest
+
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import build_graph
+from dep_graph_viz.util import parallel
+from dep_graph_viz.util.cache import ImportCache
+from dep_graph_viz.util.parallel import get_imports_many, resolve_workers
+from dep_graph_viz.util.util import ImportRecord
+
+
+def _expected_records(i: int) -> list[ImportRecord]:
+	return [
+		ImportRecord("os"),
+		ImportRecord(f"pkg.sub_{i % 7}", 0, ("thing",)),
+		ImportRecord("json"),
+	]
+
+
+@pytest.fixture
+def many_files(tmp_path):
+	paths = []
+	for i in range(40):
+		src = tmp_path / f"mod_{i}.py"
+		src.write_text(f"import os\nfrom pkg.sub_{i % 7} import thing\nimport json\n")
+		paths.append(str(src))
+	return paths
+
+
+def test_resolve_workers():
+	assert resolve_workers(None) >= 1
+	assert resolve_workers(0) >= 1
+	assert resolve_workers(3) == 3
+	assert resolve_workers(-2) == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test_get_imports_many_independent_of_workers(many_files, workers, monkeypatch):
+	monkeypatch.setattr(parallel, "MIN_FILES_PER_WORKER", 1)
+	expected = [_expected_records(i) for i in range(len(many_files))]
+	results = get_imports_many(
+		many_files, import_cache=ImportCache(cache_dir=None), workers=workers
+	)
+	assert results == expected
+
+
+def test_get_imports_many_errors(tmp_path, many_files, monkeypatch):
+	monkeypatch.setattr(parallel, "MIN_FILES_PER_WORKER", 1)
+	bad = tmp_path / "bad.py"
+	bad.write_text("def broken(:\n")
+	paths = [many_files[0], str(tmp_path / "missing.py"), str(bad), many_files[1]]
+
+	for workers in (1, 2):
+		results = get_imports_many(
+			paths, import_cache=ImportCache(cache_dir=None), workers=workers
+		)
+		assert results[0] == _expected_records(0)
+		assert isinstance(results[1], FileNotFoundError)
+		assert isinstance(results[2], SyntaxError)
+		assert results[3] == _expected_records(1)
+
+
+def test_get_imports_many_uses_cache(many_files, monkeypatch):
+	monkeypatch.setattr(parallel, "MIN_FILES_PER_WORKER", 1)
+	cache = ImportCache(cache_dir=None)
+	first = get_imports_many(many_files, import_cache=cache, workers=2)
+	# only 7 distinct file contents, the rest hit via the content hash
+	assert cache.misses == 7
+	assert cache.hits == len(many_files) - 7
+
+	second = get_imports_many(many_files, import_cache=cache, workers=2)
+	assert second == first
+	assert cache.misses == 7
+	assert cache.hits == 2 * len(many_files) - 7
+
+
+def test_build_graph_independent_of_workers(tmp_path, monkeypatch):
+	monkeypatch.setattr(parallel, "MIN_FILES_PER_WORKER", 1)
+	pkg = tmp_path / "pkg"
+	(pkg / "sub").mkdir(parents=True)
+	(pkg / "__init__.py").write_text("from pkg import a\n")
+	(pkg / "sub" / "__init__.py").write_text("")
+	for i in range(12):
+		(pkg / f"m{i}.py").write_text(f"import pkg.sub\nfrom pkg import m{(i + 1) % 12}\n")
+		(pkg / "sub" / f"s{i}.py").write_text(f"from pkg.m{i} import x\nimport os\n")
+	monkeypatch.chdir(pkg)
+
+	edge_lists = []
+	for workers in (1, 3):
+		config = deepcopy(_DEFAULT_CONFIG)
+		config["PACKAGE_NAME"] = "pkg"
+		config["graph"]["workers"] = workers
+		config["graph"]["include_externals"] = True
+		G = build_graph(".", config, import_cache=ImportCache(cache_dir=None))
+		edge_lists.append([(str(u), str(v)) for u, v in G.edges()])
+
+	assert edge_lists[0] == edge_lists[1]
+
+
+def test_build_graph_missing_edges_raises(tmp_path, monkeypatch):
+	pkg = tmp_path / "pkg"
+	pkg.mkdir()
+	(pkg / "__init__.py").write_text("")
+	# beyond the top-level package
+	(pkg / "broken.py").write_text("from .. import thing\n")
+	monkeypatch.chdir(pkg)
+
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["PACKAGE_NAME"] = "pkg"
+	config["graph"]["except_if_missing_edges"] = True
+	with pytest.raises(ValueError):
+		build_graph(".", config, import_cache=ImportCache(cache_dir=None))
+
+
+def test_filled_raises_on_missing_results():
+	error = ValueError("x")
+	assert parallel._filled([[], error]) == [[], error]
+	# even under `python -O`, a missing slot can't silently shift the results
+	with pytest.raises(RuntimeError, match="no result for file 1 of 3"):
+		parallel._filled([[], None, []])
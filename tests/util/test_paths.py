@@ -1,3 +1,4 @@
+import email.message
 import sys
 import pytest
 import os
@@ -388,4 +389,53 @@ def test_invalid_project_urls():
 
     with patch('importlib.metadata.metadata', return_value=mock_metadata):
         url = get_package_repository_url("test-package")
-        assert url is None
\ No newline at end of file
+        assert url is None
+
+@pytest.fixture
+def side_effect_package(tmp_path, monkeypatch):
+    """package whose import would fail, with a nested subpackage and a namespace package next to it"""
+    (tmp_path / "loud_pkg" / "inner").mkdir(parents=True)
+    (tmp_path / "loud_pkg" / "__init__.py").write_text("raise RuntimeError('executed')\n")
+    (tmp_path / "loud_pkg" / "inner" / "__init__.py").write_text("raise RuntimeError('executed')\n")
+    (tmp_path / "loud_pkg" / "single.py").write_text("raise RuntimeError('executed')\n")
+    (tmp_path / "ns_pkg" / "part").mkdir(parents=True)
+    (tmp_path / "ns_pkg" / "part" / "mod.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for name in list(sys.modules):
+        if name.split(".")[0] in ("loud_pkg", "ns_pkg"):
+            del sys.modules[name]
+
+
+@pytest.mark.parametrize("module_name, expected", [
+    ("loud_pkg", "loud_pkg"),
+    ("loud_pkg.inner", "loud_pkg/inner"),
+    ("loud_pkg.single", "loud_pkg"),
+    ("ns_pkg", "ns_pkg"),
+    ("ns_pkg.part", "ns_pkg/part"),
+])
+def test_module_directory_without_importing(side_effect_package, module_name: str, expected: str) -> None:
+    """Test that finding a module does not execute it or its parents"""
+    path = get_module_directory(module_name)
+    assert path == str(side_effect_package / expected)
+    assert "loud_pkg" not in sys.modules
+
+
+def test_missing_submodule(side_effect_package) -> None:
+    with pytest.raises(ModuleNotFoundError):
+        get_module_directory("loud_pkg.missing")
+    with pytest.raises(ModuleNotFoundError):
+        get_module_directory("loud_pkg.single.nested")
+
+
+def test_repository_url_from_project_url_entries():
+    """Test core metadata `Project-URL: label, url` entries, looked up via the distribution of a module"""
+    metadata = email.message.Message()
+    metadata["Project-URL"] = "Documentation, https://example.com/docs"
+    metadata["Project-URL"] = "Source, https://example.com/src"
+
+    with patch('importlib.metadata.packages_distributions', return_value={"srcmod": ["Src-Dist"]}), \
+            patch('importlib.metadata.metadata', return_value=metadata) as mock_metadata:
+        url = get_package_repository_url("srcmod.sub")
+    assert url == "https://example.com/src"
+    mock_metadata.assert_called_once_with("Src-Dist")
@@ -0,0 +1,102 @@
+import json
+
+from dep_graph_viz import main
+from dep_graph_viz.util.profile import NULL_PROFILER, NullProfiler, Profiler
+
+
+def test_profiler_phases_and_counters():
+	profiler = Profiler()
+	with profiler.phase("outer"):
+		with profiler.phase("inner", files=3):
+			pass
+		with profiler.phase("inner"):
+			pass
+	profiler.count("bytes_read", 10)
+	profiler.count("bytes_read", 5)
+
+	summary = profiler.summary()
+	assert summary["phases"]["inner"]["calls"] == 2
+	assert summary["phases"]["outer"]["calls"] == 1
+	assert summary["phases"]["outer"]["seconds"] >= summary["phases"]["inner"]["seconds"]
+	assert summary["counters"] == {"bytes_read": 15}
+
+	# inner phases finish first but nest inside the outer one
+	outer = next(e for e in profiler.events if e.name == "outer")
+	for inner in (e for e in profiler.events if e.name == "inner"):
+		assert outer.start_ns <= inner.start_ns
+		assert inner.start_ns + inner.duration_ns <= outer.start_ns + outer.duration_ns
+
+
+def test_profiler_records_phase_on_error():
+	profiler = Profiler()
+	try:
+		with profiler.phase("failing"):
+			raise ValueError()
+	except ValueError:
+		pass
+	assert [e.name for e in profiler.events] == ["failing"]
+
+
+def test_profiler_trace_events(tmp_path):
+	profiler = Profiler()
+	with profiler.phase("a", x=1):
+		pass
+	profiler.count("files", 2)
+	summary_path, trace_path = profiler.write(str(tmp_path / "out"))
+
+	with open(trace_path) as f:
+		trace = json.load(f)
+	complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+	assert len(complete) == 1
+	assert complete[0]["name"] == "a"
+	assert complete[0]["args"] == {"x": 1}
+	assert {"ts", "dur", "pid", "tid"} <= set(complete[0])
+	counters = [e for e in trace["traceEvents"] if e["ph"] == "C"]
+	assert counters[0]["args"] == {"files": 2}
+
+	with open(summary_path) as f:
+		assert json.load(f)["counters"] == {"files": 2}
+
+
+def test_null_profiler():
+	assert isinstance(NULL_PROFILER, NullProfiler)
+	assert not NULL_PROFILER.enabled
+	# the same context manager every time, nothing allocated per phase
+	assert NULL_PROFILER.phase("a") is NULL_PROFILER.phase("b", x=1)
+	with NULL_PROFILER.phase("a"):
+		with NULL_PROFILER.phase("a"):
+			NULL_PROFILER.count("x", 1)
+
+
+def test_main_profile(tmp_path):
+	output = str(tmp_path / "out")
+	main(
+		root="dep_graph_viz",
+		output=output,
+		output_fmt="html",
+		profile=True,
+		**{"import_cache.enabled": False},
+	)
+	with open(f"{output}.profile.json") as f:
+		summary = json.load(f)
+	for phase in (
+		"config",
+		"git_detection",
+		"build_graph",
+		"discovery",
+		"classification",
+		"parsing",
+		"edge_building",
+		"dot_writing",
+		"html",
+	):
+		assert summary["phases"][phase]["calls"] == 1, phase
+	counters = summary["counters"]
+	assert counters["python_files"] > 0
+	assert counters["files_read"] > 0
+	assert counters["bytes_read"] > 0
+	assert counters["cache_misses"] == counters["files_read"]
+	assert counters["dot_bytes"] > 0
+
+	with open(f"{output}.trace.json") as f:
+		assert len(json.load(f)["traceEvents"]) >= 9
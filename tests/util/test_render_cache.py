@@ -0,0 +1,155 @@
+import os
+import subprocess
+from copy import deepcopy
+
+import networkx as nx
+import pytest
+
+import dep_graph_viz.dot
+from dep_graph_viz.config import _DEFAULT_CONFIG
+from dep_graph_viz.dep_graph_viz import write_outputs
+from dep_graph_viz.util.render_cache import RenderCache
+
+
+@pytest.fixture
+def fake_dot(monkeypatch):
+	"stand-in for graphviz which records the formats it rendered"
+	rendered: list[str] = []
+
+	def _run(args, **kwargs):
+		rendered.append(args[1])
+		output_path: str = args[args.index("-o") + 1]
+		with open(output_path, "wb") as f:
+			f.write(args[1].encode() + b"\n" + kwargs["input"])
+		return subprocess.CompletedProcess(args, 0)
+
+	monkeypatch.setattr(dep_graph_viz.dot.subprocess, "run", _run)
+	return rendered
+
+
+@pytest.fixture
+def config(tmp_path):
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["render_cache"]["dir"] = str(tmp_path / "cache")
+	return config
+
+
+def _graph(label: str) -> nx.MultiDiGraph:
+	G = nx.MultiDiGraph()
+	G.add_edge("a", label, key="uses", color="red")
+	return G
+
+
+def _write(G, tmp_path, config, output_fmt="svg,png") -> dict[str, str]:
+	return write_outputs(
+		G,
+		output=str(tmp_path / "out"),
+		output_fmt=output_fmt,
+		config=config,
+		render_cache=RenderCache(config["render_cache"]["dir"], graphviz_version="dot 1.0"),
+	)
+
+
+def test_identical_dot_skips_rendering(tmp_path, config, fake_dot):
+	paths = _write(_graph("b"), tmp_path, config)
+	assert sorted(fake_dot) == ["-Tpng", "-Tsvg"]
+	first: bytes = open(paths["svg"], "rb").read()
+
+	os.remove(paths["svg"])
+	paths = _write(_graph("b"), tmp_path, config)
+	assert len(fake_dot) == 2
+	assert open(paths["svg"], "rb").read() == first
+
+	# different DOT is rendered
+	_write(_graph("c"), tmp_path, config, output_fmt="svg")
+	assert fake_dot[2:] == ["-Tsvg"]
+
+
+def test_rendering_over_a_hardlinked_output_keeps_the_cache(tmp_path, config, fake_dot):
+	paths = _write(_graph("b"), tmp_path, config, output_fmt="svg")
+	_write(_graph("b"), tmp_path, config, output_fmt="svg")
+	cached: bytes = open(paths["svg"], "rb").read()
+
+	_write(_graph("c"), tmp_path, config, output_fmt="svg")
+	assert open(paths["svg"], "rb").read() != cached
+	_write(_graph("b"), tmp_path, config, output_fmt="svg")
+	assert open(paths["svg"], "rb").read() == cached
+	assert len(fake_dot) == 2
+
+
+def test_failed_render_keeps_the_output(tmp_path, config, monkeypatch):
+	(tmp_path / "out.svg").write_text("old")
+
+	def _run(args, **kwargs):
+		# a partial output, then an error
+		with open(args[args.index("-o") + 1], "wb") as f:
+			f.write(b"<sv")
+		raise subprocess.CalledProcessError(1, args, stderr=b"syntax error")
+
+	monkeypatch.setattr(dep_graph_viz.dot.subprocess, "run", _run)
+	with pytest.raises(RuntimeError):
+		_write(_graph("b"), tmp_path, config, output_fmt="svg")
+	assert (tmp_path / "out.svg").read_text() == "old"
+	assert sorted(os.listdir(tmp_path)) == ["out.dot", "out.svg"]
+
+
+def test_key_depends_on_version_and_format(tmp_path):
+	cache = RenderCache(str(tmp_path), graphviz_version="dot 1.0")
+	other = RenderCache(str(tmp_path), graphviz_version="dot 2.0")
+	assert cache.key("digraph {}", "svg") != cache.key("digraph {}", "png")
+	assert cache.key("digraph {}", "svg") != other.key("digraph {}", "svg")
+	assert cache.key("digraph {}", "svg") == cache.key("digraph {}", "svg")
+
+
+@pytest.mark.parametrize("hardlink", [True, False])
+def test_fetch(tmp_path, hardlink):
+	cache = RenderCache(str(tmp_path / "cache"), graphviz_version="v", hardlink=hardlink)
+	out = tmp_path / "out.svg"
+	out.write_bytes(b"<svg/>")
+	key = cache.key("digraph {}", "svg")
+	assert not cache.fetch(key, "svg", str(out))
+	cache.store(key, "svg", str(out))
+
+	out.write_bytes(b"stale")
+	assert cache.fetch(key, "svg", str(out))
+	assert out.read_bytes() == b"<svg/>"
+	assert os.path.samefile(out, cache.artifact_path(key, "svg")) == hardlink
+	assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evict_least_recently_used(tmp_path):
+	cache = RenderCache(str(tmp_path / "cache"), graphviz_version="v", max_bytes=250)
+	src = tmp_path / "src"
+	keys: list[str] = []
+	for i in range(4):
+		src.write_bytes(b"x" * 100)
+		key = cache.key(f"digraph {{ {i} }}", "svg")
+		cache.store(key, "svg", str(src))
+		os.utime(cache.artifact_path(key, "svg"), (1000 + i, 1000 + i))
+		keys.append(key)
+	# using the oldest one makes it the most recent
+	assert cache.fetch(keys[0], "svg", str(tmp_path / "out.svg"))
+
+	assert cache.evict() == 2
+	assert [os.path.exists(cache.artifact_path(k, "svg")) for k in keys] == [
+		True,
+		False,
+		False,
+		True,
+	]
+
+
+def test_from_config(tmp_path, monkeypatch):
+	config = deepcopy(_DEFAULT_CONFIG)
+	config["render_cache"]["dir"] = str(tmp_path)
+	monkeypatch.setattr(dep_graph_viz.dot, "graphviz_version", lambda: "dot 1.0")
+	cache = RenderCache.from_config(config)
+	assert cache is not None and cache.cache_dir == str(tmp_path)
+	assert cache.graphviz_version == "dot 1.0"
+
+	config["render_cache"]["enabled"] = False
+	assert RenderCache.from_config(config) is None
+
+	config["render_cache"]["enabled"] = True
+	monkeypatch.setattr(dep_graph_viz.dot, "graphviz_version", lambda: None)
+	assert RenderCache.from_config(config) is None